@@ -23,6 +23,9 @@ setup(
     # TODO: add keywords
     #keywords='',
     install_requires = ['python-dateutil', 'arrow'],
+    extras_require = {
+        'analytics': ['numpy'],
+    },
     classifiers = [
         "License :: OSI Approved :: GNU Affero General Public License v3"
         "Operating System :: MacOS :: MacOS X",
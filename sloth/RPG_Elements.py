@@ -1,9 +1,9 @@
 #!/usr/bin/python3
-#RPG_Elements.py
-#This program is still a work in progress
+# RPG_Elements.py
+# This program is still a work in progress
 
 '''
-    RPG_Elements.py contains all the elements and data needed for npc's 
+    RPG_Elements.py contains all the elements and data needed for npc's
     Copyright (C) 2017 Acedia, Lvl4Sword     Authors: Denkweise9, Lvl4Sword
 
     This program is free software: you can redistribute it and/or modify
@@ -20,311 +20,28 @@
     along with this program.  If not, see https://www.gnu.org/licenses/.
 '''
 
-import sloth, random
+from sloth.npcs import default_registry
 
-# Values are Races in Game, Keys are the classes to each object
-RPG_Elements_Races = {
-"Elves":[Elf_general, Elf_guard, Elf],
-"Humans":[General, Guard, Farmer, Blacksmith, Merchant, Bandit, Soldier, Giant],
-"Dwarves":[Dwarf_guard, Dwarven_miner, Dwarf],
-"Goblins":[Goblin_reg, Goblin_general, Goblin_guard],
-"Skeletons":[Zombie, Skeleton, Ghost],
-"Animals":[Cow, Pig, Chicken, Horse, Goat, Dog, Cat, Mule, Tiger, Lion, Unicorn],
-# Are the following possible?
-"Monsters":[Dragon, Kraken]
-}
-
-# Values are Characters that are teamed with our user through quests and adventure, keys are the stats
-RPG_Elements_Characters = {
-     User:{},
-     Ivan:{},
+registry = default_registry()
 
-}
-
-
-#NPC's to kill. Just General NPC's not quest/story related ones.
-#Would contain Currency_Dropped, Items Dropped, and XP_Given.
-RPG_Elements_NPCs = {
-    Goblin_reg:{},
-    Goblin_general:{},
-    Skeleton:{},
-    Cow:{},
-    Pig:{},
-    Horse:{},
-    Chicken:{},
-    Goat:{},
-   
+# Keys are Races in Game, values are the names of their archetypes.
+# The archetypes themselves live in npcs.json; spawn NPCs with
+# registry.spawn(name).
+RPG_Elements_Races = registry.races()
 
+# Characters that are teamed with our user through quests and adventure
+RPG_Elements_Characters = {
+    "User": {},
+    "Ivan": {},
 }
 
+# NPC's to kill. Just General NPC's not quest/story related ones.
+npc_names = ("Goblin", "Goblin general", "Skeleton", "Cow", "Pig", "Horse",
+             "Chicken", "Goat")
 
-
-#below is an experiment, is not final, and needs updating
-class Goblin_reg(object):
-    agility = 3
-    #charisma and intelligence are not applied because this is a regular npc goblin
-    def __init__(self, life, attack_lvl, defence_lvl):   #rh = right hand, ll = left leg
-        self.life = life
-        self.attack_lvl = attack_lvl
-        self.defence_lvl = defence_lvl
-    def attack(self, target):
-        if attack_lvl >= target.defence_lvl:
-            target.life -= 10
-            if taget.life <= 0:
-                print("target dead")
-                return False
-            
-class Goblin_general(object):
-    intelligence = 10
-    
-    def __init__(self, life, attack_lvl, defence_lvl, agility_lvl, charisma_lvl, strength_lvl, 
-               rh, lh, rl, ll ): #rh = right hand, ll = left leg. these slots hold equipment  
-        self.life = life
-        self.attack_lvl = attack_lvl
-        self.defence_lvl = defence_lvl
-        self.agility_lvl = agility_lvl
-        self.charisma_lvl = charisma_lvl
-        self.strength_lvl = strength_lvl
-        self.rh = rh
-        self.lh = lh
-        self.rl = rl
-        self.ll = ll
-    def attack(self, target):
-        if attack_lvl >= target.defence_lvl:
-            target.life -= 10
-            if taget.life <= 0:
-                print("target dead")
-                return False
-            
-class Elf_general(object):
-    intelligence = 65
-    
-    def __init__(self, life, attack_lvl, defence_lvl, agility_lvl, charisma_lvl, strength_lvl, 
-               rh, lh, rl, ll ): #rh = right hand, ll = left leg. these slots hold equipment  
-        self.life = life
-        self.attack_lvl = attack_lvl
-        self.defence_lvl = defence_lvl
-        self.agility_lvl = agility_lvl
-        self.charisma_lvl = charisma_lvl
-        self.strength_lvl = strength_lvl
-        self.rh = rh
-        self.lh = lh
-        self.rl = rl
-        self.ll = ll
-    def attack(self, target):
-        if attack_lvl >= target.defence_lvl:
-            target.life -= 10
-            if taget.life <= 0:
-                print("target dead")
-                return False
-              
-class Dwarf_general(object):
-    intelligence = 50
-    
-    def __init__(self, life, attack_lvl, defence_lvl, agility_lvl, charisma_lvl, strength_lvl, 
-               rh, lh, rl, ll ): #rh = right hand, ll = left leg. these slots hold equipment  
-        self.life = life
-        self.attack_lvl = attack_lvl
-        self.defence_lvl = defence_lvl
-        self.agility_lvl = agility_lvl
-        self.charisma_lvl = charisma_lvl
-        self.strength_lvl = strength_lvl
-        self.rh = rh
-        self.lh = lh
-        self.rl = rl
-        self.ll = ll
-    def attack(self, target):
-        if attack_lvl >= target.defence_lvl:
-            target.life -= 10
-            if taget.life <= 0:
-                print("target dead")
-                return False
-            
-class Skeleton_general(object):
-    intelligence = 10
-    
-    def __init__(self, life, attack_lvl, defence_lvl, agility_lvl, charisma_lvl, strength_lvl, 
-               rh, lh, rl, ll ): #rh = right hand, ll = left leg. these slots hold equipment  
-        self.life = life
-        self.attack_lvl = attack_lvl
-        self.defence_lvl = defence_lvl
-        self.agility_lvl = agility_lvl
-        self.charisma_lvl = charisma_lvl
-        self.strength_lvl = strength_lvl
-        self.rh = rh
-        self.lh = lh
-        self.rl = rl
-        self.ll = ll
-    def attack(self, target):
-        if attack_lvl >= target.defence_lvl:
-            target.life -= 10
-            if taget.life <= 0:
-                print("target dead")
-                return False
-            
-class General(object  #this is basically a human general
-    intelligence = 10
-    living = True
-    
-    def __init__(self, life, attack_lvl, defence_lvl, agility_lvl, charisma_lvl, strength_lvl, 
-               rh, lh, rl, ll ): #rh = right hand, ll = left leg. these slots hold equipment  
-        self.life = life
-        self.attack_lvl = attack_lvl
-        self.defence_lvl = defence_lvl
-        self.agility_lvl = agility_lvl
-        self.charisma_lvl = charisma_lvl
-        self.strength_lvl = strength_lvl
-        self.rh = rh
-        self.lh = lh
-        self.rl = rl
-        self.ll = ll
-    def attack(self, target):
-        if attack_lvl >= target.defence_lvl:
-            target.life -= 10
-            if taget.life <= 0:
-                living = False
-                print("target dead")
-                return living
-              
-              
-              
-#This code is modular, so fixing one animal class can apply to others        
-class Goat(object):
-     living = True
-
-     def __init__(self, life, attack_lvl, strength_lvl, defence_lvl):
-          self.life = life
-          self.attack_lvl = attack_lvl
-          self.strength_lvl = strength_lvl
-          self.defence_lvl = defence_lvl
-     def attack(self, target):
-         if attack_lvl >= target.defence_lvl:
-             target.life -= 10
-             if taget.life <= 0:
-                 living = False
-                 print("target dead")
-                 return living
-
-class Pig(object):
-     living = True
-
-     def __init__(self, life, attack_lvl, strength_lvl, defence_lvl):
-          self.life = life
-          self.attack_lvl = attack_lvl
-          self.strength_lvl = strength_lvl
-          self.defence_lvl = defence_lvl
-     def attack(self, target):
-         if attack_lvl >= target.defence_lvl:
-             target.life -= 10
-             if taget.life <= 0:
-                 living = False
-                 print("target dead")
-                 return living
-
-class Horse(object):
-     living = True
-
-     def __init__(self, life, attack_lvl, strength_lvl, defence_lvl):
-          self.life = life
-          self.attack_lvl = attack_lvl
-          self.strength_lvl = strength_lvl
-          self.defence_lvl = defence_lvl
-     def attack(self, target):
-         if attack_lvl >= target.defence_lvl:
-             target.life -= 10
-             if taget.life <= 0:
-                 living = False
-                 print("target dead")
-                 return living    
-
-class Chicken(object):
-     living = True
-
-     def __init__(self, life, attack_lvl, strength_lvl, defence_lvl):
-          self.life = life
-          self.attack_lvl = attack_lvl
-          self.strength_lvl = strength_lvl
-          self.defence_lvl = defence_lvl
-     def attack(self, target):
-         if attack_lvl >= target.defence_lvl:
-             target.life -= 10
-             if taget.life <= 0:
-                 living = False
-                 print("target dead")
-                 return living      
-
-class Cow(object):
-     living = True
-
-     def __init__(self, life, attack_lvl, strength_lvl, defence_lvl):
-          self.life = life
-          self.attack_lvl = attack_lvl
-          self.strength_lvl = strength_lvl
-          self.defence_lvl = defence_lvl
-     def attack(self, target):
-         if attack_lvl >= target.defence_lvl:
-             target.life -= 10
-             if taget.life <= 0:
-                 living = False
-                 print("target dead")
-                 return living
-
-class Dog(object):
-     living = True
-
-     def __init__(self, life, attack_lvl, strength_lvl, defence_lvl):
-          self.life = life
-          self.attack_lvl = attack_lvl
-          self.strength_lvl = strength_lvl
-          self.defence_lvl = defence_lvl
-     def attack(self, target):
-         if attack_lvl >= target.defence_lvl:
-             target.life -= 10
-             if taget.life <= 0:
-                 living = False
-                 print("target dead")
-                 return living
-
-
-class Cat(object):
-     living = True
-
-     def __init__(self, life, attack_lvl, strength_lvl, defence_lvl):
-          self.life = life
-          self.attack_lvl = attack_lvl
-          self.strength_lvl = strength_lvl
-          self.defence_lvl = defence_lvl
-     def attack(self, target):
-         if attack_lvl >= target.defence_lvl:
-             target.life -= 10
-             if taget.life <= 0:
-                 living = False
-                 print("target dead")
-                 return living
-
-class Wolf(object):
-     living = True
-
-     def __init__(self, life, attack_lvl, strength_lvl, defence_lvl):
-          self.life = life
-          self.attack_lvl = attack_lvl
-          self.strength_lvl = strength_lvl
-          self.defence_lvl = defence_lvl
-     def attack(self, target):
-         if attack_lvl >= target.defence_lvl:
-             target.life -= 10
-             if taget.life <= 0:
-                 living = False
-                 print("target dead")
-                 return living
-#The following below is for exmaples only
-c = Goblin_reg(10,10,10)
-g = Goblin_reg(10,10,10)
-
-'''
-The following was tested
-In [69]: c.attack(g)
-target dead
-Out[69]: False
-'''
-
+RPG_Elements_NPCs = dict(
+    (archetype.name, {"Currency_Dropped": archetype.currency,
+                      "Items_Dropped": list(archetype.drops),
+                      "XP_Given": archetype.xp})
+    for archetype in map(registry.get, npc_names)
+)
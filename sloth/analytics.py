@@ -0,0 +1,187 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Needs numpy, install with the "analytics" extra.
+#
+import numpy
+from sloth.store import BinaryLogsStore
+
+# Unix time starts on a Thursday, weeks start on a Monday.
+WEEK_SECONDS = 7 * 24 * 3600
+WEEK_OFFSET = 3 * 24 * 3600
+
+_float_keys = ("Average", "Distance", "Points", "Total")
+
+# Matches BinaryLogsStore.record_format, so binary logs load straight
+# from the file without unpacking records one by one.
+_binary_dtype = numpy.dtype([
+    ("Average", "<f8"), ("Distance", "<f8"), ("Points", "<f8"),
+    ("Total", "<f8"), ("UTC", "<f8"), ("Exercise", "<u2"),
+    ("Measuring", "<u2"), ("int_mask", "u1"), ("null_mask", "u1"),
+])
+
+
+def _float(value):
+    return numpy.nan if value is None else value
+
+
+class LogColumns(object):
+    """
+    The entries of a log as columns: ``utc`` as int64, ``average``,
+    ``distance``, ``points`` and ``total`` as float64, and ``exercise``
+    as categorical codes into the ``exercise_names`` list.
+
+    Missing values are NaN, or 0 for UTC. Build one from a logs store
+    with `from_store`.
+    """
+    def __init__(self, utc, average, distance, points, total, exercise,
+                 exercise_names):
+        self.utc = utc
+        self.average = average
+        self.distance = distance
+        self.points = points
+        self.total = total
+        self.exercise = exercise
+        self.exercise_names = list(exercise_names)
+
+    def __len__(self):
+        return len(self.utc)
+
+    @classmethod
+    def from_store(cls, logs):
+        """
+        Load every entry of the `LogsStore` or `BinaryLogsStore` ``logs``.
+        """
+        if isinstance(logs, BinaryLogsStore):
+            return cls._from_binary(logs)
+        columns = {key: [] for key in _float_keys}
+        utc = []
+        exercise = []
+        codes = {}
+        fields = _float_keys + ("UTC", "Exercise")
+        for values in logs.scan(fields=fields):
+            for key, value in zip(_float_keys, values):
+                columns[key].append(_float(value))
+            utc.append(values[4] or 0)
+            exercise.append(codes.setdefault(values[5], len(codes)))
+        return cls(
+            utc=numpy.array(utc, dtype=numpy.int64),
+            average=numpy.array(columns["Average"], dtype=numpy.float64),
+            distance=numpy.array(columns["Distance"], dtype=numpy.float64),
+            points=numpy.array(columns["Points"], dtype=numpy.float64),
+            total=numpy.array(columns["Total"], dtype=numpy.float64),
+            exercise=numpy.array(exercise, dtype=numpy.int32),
+            exercise_names=sorted(codes, key=codes.get)
+        )
+
+    @classmethod
+    def _from_binary(cls, logs):
+        records = numpy.frombuffer(logs.read_records(), dtype=_binary_dtype)
+        nulls = records["null_mask"]
+        columns = {}
+        for bit, key in enumerate(_float_keys):
+            column = records[key].copy()
+            column[(nulls & (1 << bit)) != 0] = numpy.nan
+            columns[key] = column
+        utc = records["UTC"].copy()
+        utc[(nulls & (1 << 4)) != 0] = 0
+        # The names table also holds Measuring values: keep only the
+        # names used as exercises, with -1 standing for a null.
+        codes = records["Exercise"].astype(numpy.int64)
+        codes[(nulls & (1 << 5)) != 0] = -1
+        used, exercise = numpy.unique(codes, return_inverse=True)
+        names = logs.names
+        return cls(
+            utc=utc.astype(numpy.int64),
+            average=columns["Average"],
+            distance=columns["Distance"],
+            points=columns["Points"],
+            total=columns["Total"],
+            exercise=exercise.ravel().astype(numpy.int32),
+            exercise_names=[None if code < 0 else names[code]
+                            for code in used.tolist()]
+        )
+
+    def exercise_code(self, name):
+        """
+        Return the code of the exercise ``name``, or -1 if it isn't in
+        the log.
+        """
+        try:
+            return self.exercise_names.index(name)
+        except ValueError:
+            return -1
+
+    def losses(self):
+        """
+        Return the XP lost on each entry: the Total of DETERIORATE
+        entries, 0 for the others.
+        """
+        deteriorate = self.exercise == self.exercise_code("DETERIORATE")
+        return numpy.where(deteriorate, self.total, 0.0)
+
+    def xp_over_time(self):
+        """
+        Return ``(utc, xp)`` arrays of the total XP after each entry, in
+        UTC order.
+        """
+        order = numpy.argsort(self.utc, kind="stable")
+        gained = numpy.nan_to_num(self.points) - numpy.nan_to_num(
+            self.losses())
+        return self.utc[order], numpy.cumsum(gained[order])
+
+    def exercise_totals(self, column="points"):
+        """
+        Return a dict of the sum of ``column`` for every exercise.
+        """
+        values = numpy.nan_to_num(getattr(self, column))
+        sums = numpy.bincount(self.exercise, weights=values,
+                              minlength=len(self.exercise_names))
+        return dict(zip(self.exercise_names, sums.tolist()))
+
+    def weekly(self, column="points"):
+        """
+        Return ``(week_starts, sums)`` arrays: the UTC of the Monday
+        starting each week that has entries, and the sum of ``column``
+        in that week.
+        """
+        weeks = (self.utc + WEEK_OFFSET) // WEEK_SECONDS
+        unique_weeks, inverse = numpy.unique(weeks, return_inverse=True)
+        values = numpy.nan_to_num(getattr(self, column))
+        sums = numpy.bincount(inverse.ravel(), weights=values,
+                              minlength=len(unique_weeks))
+        return unique_weeks * WEEK_SECONDS - WEEK_OFFSET, sums
+
+    def rolling_average(self, window, exercise=None, column="average"):
+        """
+        Return ``(utc, means)`` arrays of the mean of ``column`` (the
+        cardio pace by default) over each ``window`` consecutive entries
+        of ``exercise``, or of every exercise but DETERIORATE.
+        """
+        if exercise is None:
+            selected = self.exercise != self.exercise_code("DETERIORATE")
+        else:
+            selected = self.exercise == self.exercise_code(exercise)
+        order = numpy.argsort(self.utc, kind="stable")
+        order = order[selected[order]]
+        values = getattr(self, column)[order]
+        if window <= 0 or len(values) < window:
+            return (numpy.empty(0, dtype=numpy.int64),
+                    numpy.empty(0, dtype=numpy.float64))
+        sums = numpy.cumsum(numpy.concatenate(([0.0], values)))
+        means = (sums[window:] - sums[:-window]) / window
+        return self.utc[order][window - 1:], means
@@ -0,0 +1,174 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import csv
+import datetime
+import json
+import os
+import time
+from collections import namedtuple
+from sloth import userinput
+from sloth.store import LogEntry
+from sloth.userinput import ConversionFailed
+
+RowError = namedtuple('RowError', ['path', 'line', 'message'])
+
+# Columns a row must have, and the defaults of the ones it may leave out.
+# Column names are not case sensitive.
+required_columns = ('exercise', 'date', 'time', 'points')
+optional_columns = {'when': '00:00:00', 'distance': '0'}
+
+distance_converters = {
+    'I': userinput.cardio_distance_imperial_converter,
+    'M': userinput.cardio_distance_metric_converter,
+}
+
+
+def file_format_for(path):
+    """
+    Guess the format of a workout file from its extension.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    elif extension in ('.jsonl', '.json'):
+        return 'jsonl'
+    raise ValueError('Unknown workout file format: {0}'.format(path))
+
+
+def read_csv(infile):
+    reader = csv.DictReader(infile)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl(infile):
+    for line_number, line in enumerate(infile, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row
+
+
+readers = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+def read_rows(path, file_format=None):
+    """
+    Yield ``(line_number, row)`` for each workout in the file at
+    `path`, where a row is a dict of raw values (or None if the line
+    could not be decoded at all).
+    """
+    reader = readers[file_format or file_format_for(path)]
+    with open(path, encoding='utf-8', newline='') as infile:
+        for line_number, row in reader(infile):
+            yield line_number, row
+
+
+def _raw_values(row):
+    """
+    Return the row's values as the strings a user would have typed,
+    keyed by lower case column name.
+    """
+    if not isinstance(row, dict):
+        raise ConversionFailed('Not a row of named columns')
+    values = {}
+    for column, value in row.items():
+        if column is None or value is None:
+            continue
+        values[column.strip().lower()] = str(value)
+    for column, default in optional_columns.items():
+        if not values.get(column, '').strip():
+            values[column] = default
+    missing = [column for column in required_columns
+               if column not in values]
+    if missing:
+        raise ConversionFailed(
+            'Missing {0}'.format(', '.join(sorted(missing))))
+    return values
+
+
+def _exercise(raw_value):
+    exercise = raw_value.strip().capitalize()
+    if not exercise:
+        raise ConversionFailed('No exercise given')
+    if exercise == 'Deteriorate':
+        raise ConversionFailed('DETERIORATE entries can not be imported')
+    return exercise
+
+
+points_field = userinput.Field(
+    int, 'Please enter a whole number',
+    at_least=(0, 'Points can\'t be negative')
+)
+
+
+def _utc(date, when):
+    local = datetime.datetime.combine(date, when)
+    return int(time.mktime(local.timetuple()))
+
+
+def convert_row(row, measuring):
+    """
+    Validate a row through the same converters as the interactive
+    prompts, and return it as a `LogEntry`. Raises `ConversionFailed`
+    for the first invalid value.
+    """
+    values = _raw_values(row)
+    date = userinput.cardio_date_converter(values['date'])
+    when = userinput.cardio_when_converter(values['when'])
+    seconds = userinput.cardio_time_converter(values['time'])
+    distance = distance_converters[measuring](values['distance'],
+                                              activity=None)
+
+    entry = LogEntry()
+    entry.average = distance / (seconds / 3600) if seconds else 0
+    entry.distance = distance
+    entry.exercise = _exercise(values['exercise'])
+    entry.measuring = measuring
+    entry.points = points_field(values['points'])
+    entry.total = seconds
+    entry.utc = _utc(date, when)
+    return entry
+
+
+def import_files(paths, logs, measuring, file_format=None, _print=print):
+    """
+    Validate every row of the workout files at `paths` and append the
+    valid ones to `logs` with a single write, oldest first.
+
+    Each invalid row is reported through `_print` and skipped. Returns
+    ``(entries, errors)``: the `LogEntry` objects appended and a
+    `RowError` for every row that was skipped.
+    """
+    entries = []
+    errors = []
+    with userinput.cached_parsing():
+        for path in paths:
+            for line_number, row in read_rows(path, file_format):
+                try:
+                    entries.append(convert_row(row, measuring))
+                except ConversionFailed as e:
+                    error = RowError(path, line_number, e.failure_message)
+                    errors.append(error)
+                    _print('{0}:{1}: {2}'.format(*error))
+    entries.sort(key=lambda entry: entry.utc)
+    logs.append_many(entries)
+    return entries, errors
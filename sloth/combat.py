@@ -0,0 +1,139 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import random
+from array import array
+from collections import namedtuple
+from sloth.entities import TYPECODE
+from sloth.entities import numpy
+from sloth.npcs import HIT
+
+# The outcome of a round. `damage` holds the damage dealt by each
+# attacker/target pair, in order; `deaths` the ids of the targets the
+# round killed, in increasing order. Both are arrays of C ints: NumPy
+# arrays for a store using NumPy, `array.array` otherwise.
+RoundResult = namedtuple('RoundResult', ['damage', 'deaths'])
+
+
+class CombatEngine(object):
+    """
+    Resolve rounds of attacks between the entities of an `EntityStore`
+    all at once, with the rule of `NPC.attack`: an attacker hits when
+    its attack is at least the target's defence, and a hit takes `hit`
+    life.
+
+    Every attack of a round happens at the same time: each attacker
+    alive when the round starts attacks, even if it is killed in the
+    same round, and a target attacked several times takes every hit.
+
+    Targets are picked with a `random.Random` of the engine's own,
+    seeded with `seed`, so the same seed and population always fight
+    the same battle, with or without NumPy.
+    """
+    def __init__(self, store, seed=None, hit=HIT):
+        self.store = store
+        self.random = random.Random(seed)
+        self.hit = hit
+
+    def pick_targets(self, attackers, candidates):
+        """
+        Return a random target among `candidates` for each attacker,
+        never the attacker itself unless it is the only candidate.
+        """
+        candidates = _as_list(candidates)
+        attackers = _as_list(attackers)
+        count = len(candidates)
+        if not count and attackers:
+            raise ValueError('There is nobody to attack')
+        randrange = self.random.randrange
+        targets = [candidates[randrange(count)] for attacker in attackers]
+        if count > 1:
+            # Whoever picked itself picks again among the others.
+            for position, attacker in enumerate(attackers):
+                if targets[position] == attacker:
+                    index = candidates.index(attacker)
+                    index = (index + 1 + randrange(count - 1)) % count
+                    targets[position] = candidates[index]
+        return array(TYPECODE, targets)
+
+    def resolve(self, attackers, targets):
+        """
+        Resolve one round of each of `attackers` attacking the target
+        at the same position of `targets`, and return a `RoundResult`.
+        """
+        if len(attackers) != len(targets):
+            raise ValueError('Every attacker needs exactly one target')
+        if self.store.use_numpy:
+            return self._resolve_numpy(attackers, targets)
+        return self._resolve_arrays(attackers, targets)
+
+    def _resolve_numpy(self, attackers, targets):
+        columns = self.store.columns
+        life = columns['life']
+        attackers = numpy.asarray(attackers, dtype=numpy.intp)
+        targets = numpy.asarray(targets, dtype=numpy.intp)
+        struck = numpy.unique(targets)
+        alive_before = life[struck] > 0
+        hits = ((life[attackers] > 0) &
+                (columns['attack'][attackers] >= columns['defence'][targets]))
+        damage = numpy.where(hits, self.hit, 0).astype(numpy.intc)
+        taken = numpy.bincount(targets, weights=damage,
+                               minlength=len(life)).astype(numpy.intc)
+        # Only write the targets' life: other processes may be updating
+        # the rest of a shared column (see `ShardedWorld`).
+        life[struck] -= taken[struck]
+        deaths = struck[alive_before & (life[struck] <= 0)]
+        return RoundResult(damage, deaths.astype(numpy.intc))
+
+    def _resolve_arrays(self, attackers, targets):
+        columns = self.store.columns
+        life = columns['life']
+        attack = columns['attack']
+        defence = columns['defence']
+        hit = self.hit
+        alive_before = dict((target, life[target] > 0) for target in targets)
+        damage = array(TYPECODE)
+        for attacker, target in zip(attackers, targets):
+            if life[attacker] > 0 and attack[attacker] >= defence[target]:
+                damage.append(hit)
+            else:
+                damage.append(0)
+        for target, dealt in zip(targets, damage):
+            life[target] -= dealt
+        deaths = array(TYPECODE, sorted(
+            target for target, alive in alive_before.items()
+            if alive and life[target] <= 0))
+        return RoundResult(damage, deaths)
+
+    def round(self, attackers=None):
+        """
+        Have `attackers` (by default every living entity) each attack a
+        random living entity. Returns ``(targets, result)``: the
+        targets picked and the `RoundResult`.
+        """
+        candidates = self.store.living()
+        if attackers is None:
+            attackers = candidates
+        targets = self.pick_targets(attackers, candidates)
+        return targets, self.resolve(attackers, targets)
+
+
+def _as_list(ids):
+    # Plain ints compare and index much faster than NumPy scalars.
+    if hasattr(ids, 'tolist'):
+        return ids.tolist()
+    return list(ids)
@@ -0,0 +1,112 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import bisect
+
+
+class Completer(object):
+    """
+    Tab completion for readline over a catalog of names.
+
+    The names are kept sorted by their casefolded form, so the names
+    starting with some text are found with a bisection followed by a
+    walk over the matches. When nothing starts with the text, names
+    containing its characters in order are offered instead (so "pshp"
+    finds "Pushups"), closest first.
+
+    `aliases` maps extra names to a name in `options`; typing an alias
+    completes to the name it stands for.
+    """
+    def __init__(self, options, aliases=None):
+        self.options = tuple(sorted(options, key=str.casefold))
+        names = {}
+        for option in self.options:
+            names.setdefault(option.casefold(), option)
+        for alias, option in (aliases or {}).items():
+            names.setdefault(alias.casefold(), option)
+        self._keys = sorted(names)
+        self._names = [names[key] for key in self._keys]
+        self.matches = self.options
+
+    def prefix_matches(self, text):
+        """
+        Return the names starting with `text`, ignoring case.
+        """
+        prefix = text.casefold()
+        start = bisect.bisect_left(self._keys, prefix)
+        stop = start
+        while stop < len(self._keys) and self._keys[stop].startswith(prefix):
+            stop += 1
+        return self._unique(self._names[start:stop])
+
+    def fuzzy_matches(self, text):
+        """
+        Return the names containing the characters of `text` in order,
+        ignoring case, with the tightest matches first.
+        """
+        needle = text.casefold()
+        scored = []
+        for key, name in zip(self._keys, self._names):
+            span = _subsequence_span(needle, key)
+            if span is not None:
+                scored.append((span, key, name))
+        scored.sort()
+        return self._unique(name for span, key, name in scored)
+
+    def find(self, text):
+        if not text:
+            return self.options
+        return self.prefix_matches(text) or self.fuzzy_matches(text)
+
+    def complete(self, text, state):
+        # on first trigger, find the possible matches
+        if state == 0:
+            self.matches = self.find(text)
+        try:
+            # return match indexed by state
+            return self.matches[state]
+        except IndexError:
+            return None
+
+    @staticmethod
+    def _unique(names):
+        seen = set()
+        return [name for name in names
+                if not (name in seen or seen.add(name))]
+
+
+def _subsequence_span(needle, key):
+    """
+    Return the length of the shortest part of `key` holding the
+    characters of `needle` in order, or None if there is none.
+    """
+    if not needle:
+        return 0
+    best = None
+    start = key.find(needle[0])
+    while start >= 0:
+        # From a given start, taking each next character as soon as
+        # possible gives the shortest span.
+        position = start
+        for char in needle[1:]:
+            position = key.find(char, position + 1)
+            if position < 0:
+                return best
+        if best is None or position - start + 1 < best:
+            best = position - start + 1
+        start = key.find(needle[0], start + 1)
+    return best
@@ -0,0 +1,46 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Each period loses 20% of the XP, until the XP falls under THRESHOLD.
+LOST = 0.2
+KEPT = 0.8
+THRESHOLD = 199.20000000000002
+
+
+def decay(xp, periods):
+    """
+    Return ``(xp, losses)``: the XP left after ``periods`` periods
+    without logging, and the XP lost in each period that lost any.
+
+    Every period keeps ``round(xp * 0.8)`` of the XP (rounded each time,
+    so this is not exactly ``xp * 0.8 ** periods``) while the XP is at
+    least `THRESHOLD`. Nothing is lost unless the first period would
+    keep more than `THRESHOLD`. As no period loses anything once the XP
+    is under `THRESHOLD`, only a few dozen periods are ever computed,
+    however long the absence.
+    """
+    losses = []
+    if periods < 1 or xp * KEPT <= THRESHOLD:
+        return xp, losses
+    xp = int(xp)
+    for each in range(periods):
+        if xp < THRESHOLD:
+            break
+        losses.append(round(xp * LOST))
+        xp = round(xp * KEPT)
+    return xp, losses
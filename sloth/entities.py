@@ -0,0 +1,317 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+from array import array
+from sloth.npcs import HIT
+from sloth.npcs import equipment_slots
+from sloth.npcs import default_registry
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Every column holds C ints
+TYPECODE = 'i'
+
+
+class Entity(object):
+    """
+    A handle on one entity of an `EntityStore`, with the attributes of
+    an `NPC`. It holds nothing but the store and the entity id, so
+    handles can be made and dropped freely.
+    """
+    __slots__ = ('store', 'id')
+
+    def __init__(self, store, id):
+        self.store = store
+        self.id = id
+
+    def __eq__(self, other):
+        return (isinstance(other, Entity) and self.store is other.store
+                and self.id == other.id)
+
+    def __hash__(self):
+        return hash((id(self.store), self.id))
+
+    def __repr__(self):
+        return '<Entity {0} {1!r}>'.format(self.id, self.name)
+
+    @property
+    def archetype(self):
+        return self.store.archetype_of(self.id)
+
+    name = property(lambda self: self.archetype.name)
+    race = property(lambda self: self.archetype.race)
+
+    @property
+    def living(self):
+        return self.life > 0
+
+    @property
+    def equipment(self):
+        return tuple(self.equipped(slot) for slot in self.archetype.slots)
+
+    def equipped(self, slot):
+        self.archetype.slots.index(slot)
+        return self.store.item_name(self.store.columns[slot][self.id])
+
+    def equip(self, slot, item):
+        """
+        Wear `item` in `slot` (None to empty it).
+        """
+        self.archetype.slots.index(slot)
+        self.store.columns[slot][self.id] = self.store.item_code(item)
+
+    def attack(self, target):
+        """
+        Hit `target` if this entity's attack is at least its defence, and
+        return whether the target is still alive.
+        """
+        if self.attack_lvl >= target.defence_lvl:
+            target.life -= HIT
+        return target.living
+
+
+def _column_property(column):
+    def getter(self):
+        return int(self.store.columns[column][self.id])
+
+    def setter(self, value):
+        self.store.columns[column][self.id] = value
+    return property(getter, setter)
+
+
+# The stats read and written straight in the columns, under the names
+# NPC uses for them.
+for attribute, column in [
+        ('life', 'life'), ('attack_lvl', 'attack'),
+        ('defence_lvl', 'defence'), ('agility_lvl', 'agility'),
+        ('charisma_lvl', 'charisma'), ('intelligence', 'intelligence'),
+        ('strength_lvl', 'strength')]:
+    setattr(Entity, attribute, _column_property(column))
+
+
+class EntityStore(object):
+    """
+    Keep a population of NPCs as columns: one contiguous array of C
+    ints per stat and equipment slot, indexed by entity id, plus the
+    index of each entity's archetype. Equipment is stored as codes
+    into a table of item names, 0 being an empty slot.
+
+    The columns are NumPy arrays if NumPy is installed (and `use_numpy`
+    isn't false), `array.array` otherwise. `columns` maps each column
+    name to a writable view of the entities spawned so far, so whole
+    populations can be updated at once. Spawning past the capacity
+    reallocates the columns, so the views must be fetched again after
+    spawning.
+
+    Entity ids are never reused; an entity whose life is gone stays in
+    the store as dead.
+    """
+    stat_columns = ('life', 'attack', 'defence', 'agility', 'charisma',
+                    'intelligence', 'strength')
+    slot_columns = equipment_slots
+    column_names = stat_columns + slot_columns + ('archetype',)
+
+    def __init__(self, registry=None, capacity=1024, use_numpy=None):
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        self.registry = registry or default_registry()
+        self.use_numpy = use_numpy
+        self._count = 0
+        self._capacity = 0
+        self._data = {}
+        self._archetypes = []
+        self._archetype_codes = {}
+        self._items = [None]
+        self._item_codes = {None: 0}
+        self._buffer = None
+        self.columns = {}
+        self._reserve(max(1, capacity))
+
+    @classmethod
+    def buffer_size(cls, count):
+        """
+        Return the number of bytes the columns of `count` entities take
+        in a buffer; see `over_buffer`.
+        """
+        return len(cls.column_names) * count * array(TYPECODE).itemsize
+
+    @classmethod
+    def over_buffer(cls, buffer, count, registry=None, use_numpy=None):
+        """
+        Return a store of `count` entities whose columns live in
+        `buffer`, such as shared memory, one after the other in the
+        order of `column_names`, like `copy_into` writes them.
+
+        The store knows nothing of the archetypes and items the codes
+        in the columns stand for, and can't spawn more entities.
+        """
+        store = cls(registry, capacity=1, use_numpy=use_numpy)
+        store._buffer = memoryview(buffer).cast('B')
+        size = count * array(TYPECODE).itemsize
+        for index, name in enumerate(cls.column_names):
+            offset = index * size
+            if store.use_numpy:
+                column = numpy.frombuffer(
+                    store._buffer, dtype=numpy.intc, count=count,
+                    offset=offset)
+            else:
+                column = store._buffer[offset:offset + size].cast(TYPECODE)
+            store._data[name] = column
+        store._capacity = store._count = count
+        store._update_views()
+        return store
+
+    def copy_into(self, buffer):
+        """
+        Write the columns into `buffer` for `over_buffer`.
+        """
+        buffer = memoryview(buffer).cast('B')
+        offset = 0
+        for name in self.column_names:
+            data = memoryview(self.columns[name]).cast('B')
+            buffer[offset:offset + len(data)] = data
+            offset += len(data)
+
+    def copy_columns(self, other):
+        """
+        Overwrite the columns with those of `other`, a store of as many
+        entities.
+        """
+        if len(other) != self._count:
+            raise ValueError('The stores hold {0} and {1} entities'.format(
+                self._count, len(other)))
+        for name in self.column_names:
+            self.columns[name][:] = other.columns[name]
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return (Entity(self, id) for id in range(self._count))
+
+    def __getitem__(self, id):
+        if not 0 <= id < self._count:
+            raise IndexError(id)
+        return Entity(self, id)
+
+    def _new_column(self, size):
+        if self.use_numpy:
+            return numpy.zeros(size, dtype=numpy.intc)
+        return array(TYPECODE, bytes(size * array(TYPECODE).itemsize))
+
+    def _reserve(self, count):
+        """
+        Make sure the columns have room for `count` entities.
+        """
+        if count > self._capacity:
+            if self._buffer is not None:
+                raise ValueError('A store over a buffer can\'t grow')
+            capacity = max(count, self._capacity * 2)
+            for name in self.column_names:
+                column = self._new_column(capacity)
+                if name in self._data:
+                    column[:self._count] = self._data[name][:self._count]
+                self._data[name] = column
+            self._capacity = capacity
+        self._update_views()
+
+    def _update_views(self):
+        for name, column in self._data.items():
+            if self.use_numpy:
+                self.columns[name] = column[:self._count]
+            else:
+                self.columns[name] = memoryview(column)[:self._count]
+
+    def archetype_code(self, archetype):
+        code = self._archetype_codes.get(archetype.name)
+        if code is None:
+            code = self._archetype_codes[archetype.name] = len(
+                self._archetypes)
+            self._archetypes.append(archetype)
+        return code
+
+    def archetype_of(self, id):
+        return self._archetypes[self.columns['archetype'][id]]
+
+    def item_code(self, item):
+        code = self._item_codes.get(item)
+        if code is None:
+            code = self._item_codes[item] = len(self._items)
+            self._items.append(item)
+        return code
+
+    def item_name(self, code):
+        return self._items[code]
+
+    def spawn(self, name):
+        """
+        Spawn an NPC of archetype `name` and return its handle.
+        """
+        return self[self.spawn_many(name, 1).start]
+
+    def spawn_many(self, name, count):
+        """
+        Spawn `count` NPCs of archetype `name`, and return the range of
+        their ids.
+        """
+        archetype = self.registry.get(name)
+        start = self._count
+        stop = start + count
+        self._reserve(stop)
+        values = dict((column, getattr(archetype, column))
+                      for column in self.stat_columns)
+        values['archetype'] = self.archetype_code(archetype)
+        for slot in self.slot_columns:
+            item = None
+            if slot in archetype.slots:
+                item = archetype.equipment[archetype.slots.index(slot)]
+            values[slot] = self.item_code(item)
+        for column, value in values.items():
+            self._fill(self._data[column], start, stop, value)
+        self._count = stop
+        self._update_views()
+        return range(start, stop)
+
+    def _fill(self, column, start, stop, value):
+        if self.use_numpy:
+            column[start:stop] = value
+        else:
+            column[start:stop] = array(TYPECODE, [value]) * (stop - start)
+
+    def living(self):
+        """
+        Return the ids of the entities that are still alive.
+        """
+        life = self.columns['life']
+        if self.use_numpy:
+            return numpy.flatnonzero(life > 0)
+        return [id for id, value in enumerate(life) if value > 0]
+
+    def of_archetype(self, name):
+        """
+        Return the ids of the entities of archetype `name`.
+        """
+        code = self._archetype_codes.get(name)
+        archetypes = self.columns['archetype']
+        if self.use_numpy:
+            if code is None:
+                return numpy.zeros(0, dtype=numpy.intp)
+            return numpy.flatnonzero(archetypes == code)
+        return [id for id, value in enumerate(archetypes) if value == code]
@@ -0,0 +1,101 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+from array import array
+import bisect
+
+# XP needed to reach level 2, 3, ... 22
+BREAKPOINTS = (
+    250, 500, 2000, 3750, 5750, 8250, 11000, 14250, 17750, 21750, 26000,
+    30750, 35750, 41250, 47000, 53250, 59750, 66750, 74000, 82250, 90750
+)
+
+# Highest XP supported
+MAX_XP = 99749
+
+
+class LevelCurve(object):
+    """
+    Map XP to levels.
+
+    ``breakpoints`` are the XP needed to reach each level after the
+    first, in increasing order. The level of every whole XP value from
+    0 to ``max_xp`` is precomputed into a table, so `level` is an index
+    into it; other values are bisected.
+    """
+    def __init__(self, breakpoints=BREAKPOINTS, max_xp=MAX_XP):
+        self.breakpoints = tuple(breakpoints)
+        if list(self.breakpoints) != sorted(self.breakpoints):
+            raise ValueError('Level breakpoints must be in increasing order')
+        self.max_xp = max_xp
+        self.max_level = len(self.breakpoints) + 1
+        self._table = array('B' if self.max_level < 256 else 'H')
+        start = 0
+        for level_, end in enumerate(self.breakpoints + (max_xp + 1,), 1):
+            end = min(max(end, 0), max_xp + 1)
+            if end > start:
+                self._table.extend([level_] * (end - start))
+                start = end
+
+    def _bisect(self, xp):
+        return bisect.bisect(self.breakpoints, xp) + 1
+
+    def level(self, xp):
+        """
+        Return the level for ``xp``.
+        """
+        if type(xp) is int and 0 <= xp <= self.max_xp:
+            return self._table[xp]
+        return self._bisect(xp)
+
+    def levels(self, xps):
+        """
+        Return the levels for a sequence of XP values: a NumPy array
+        for a NumPy array, a list otherwise.
+        """
+        if hasattr(xps, 'dtype'):
+            import numpy
+            return numpy.searchsorted(
+                self.breakpoints, xps, side='right') + 1
+        return [self.level(xp) for xp in xps]
+
+    def xp_for_level(self, level_):
+        """
+        Return the XP needed to reach ``level_``.
+        """
+        if not 1 <= level_ <= self.max_level:
+            raise ValueError('No level {0!r}'.format(level_))
+        if level_ == 1:
+            return 0
+        return self.breakpoints[level_ - 2]
+
+    def xp_to_next_level(self, xp):
+        """
+        Return how much XP is missing to reach the level after the one
+        of ``xp``, or None at the last level.
+        """
+        level_ = self.level(xp)
+        if level_ == self.max_level:
+            return None
+        return self.xp_for_level(level_ + 1) - xp
+
+
+default_curve = LevelCurve()
+
+
+def level(total_xp):
+    return default_curve.level(total_xp)
@@ -15,22 +15,17 @@
 # You should have received a copy of the Affero GNU General Public License
 # along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
 #
-# Autocomplete taken from
-# https://stackoverflow.com/questions/7821661/how-to-code-autocompletion-in-python
-#
 
-import arrow
-import bisect
 import os
-import readline
 import sys
-from dateutil.relativedelta import relativedelta
-from sloth import cardio
-from sloth import physical
+from sloth.completer import Completer
+from sloth import deterioration
+from sloth.levels import default_curve
+from sloth.levels import level
+from sloth.profile import Profile
 from sloth import userinput
 from sloth.store import LogEntry
 from sloth.store import LogsStore
-from sloth.workouts import workouts
 
 # User dir
 main_dir = os.path.expanduser("~")
@@ -127,36 +122,27 @@ def initial_stats(settings, name, age, sex, measurement_system, weight,
     body_checks(settings, start_log)
 
 
-# Custom completer
-class MyCompleter(object):
+def body_checks(settings, start_log):
+    """
+    Validate the settings and the log once, then run the game session.
+    """
+    profile = Profile(settings, level)
 
-    def __init__(self, options):
-        self.options = sorted(options)
+    bmi = check_body(settings, profile)
 
-    def complete(self, text, state):
-        # on first trigger, build possible matches
-        if state == 0:
-            # cache matches (entries that start with entered text)
-            if text:
-                self.matches = [s for s in self.options
-                                if s and s.startswith(text.capitalize())]
-            # no text entered, all matches possible
-            else:
-                self.matches = self.options[:]
-        try:
-            # return match indexed by state
-            return self.matches[state]
-        except IndexError:
-            return None
+    logs = LogsStore(logs_path)
 
+    personal_checks(bmi, logs, settings, start_log, profile)
 
-def body_checks(settings, start_log):
 
+def check_body(settings, profile):
+    """
+    Validate the body measurements and return the BMI.
+    """
     # check if imperial
     if settings.measuring_type == 'I':
         # height_format = '''{0:.0f}'{1:.0f}"'''.format(
         #                    *divmod(int(settings.height), 12))
-        bmi = round((settings.weight / settings.height ** 2) * 703.0, 2)
         if not 50 < settings.weight < 1000:
             raise Exception("Pretty sure {}'s not your real weight.".format(
                              settings.weight))
@@ -164,7 +150,6 @@ def body_checks(settings, start_log):
     # check if metric
     elif settings.measuring_type == 'M':
         # height_format = '''{0}m'''.format(settings.height)
-        bmi = round(settings.weight / (settings.height ** 2), 2)
         if not 22.679 < settings.weight < 453.592:
             raise Exception("Pretty sure {}'s not your real weight.".format(
                              settings.weight))
@@ -172,13 +157,10 @@ def body_checks(settings, start_log):
     else:
         raise Exception('Unexpected units type {0!r}'.format(
                          settings.measuring_type))
+    return profile.bmi
 
-    logs = LogsStore(logs_path)
-
-    personal_checks(bmi, logs, settings, start_log)
 
-
-def personal_checks(bmi, logs, settings, start_log):
+def personal_checks(bmi, logs, settings, start_log, profile):
 
     if settings.sex not in ['F', 'M']:
         raise Exception("You're neither female or male?")
@@ -195,101 +177,131 @@ def personal_checks(bmi, logs, settings, start_log):
     else:
         pass
 
-    bday_ = settings.age.split('-')
-    # [0] is year, [1] is month, [2] is day.
-    year_, month_, day_ = [int(i) for i in bday_]
+    # raises if the birthday isn't possible
+    profile.birthday
 
-    try:
-        birthday = arrow.get(year_, month_, day_)
-    except ValueError:
-        raise Exception('The birthday in your settings file is not possible.')
+    session(settings, logs, profile, start_log)
 
-    birthday_total = relativedelta(arrow.now().naive, birthday.naive)
-    current_age = birthday_total.years
 
+def check_level(logs, settings, profile):
+    """
+    Sync the settings XP with the log and return ``(total_xp, level)``.
+    """
     # if log xp and settings.xp don't match, take the xp from the logs
     check_xp(logs, settings)
 
     total_xp = int(settings.xp)
 
-    level_ = level(total_xp)
+    level_ = profile.level
 
     # the only way this would happen is if only a DETERIORATE was in your log
     if total_xp < 0:
         raise Exception('Something is wrong with your log file.')
     # impressive, but not yet supported
-    elif total_xp > 99749:
-        raise Exception('XP is over 99749')
-
-    hello(settings, logs, birthday_total, current_age,
-          total_xp, level_, start_log)
+    elif total_xp > default_curve.max_xp:
+        raise Exception('XP is over {0}'.format(default_curve.max_xp))
+    return total_xp, level_
 
 
-def hello(settings, logs, birthday_total, current_age,
-          total_xp, level_, start_log):
+def hello(settings, profile, total_xp, level_):
 
-    # there are no days, and only years meaning it's YOUR BIRTHDAY, WOO!
-    if birthday_total.days == 0 and birthday_total.months == 0:
+    # it's YOUR BIRTHDAY, WOO!
+    if profile.is_birthday:
         birthday_today = ' (HAPPY BIRTHDAY!)'
     else:
         birthday_today = ''
     print('{0}/{1}/{2}{3}'.format(
            settings.name,
            settings.sex,
-           current_age,
+           profile.age,
            birthday_today))
 
     print('Lvl {0}/XP {1}'.format(level_, total_xp))
 
-    if start_log is None:
-        start_log = userinput.start_log_prompter.prompt()
 
-    if start_log:
+def session(settings, logs, profile, start_log):
+    """
+    Greet the user and log workouts until they quit.
+
+    The session is a loop rather than calls back into `body_checks`,
+    so the stack doesn't grow with every workout. After each workout
+    only what it could have changed is checked again: the XP and level
+    always, the body measurements after a settings change. The settings
+    are saved once per workout, and not at all if a check fails.
+    """
+    with settings.deferred():
+        total_xp, level_ = check_level(logs, settings, profile)
+        hello(settings, profile, total_xp, level_)
+
+        if start_log is None:
+            start_log = userinput.start_log_prompter.prompt()
+
         # don't log for 7, 14, 21 days? you'll lose 20% for each 7 days.
-        log_exercise(settings, logs, start_log)
-        deteriorate(settings, logs)
-    else:
-        deteriorate(settings, logs)
-        log_exercise(settings, logs, start_log)
+        if not start_log:
+            deteriorate(settings, logs)
 
+    # readline and the workouts are only needed once there's a workout
+    # to choose, so they aren't loaded before the first prompt.
+    import readline
+    from sloth.workouts import workouts
 
-def log_exercise(settings, logs, start_log):
-    completer = MyCompleter([str(k) for k in workouts])
+    completer = Completer([str(k) for k in workouts])
     readline.set_completer(completer.complete)
     readline.parse_and_bind('tab: complete')
 
     while True:
-        # because windows has to be special
-        if sys.platform.startswith('win'):
-            choose_extra = "(Tab for options)"
-        else:
-            choose_extra = "(Double tab for options)"
-        choose_ = input('What workout did you do? {0}: '.format(choose_extra))
-        if choose_.capitalize() not in workouts.keys():
-            pass
-        else:
-            if choose_.capitalize() == 'Cardio':
-                cardio.main(settings, logs)
-            elif choose_.capitalize() == 'Log':
-                print("Not yet done")
-            elif choose_.capitalize() == 'Settings':
-                settings_change(settings)
-            else:
-                physical.main(choose_, settings)
-            body_checks(settings, start_log)
+        choose_ = choose_workout()
+        with settings.deferred():
+            log_exercise(choose_, settings, logs)
+            if choose_ == 'Settings':
+                check_body(settings, profile)
+            total_xp, level_ = check_level(logs, settings, profile)
+            hello(settings, profile, total_xp, level_)
+            if not start_log:
+                deteriorate(settings, logs)
+
+
+def choose_workout():
+    """
+    Ask for a workout until a known one is given, and return it.
+    """
+    from sloth.workouts import workouts
+
+    # because windows has to be special
+    if sys.platform.startswith('win'):
+        choose_extra = "(Tab for options)"
+    else:
+        choose_extra = "(Double tab for options)"
+    while True:
+        choose_ = userinput.read_input(
+            'What workout did you do? {0}: '.format(choose_extra))
+        if choose_.capitalize() in workouts.keys():
+            return choose_.capitalize()
+
+
+def log_exercise(choose_, settings, logs):
+    if choose_ == 'Cardio':
+        from sloth import cardio
+        cardio.main(settings, logs)
+    elif choose_ == 'Log':
+        print("Not yet done")
+    elif choose_ == 'Settings':
+        settings_change(settings)
+    else:
+        from sloth import physical
+        physical.main(choose_, settings)
 
 
 def check_xp(logs, settings):
-    logpoints = logs.check_log()
+    ledger = logs.ledger()
 
-    if logpoints is None:
+    if ledger is None:
         if settings.xp != 0:
             settings.xp = 0
             settings.commit()
         return
     else:
-        total_points, losing_points = logpoints
-        log_total = sum(total_points) - sum(losing_points)
+        log_total = ledger.xp
 
     if settings.xp == log_total:
         pass
@@ -298,46 +310,39 @@ def check_xp(logs, settings):
         settings.commit()
 
 
-def level(total_xp):
-    breakpoints = [250, 500, 2000, 3750, 5750, 8250, 11000, 14250, 17750,
-                   21750, 26000, 30750, 35750, 41250, 47000, 53250, 59750,
-                   66750, 74000, 82250, 90750]
-    i = bisect.bisect(breakpoints, total_xp)
-    return i + 1
-
-
 def deteriorate(settings, logs):
     last_entry = logs.load_last_entry()
     if last_entry is None:
         return
 
+    import arrow
+
     last_utc = last_entry.utc
     utc_to_arrow = arrow.get(last_utc)
     today = arrow.now()
     deteriorate = today - utc_to_arrow
     multiple_remove = int(deteriorate.days / 7)
 
-    if multiple_remove >= 1 and settings.xp * 0.8 > 199.20000000000002:
+    total_xp, losses = deterioration.decay(settings.xp, multiple_remove)
+    if losses:
         previous_xp = settings.xp
         utcnow = arrow.utcnow().timestamp
-        for each in range(multiple_remove):
-            total_xp = int(settings.xp)
-            if total_xp >= 199.20000000000002:
-                total_lost = round(total_xp * 0.2)
-                settings.xp = round(total_xp * 0.8)
-
-                deter_entry = LogEntry()
-
-                deter_entry.average = 0
-                deter_entry.distance = 0
-                deter_entry.exercise = "DETERIORATE"
-                deter_entry.measuring = settings.measuring_type
-                deter_entry.points = 0
-                deter_entry.total = total_lost
-                deter_entry.utc = utcnow
-
-                logs.append_entry(deter_entry)
-                settings.commit()
+        deter_entries = []
+        for total_lost in losses:
+            deter_entry = LogEntry()
+
+            deter_entry.average = 0
+            deter_entry.distance = 0
+            deter_entry.exercise = "DETERIORATE"
+            deter_entry.measuring = settings.measuring_type
+            deter_entry.points = 0
+            deter_entry.total = total_lost
+            deter_entry.utc = utcnow
+
+            deter_entries.append(deter_entry)
+        logs.append_many(deter_entries)
+        settings.xp = total_xp
+        settings.commit()
         xp_lost = previous_xp - settings.xp
         print('Due to not logging anything for {0} days...'.format(
                deteriorate.days))
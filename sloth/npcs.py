@@ -0,0 +1,216 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import json
+import os
+from collections import namedtuple
+
+# The archetypes that come with the game
+archetypes_path = os.path.join(os.path.dirname(__file__), 'npcs.json')
+
+# Each value an archetype holds, and its key in the data file
+archetype_keys = (
+    ("life", "Life"), ("attack", "Attack"), ("defence", "Defence"),
+    ("agility", "Agility"), ("charisma", "Charisma"),
+    ("intelligence", "Intelligence"), ("strength", "Strength"),
+    ("slots", "Slots"), ("equipment", "Equipment"), ("drops", "Drops"),
+    ("currency", "Currency"), ("xp", "XP"),
+)
+
+# The slots equipment can be worn in
+equipment_slots = ('rh', 'lh', 'rl', 'll')
+
+# How much life a hit takes
+HIT = 10
+
+
+class Archetype(namedtuple('Archetype', ('name', 'race') + tuple(
+        attribute for attribute, key in archetype_keys))):
+    """
+    The shared, read only template of a kind of NPC. `equipment` holds
+    what is worn in each of the `slots`, None for an empty one.
+    """
+    __slots__ = ()
+
+    def spawn(self):
+        return NPC(self)
+
+
+class NPC(object):
+    """
+    One NPC spawned from an `Archetype`. Only its life and, once it
+    changes, its equipment are its own; everything else is read from
+    the archetype.
+    """
+    __slots__ = ('archetype', 'life', '_equipment')
+
+    def __init__(self, archetype):
+        self.archetype = archetype
+        self.life = archetype.life
+        self._equipment = None
+
+    name = property(lambda self: self.archetype.name)
+    race = property(lambda self: self.archetype.race)
+    attack_lvl = property(lambda self: self.archetype.attack)
+    defence_lvl = property(lambda self: self.archetype.defence)
+    agility_lvl = property(lambda self: self.archetype.agility)
+    charisma_lvl = property(lambda self: self.archetype.charisma)
+    intelligence = property(lambda self: self.archetype.intelligence)
+    strength_lvl = property(lambda self: self.archetype.strength)
+
+    @property
+    def living(self):
+        return self.life > 0
+
+    @property
+    def equipment(self):
+        if self._equipment is None:
+            return self.archetype.equipment
+        return tuple(self._equipment)
+
+    def equipped(self, slot):
+        return self.equipment[self.archetype.slots.index(slot)]
+
+    def equip(self, slot, item):
+        """
+        Wear `item` in `slot` (None to empty it).
+        """
+        index = self.archetype.slots.index(slot)
+        if self._equipment is None:
+            self._equipment = list(self.archetype.equipment)
+        self._equipment[index] = item
+
+    def attack(self, target):
+        """
+        Hit `target` if this NPC's attack is at least its defence, and
+        return whether the target is still alive.
+        """
+        if self.attack_lvl >= target.defence_lvl:
+            target.life -= HIT
+        return target.living
+
+
+class UnknownArchetype(KeyError):
+    pass
+
+
+class ArchetypeRegistry(object):
+    """
+    The archetypes NPCs are spawned from, by name.
+
+    The data file maps ``Templates`` and ``Archetypes`` names to the
+    values of the archetype keys, plus ``Race`` for an archetype. An
+    archetype naming a ``Template`` starts from that template's values
+    and overrides only the ones it gives.
+    """
+    def __init__(self, archetypes=()):
+        self._archetypes = {}
+        for archetype in archetypes:
+            self._archetypes[archetype.name] = archetype
+
+    @classmethod
+    def from_data(cls, data):
+        templates = data.get("Templates", {})
+        archetypes = []
+        for name, values in data["Archetypes"].items():
+            template = values.get("Template")
+            if template is not None:
+                if template not in templates:
+                    raise ValueError('Archetype {0!r} uses an unknown '
+                                     'template {1!r}'.format(name, template))
+                values = dict(templates[template], **values)
+            archetypes.append(make_archetype(name, values))
+        return cls(archetypes)
+
+    @classmethod
+    def load(cls, file_path=archetypes_path):
+        with open(file_path, encoding='utf-8') as infile:
+            return cls.from_data(json.load(infile))
+
+    def __contains__(self, name):
+        return name in self._archetypes
+
+    def __iter__(self):
+        return iter(sorted(self._archetypes))
+
+    def __len__(self):
+        return len(self._archetypes)
+
+    def get(self, name):
+        try:
+            return self._archetypes[name]
+        except KeyError:
+            raise UnknownArchetype(name)
+
+    def spawn(self, name):
+        return NPC(self.get(name))
+
+    def spawn_many(self, name, count):
+        archetype = self.get(name)
+        return [NPC(archetype) for each in range(count)]
+
+    def archetypes(self):
+        return [self._archetypes[name] for name in self]
+
+    def races(self):
+        """
+        Return a dict of each race to the names of its archetypes.
+        """
+        races = {}
+        for name in self:
+            races.setdefault(self._archetypes[name].race, []).append(name)
+        return races
+
+
+def make_archetype(name, values):
+    missing = [key for attribute, key in archetype_keys + (("race", "Race"),)
+               if key not in values]
+    if missing:
+        raise ValueError('Archetype {0!r} is missing {1}'.format(
+            name, ', '.join(missing)))
+    slots = tuple(values["Slots"])
+    invalid_slots = set(slots).difference(equipment_slots)
+    if invalid_slots:
+        raise ValueError('Archetype {0!r} has invalid slots {1}'.format(
+            name, ', '.join(sorted(invalid_slots))))
+    equipment = values["Equipment"]
+    unknown_slots = set(equipment).difference(slots)
+    if unknown_slots:
+        raise ValueError('Archetype {0!r} has equipment in unknown slots '
+                         '{1}'.format(name, ', '.join(sorted(unknown_slots))))
+    fields = dict((attribute, values[key])
+                  for attribute, key in archetype_keys)
+    fields.update(
+        slots=slots,
+        equipment=tuple(equipment.get(slot) for slot in slots),
+        drops=tuple(values["Drops"]),
+    )
+    return Archetype(name=name, race=values["Race"], **fields)
+
+
+_default_registry = None
+
+
+def default_registry():
+    """
+    Return the registry of the archetypes that come with the game,
+    loading it the first time.
+    """
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ArchetypeRegistry.load()
+    return _default_registry
@@ -0,0 +1,100 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import datetime
+
+
+class Profile(object):
+    """
+    Values derived from a `SettingsStore`: BMI, birthday, age, and
+    level.
+
+    Each value is computed on first use and kept until one of the
+    settings it depends on is set to a new value (the age and birthday
+    flag also when the date changes), so asking again is a couple of
+    comparisons. ``level_function`` maps an XP total to a level.
+    """
+    def __init__(self, settings, level_function, today=None):
+        self._settings = settings
+        self._level_function = level_function
+        self._today = today or datetime.date.today
+        self._cache = {}
+
+    def _cached(self, name, keys, compute, extra=None):
+        version = (self._settings.version(*keys), extra)
+        cached = self._cache.get(name)
+        if cached is None or cached[0] != version:
+            cached = (version, compute())
+            self._cache[name] = cached
+        return cached[1]
+
+    @property
+    def bmi(self):
+        return self._cached("bmi", ("Weight", "Height", "Type"),
+                            self._compute_bmi)
+
+    def _compute_bmi(self):
+        settings = self._settings
+        if settings.measuring_type == 'I':
+            return round((settings.weight / settings.height ** 2) * 703.0, 2)
+        elif settings.measuring_type == 'M':
+            return round(settings.weight / (settings.height ** 2), 2)
+        raise Exception('Unexpected units type {0!r}'.format(
+                         settings.measuring_type))
+
+    @property
+    def birthday(self):
+        """
+        The birthday as a `datetime.date`.
+        """
+        return self._cached("birthday", ("Age",), self._compute_birthday)
+
+    def _compute_birthday(self):
+        # [0] is year, [1] is month, [2] is day.
+        year_, month_, day_ = [int(i) for i in self._settings.age.split('-')]
+        try:
+            return datetime.date(year_, month_, day_)
+        except ValueError:
+            raise Exception(
+                'The birthday in your settings file is not possible.')
+
+    @property
+    def age(self):
+        today = self._today()
+        return self._cached("age", ("Age",),
+                            lambda: self._compute_age(today), today)
+
+    def _compute_age(self, today):
+        birthday = self.birthday
+        had_birthday = (today.month, today.day) >= (
+            birthday.month, birthday.day)
+        return today.year - birthday.year - (0 if had_birthday else 1)
+
+    @property
+    def is_birthday(self):
+        today = self._today()
+        return self._cached(
+            "is_birthday", ("Age",),
+            lambda: (today.month, today.day) == (
+                self.birthday.month, self.birthday.day),
+            today)
+
+    @property
+    def level(self):
+        return self._cached(
+            "level", ("XP",),
+            lambda: self._level_function(int(self._settings.xp)))
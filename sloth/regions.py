@@ -0,0 +1,243 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import ctypes
+import multiprocessing
+import random
+from array import array
+from multiprocessing.sharedctypes import RawArray
+from sloth.combat import CombatEngine
+from sloth.entities import EntityStore
+from sloth.entities import TYPECODE
+from sloth.world import World
+from sloth.world import checksum
+
+
+def regions_by_race(store):
+    """
+    Return ``[(race, ids), ...]``: the ids of the entities of each race
+    of the store's archetype registry (the races of RPG_Elements), in
+    alphabetical order of race, leaving out races with no entities.
+    """
+    races = store.registry.races()
+    regions = []
+    for race in sorted(races):
+        ids = sorted(int(id) for name in races[race]
+                     for id in store.of_archetype(name))
+        if ids:
+            regions.append((race, ids))
+    return regions
+
+
+class RegionWorld(World):
+    """
+    The `World` of one region. When its entities act, each raids
+    another region instead with a chance of `raid_chance`, picking a
+    random entity of `raid_targets`. A raid isn't resolved right away:
+    the attacker and target ids are queued in `raids` until the regions
+    exchange them.
+    """
+    def __init__(self, store, ids, seed, raid_targets, raid_chance):
+        super(RegionWorld, self).__init__(store, seed, ids)
+        self.raid_targets = list(raid_targets)
+        self.raid_chance = raid_chance
+        self.raids = array(TYPECODE)
+
+    def act(self, actors):
+        if self.raid_targets and self.raid_chance:
+            chance = self.random.random
+            randrange = self.random.randrange
+            count = len(self.raid_targets)
+            staying = []
+            for id in actors:
+                if chance() < self.raid_chance:
+                    self.raids.append(id)
+                    self.raids.append(self.raid_targets[randrange(count)])
+                else:
+                    staying.append(id)
+            actors = staying
+        return super(RegionWorld, self).act(actors)
+
+
+def _region_seed(seed, name):
+    # A str seed is hashed the same way in every process.
+    return '{0}:{1}'.format(seed, name)
+
+
+def _write_raids(outbox, raids):
+    outbox[0] = len(raids)
+    outbox[1:1 + len(raids)] = raids.tolist()
+
+
+def _run_shard(conn, columns, count, use_numpy, specs, outboxes,
+               raid_chance):
+    """
+    Run the regions `specs` in a worker process: for each number of
+    ticks received, run every region that long, write their raids to
+    their outboxes and send back the number of deaths. None stops.
+    """
+    store = EntityStore.over_buffer(columns, count, use_numpy=use_numpy)
+    worlds = [RegionWorld(store, ids, seed, raid_targets, raid_chance)
+              for name, ids, seed, raid_targets in specs]
+    while True:
+        ticks = conn.recv()
+        if ticks is None:
+            break
+        deaths = 0
+        for world, outbox in zip(worlds, outboxes):
+            deaths += world.run(ticks)
+            _write_raids(outbox, world.raids)
+            del world.raids[:]
+        conn.send(deaths)
+    conn.close()
+
+
+class ShardedWorld(object):
+    """
+    Simulate a store split into regions, such as `regions_by_race`,
+    each a `RegionWorld` with a seed of its own.
+
+    Regions only interact through raids, which are exchanged every
+    `exchange_every` ticks: the raids queued by every region since the
+    last exchange are resolved together as one `CombatEngine` round, in
+    region order. As no region sees another between exchanges, the
+    regions can run in parallel: with `processes`, they are dealt out
+    to that many worker processes, which share the columns of the
+    store and hand over their raids through shared memory. The result
+    is the same, bit for bit, as running them in this process (the
+    default, ``processes=0``). Without a `seed`, a random one is
+    drawn, and kept in `seed` for replaying the same run.
+
+    While workers run, they and this process work on a copy of the
+    store in shared memory. Use as a context manager, or call `close`,
+    to stop them and copy the state of the simulation back into the
+    store.
+    """
+    def __init__(self, store, regions, seed=None, processes=0,
+                 raid_chance=0.1, exchange_every=1):
+        if exchange_every < 1:
+            raise ValueError('exchange_every must be at least 1')
+        if seed is None:
+            seed = random.Random().getrandbits(64)
+        self.seed = seed
+        self.store = self._view = store
+        self.tick = 0
+        self.exchange_every = exchange_every
+        self._workers = []
+        specs = []
+        for name, ids in regions:
+            raid_targets = sorted(
+                id for other, other_ids in regions if other != name
+                for id in other_ids)
+            specs.append((name, list(ids), _region_seed(seed, name),
+                          raid_targets))
+        if processes:
+            self._start_workers(specs, processes, raid_chance)
+        else:
+            self.worlds = [
+                RegionWorld(store, ids, seed, raid_targets, raid_chance)
+                for name, ids, seed, raid_targets in specs]
+        self.engine = CombatEngine(self._view)
+
+    def _start_workers(self, specs, processes, raid_chance):
+        count = len(self.store)
+        self._columns = RawArray(ctypes.c_char,
+                                 EntityStore.buffer_size(count))
+        self.store.copy_into(self._columns)
+        self._view = EntityStore.over_buffer(
+            self._columns, count, use_numpy=self.store.use_numpy)
+        # Each region can raid at most once per entity and tick.
+        self._outboxes = [
+            RawArray(ctypes.c_int, 1 + 2 * len(ids) * self.exchange_every)
+            for name, ids, seed, raid_targets in specs]
+        for number in range(min(processes, len(specs))):
+            connection, worker_connection = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_run_shard, args=(
+                worker_connection, self._columns, count,
+                self.store.use_numpy, specs[number::processes],
+                self._outboxes[number::processes], raid_chance))
+            worker.daemon = True
+            worker.start()
+            self._workers.append((worker, connection))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run(self, ticks):
+        """
+        Advance `ticks` ticks, and return the number of entities that
+        died.
+        """
+        deaths = 0
+        while ticks > 0:
+            epoch = min(ticks, self.exchange_every)
+            deaths += self._run_regions(epoch)
+            deaths += self._exchange()
+            self.tick += epoch
+            ticks -= epoch
+        return deaths
+
+    def _run_regions(self, ticks):
+        if not self._workers:
+            return sum(world.run(ticks) for world in self.worlds)
+        for worker, connection in self._workers:
+            connection.send(ticks)
+        return sum(connection.recv() for worker, connection in self._workers)
+
+    def _raids(self):
+        if not self._workers:
+            for world in self.worlds:
+                yield world.raids
+                del world.raids[:]
+        else:
+            for outbox in self._outboxes:
+                yield outbox[1:1 + outbox[0]]
+
+    def _exchange(self):
+        pairs = array(TYPECODE)
+        for raids in self._raids():
+            pairs.extend(raids)
+        if not pairs:
+            return 0
+        result = self.engine.resolve(pairs[0::2], pairs[1::2])
+        return len(result.deaths)
+
+    def checksum(self):
+        """
+        Return a hex digest of the tick and every column of the store,
+        as `World.checksum` does.
+        """
+        return checksum(self._view, self.tick)
+
+    def close(self):
+        """
+        Stop the workers, and copy the state of the simulation back
+        into the store.
+        """
+        if not self._workers:
+            return
+        for worker, connection in self._workers:
+            connection.send(None)
+            connection.close()
+            worker.join()
+        self._workers = []
+        self.store.copy_columns(self._view)
+        self._view = self.store
+        self.engine = CombatEngine(self.store)
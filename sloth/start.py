@@ -16,9 +16,10 @@
 # You should have received a copy of the Affero GNU General Public License
 # along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
 #
+import argparse
 import os
 import sys
-from sloth import main
+from sloth import userinput
 from sloth.store import SettingsStore
 
 # User dir
@@ -27,33 +28,123 @@ main_dir = os.path.expanduser("~")
 # File where all info on user is stored
 settings_path = os.path.join(main_dir, 'settings.ini')
 
+# Every change saved to the settings, for auditing and replays, when
+# the journal is turned on with --journal
+settings_journal_path = os.path.join(main_dir, 'settings.journal')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='sloth-game')
+    parser.add_argument(
+        '--import', dest='import_paths', nargs='+', metavar='FILE',
+        help='log the workouts in CSV or JSON lines files, without prompts')
+    parser.add_argument(
+        '--format', dest='file_format', choices=['csv', 'jsonl'],
+        help='format of the imported files (default: from the extension)')
+    parser.add_argument(
+        '--replay', metavar='FILE',
+        help='answer the prompts from a session recorded with --record')
+    parser.add_argument(
+        '--record', metavar='FILE',
+        help='record the answers to every prompt to a replay file')
+    parser.add_argument(
+        '--journal', nargs='?', const=settings_journal_path, metavar='FILE',
+        help='append every change to the settings to a journal '
+             '(default: {0})'.format(settings_journal_path))
+    return parser.parse_args(argv)
+
+
+def input_source_for(args):
+    if args.replay:
+        source = userinput.ReplaySource(args.replay)
+    else:
+        source = userinput.console_input
+    if args.record:
+        source = userinput.RecordingSource(args.record, source)
+    return source
+
+
+def batch_import(paths, file_format=None, journal_path=None):
+    """
+    Log every valid workout in the files at `paths`, and return the
+    exit status: 0 if every row was logged, 1 otherwise.
+    """
+    from sloth import batch
+    from sloth import main
+    from sloth.store import LogsStore
+
+    if not os.path.isfile(settings_path):
+        print('Run sloth-game once to set up your profile first.')
+        return 1
+    settings = SettingsStore(settings_path, journal_path)
+    settings.load()
+    logs = LogsStore(main.logs_path)
+    last_entry = logs.load_last_entry()
 
-def run():
     try:
-        if sys.platform.startswith(('cygwin', 'win')):
-            try:
-                import pyreadline as readline # noqa
-            except ImportError:
-                print('Please \'pip install pyreadline\' in your virtualenv.')
-                sys.exit()
-
-        settings = SettingsStore(settings_path)
-        # Check if settings file exists
-        if os.path.isfile(settings_path):
-            # If it does, start the main program.
-            try:
-                settings.load()
-                # This is as early as we can set the deterioration question.
-                # This way it's only asked ONCE when you start the program.
-                start_log = None
-                main.body_checks(settings, start_log)
-            except ValueError:
-                main.initial_questions(settings)
-        else:
-            # If not, gather the settings
-            main.initial_questions(settings)
+        entries, errors = batch.import_files(
+            paths, logs, settings.measuring_type, file_format,
+            _print=lambda message: print(message, file=sys.stderr))
+    except (OSError, ValueError) as e:
+        print('Nothing was logged: {0}'.format(e))
+        return 1
+    main.check_xp(logs, settings)
+
+    print('Logged {0} workouts, skipped {1} rows.'.format(
+        len(entries), len(errors)))
+    if entries and last_entry is not None and \
+            entries[-1].utc < last_entry.utc:
+        print('The workouts were logged after newer ones, so deterioration '
+              'will count from the last of them.')
+    return 1 if errors else 0
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    if args.import_paths:
+        sys.exit(batch_import(args.import_paths, args.file_format,
+                              args.journal))
+    source = input_source_for(args)
+    try:
+        with userinput.use_input_source(source):
+            play(args.journal)
     except (EOFError, KeyboardInterrupt):
         print('\nGoodbye!')
+    except userinput.ReplayMismatch as e:
+        print('\nThe replay went differently: {0}'.format(e))
+        sys.exit(1)
+    finally:
+        if args.record:
+            source.close()
+
+
+def play(journal_path=None):
+    if sys.platform.startswith(('cygwin', 'win')):
+        try:
+            import pyreadline as readline # noqa
+        except ImportError:
+            print('Please \'pip install pyreadline\' in your virtualenv.')
+            sys.exit()
+
+    # Imported here rather than at the top, so that importing start
+    # for the entry point stays cheap.
+    from sloth import main
+
+    settings = SettingsStore(settings_path, journal_path)
+    # Check if settings file exists
+    if os.path.isfile(settings_path):
+        # If it does, start the main program.
+        try:
+            settings.load()
+            # This is as early as we can set the deterioration question.
+            # This way it's only asked ONCE when you start the program.
+            start_log = None
+            main.body_checks(settings, start_log)
+        except ValueError:
+            main.initial_questions(settings)
+    else:
+        # If not, gather the settings
+        main.initial_questions(settings)
 
 if __name__ == "__main__":
     run()
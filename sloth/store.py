@@ -15,8 +15,21 @@
 # You should have received a copy of the Affero GNU General Public License
 # along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
 #
+import contextlib
+import mmap
 import os
 import json
+import numbers
+import re
+import struct
+import time
+from collections import namedtuple
+
+try:
+    import fcntl
+except ImportError:
+    # Not on Windows: appends to binary logs aren't locked there.
+    fcntl = None
 
 
 class ImproperlyConfigured(Exception):
@@ -67,6 +80,29 @@ def _storage_property(key):
     return property(getter, setter)
 
 
+def _tracked_property(key):
+    """
+    Like `_storage_property`, but setting the value goes through the
+    instance's ``_set`` method so the change can be tracked.
+    """
+
+    def getter(self):
+        return self._store[key]
+
+    def setter(self, value):
+        self._set(key, value)
+    return property(getter, setter)
+
+
+# Stands for a key that had no value.
+_missing = object()
+
+
+def _same_value(old, new):
+    # 1 and 1.0 are equal but aren't saved the same way.
+    return type(old) is type(new) and old == new
+
+
 class SettingsStore(object):
     """
     Manage the settings file.
@@ -75,21 +111,40 @@ class SettingsStore(object):
     Load settings from the file with the load method.
     Use the attributes to get and set settings options.
     Save the updated settings with the commit() method.
+
+    Commits replace the file through a temporary file, so a crash can't
+    leave it half written, and are skipped when nothing changed since
+    the settings were last loaded or saved. Inside a `deferred` block,
+    commits are coalesced into a single write at the end of the block,
+    or dropped if the block raises.
+
+    Setting an attribute marks its key as dirty until the next commit.
+    If a ``journal_path`` is given, every commit also appends one JSON
+    line per changed key to that file, with the key, its old and new
+    values and the time of the commit; see `read_journal` and
+    `replay_journal`. A new journal starts with a line for every key,
+    so that it holds the whole settings even if they were saved before
+    the journal was turned on.
     """
-    age = _storage_property("Age")
-    agility = _storage_property("Agility")
-    charisma = _storage_property("Charisma")
-    defense = _storage_property("Defense")
-    endurance = _storage_property("Endurance")
-    goal = _storage_property("Goal")
-    height = _storage_property("Height")
-    intelligence = _storage_property("Intelligence")
-    name = _storage_property("Name")
-    strength = _storage_property("Strength")
-    sex = _storage_property("Sex")
-    measuring_type = _storage_property("Type")
-    weight = _storage_property("Weight")
-    xp = _storage_property("XP")
+    __slots__ = (
+        '_file_path', '_journal_path', '_store', '_saved', '_dirty',
+        '_deferred', '_commit_pending', '_versions', '_loads'
+    )
+
+    age = _tracked_property("Age")
+    agility = _tracked_property("Agility")
+    charisma = _tracked_property("Charisma")
+    defense = _tracked_property("Defense")
+    endurance = _tracked_property("Endurance")
+    goal = _tracked_property("Goal")
+    height = _tracked_property("Height")
+    intelligence = _tracked_property("Intelligence")
+    name = _tracked_property("Name")
+    strength = _tracked_property("Strength")
+    sex = _tracked_property("Sex")
+    measuring_type = _tracked_property("Type")
+    weight = _tracked_property("Weight")
+    xp = _tracked_property("XP")
 
     expected_keys = frozenset([
         "Age", "Agility", "Charisma", "Defense", "Endurance", "Goal",
@@ -97,9 +152,40 @@ class SettingsStore(object):
         "Weight", "XP"
     ])
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, journal_path=None):
         self._file_path = file_path
+        self._journal_path = journal_path
         self._store = {}
+        self._saved = None
+        self._dirty = {}
+        self._deferred = 0
+        self._commit_pending = False
+        self._versions = {}
+        self._loads = 0
+
+    @property
+    def dirty_keys(self):
+        """
+        The keys set to a new value since the last load or commit.
+        """
+        return frozenset(self._dirty)
+
+    def _set(self, key, value):
+        old = self._store.get(key, _missing)
+        if old is _missing or not _same_value(old, value):
+            # Keep the value from the last load or commit.
+            self._dirty.setdefault(key, old)
+            self._versions[key] = self._versions.get(key, 0) + 1
+        self._store[key] = value
+
+    def version(self, *keys):
+        """
+        Return a value that changes whenever one of ``keys`` is set to
+        a new value or the settings are loaded, to tell when something
+        derived from those keys has to be computed again.
+        """
+        return (self._loads,) + tuple(
+            self._versions.get(key, 0) for key in keys)
 
     def load(self):
         """
@@ -109,6 +195,9 @@ class SettingsStore(object):
         with open(self._file_path, encoding='utf-8') as infile:
             self._store = json.load(infile)
         self._verify_keys()
+        self._saved = json.dumps(self._store, sort_keys=True)
+        self._dirty = {}
+        self._loads += 1
 
     def commit(self):
         """
@@ -116,11 +205,109 @@ class SettingsStore(object):
         expected keys, or raise `ImproperlyConfigured`.
         """
         self._verify_keys()
-        # Convert before trunacting the file to avoid wiping data
+        if self._deferred:
+            self._commit_pending = True
+            return
+        if self._saved is not None and not self._dirty:
+            return
+        # Convert before replacing the file to avoid wiping data
         # if the serialization fails.
         tosave = json.dumps(self._store, sort_keys=True)
-        with open(self._file_path, 'w', encoding='utf-8') as outfile:
+        if tosave == self._saved:
+            self._dirty = {}
+            return
+        tmp_path = self._file_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as outfile:
             outfile.write(tosave)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(tmp_path, self._file_path)
+        self._saved = tosave
+        self._write_journal()
+        self._dirty = {}
+
+    def _write_journal(self):
+        if self._journal_path is None:
+            return
+        utc = time.time()
+        records = []
+        seeding = not os.path.exists(self._journal_path)
+        for key in sorted(self._store if seeding else self._dirty):
+            new = self._store[key]
+            old = self._dirty.get(key, new)
+            if not seeding and old is not _missing and (
+                    _same_value(old, new)):
+                continue
+            records.append(json.dumps({
+                "Key": key,
+                "Old": None if old is _missing else old,
+                "New": new,
+                "UTC": utc
+            }, sort_keys=True) + "\n")
+        if records:
+            with open(self._journal_path, 'a', encoding='utf-8') as outfile:
+                outfile.write(''.join(records))
+
+    def read_journal(self):
+        """
+        Yield the records of the change journal, oldest first, as dicts
+        with "Key", "Old", "New" and "UTC" keys.
+        """
+        if self._journal_path is None:
+            return
+        try:
+            infile = open(self._journal_path, encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with infile:
+            for line in infile:
+                if line.strip():
+                    yield json.loads(line)
+
+    def replay_journal(self, until=None):
+        """
+        Return the settings as they were saved at UTC ``until`` (or at
+        the last commit), rebuilt from the change journal.
+        """
+        replayed = {}
+        for record in self.read_journal():
+            if until is not None and record["UTC"] > until:
+                break
+            replayed[record["Key"]] = record["New"]
+        return replayed
+
+    @contextlib.contextmanager
+    def deferred(self):
+        """
+        Return a context manager that holds back commits made inside
+        it, and commits once when the outermost block exits if any
+        commit was asked for. If the outermost block raises, nothing is
+        written and the settings are rolled back to what they were when
+        it started.
+        """
+        if not self._deferred:
+            rollback = (dict(self._store), dict(self._dirty))
+        self._deferred += 1
+        try:
+            yield self
+        except BaseException:
+            self._deferred -= 1
+            if not self._deferred:
+                self._commit_pending = False
+                self._roll_back(*rollback)
+            raise
+        self._deferred -= 1
+        if not self._deferred and self._commit_pending:
+            self._commit_pending = False
+            self.commit()
+
+    def _roll_back(self, store, dirty):
+        for key in set(self._store).difference(store):
+            del self._store[key]
+            self._versions[key] = self._versions.get(key, 0) + 1
+        for key, value in store.items():
+            self._set(key, value)
+        self._dirty = dirty
 
     def _verify_keys(self):
         missing_keys = self.expected_keys.difference(self._store.keys())
@@ -133,30 +320,391 @@ class SettingsStore(object):
             )
 
 
+class XPLedger(namedtuple('XPLedger', [
+        'points', 'losses', 'count', 'last_utc'])):
+    """
+    Running aggregates of a log: the sum of all points, the sum of all
+    deterioration losses, the number of entries and the UTC of the last
+    entry.
+    """
+    __slots__ = ()
+
+    @property
+    def xp(self):
+        return self.points - self.losses
+
+
+IndexTrailer = namedtuple('IndexTrailer', [
+    'log_size', 'log_mtime_ns', 'count', 'points', 'losses', 'last_utc',
+    'bad_entries'
+])
+
+
+def _number(value):
+    """
+    Return ``value`` as an int when it has no fractional part, so
+    totals read back from the index compare equal to the log's ints.
+    NaN, which stands for a missing value in the index, becomes None.
+    """
+    if value != value:
+        return None
+    if float(value).is_integer():
+        return int(value)
+    return value
+
+
+def _is_number(value):
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+class _RunningTotals(object):
+    """
+    Fold decoded log entries into the totals kept in the index trailer.
+    Entries that can not be summed are only counted as bad.
+    """
+    def __init__(self, points=0.0, losses=0.0, last_utc=float('nan'),
+                 bad_entries=0):
+        self.points = points
+        self.losses = losses
+        self.last_utc = last_utc
+        self.bad_entries = bad_entries
+
+    def add(self, decoded):
+        if not isinstance(decoded, dict):
+            self.bad_entries += 1
+            return
+        points = decoded.get("Points")
+        if decoded.get("Exercise") == "DETERIORATE":
+            loss = decoded.get("Total")
+        else:
+            loss = 0
+        utc = decoded.get("UTC")
+        self.last_utc = utc if _is_number(utc) else float('nan')
+        if _is_number(points) and _is_number(loss):
+            self.points += points
+            self.losses += loss
+        else:
+            self.bad_entries += 1
+
+
+class LogIndex(object):
+    """
+    Manage the sidecar index of a log file.
+
+    The index is a fixed size trailer holding the size and modification
+    time of the log when it was indexed, the number of entries and the
+    running `XPLedger` totals, so the ledger is read with a single
+    seek, whatever the length of the log.
+
+    An index that does not describe the log on disk (the log was edited
+    outside the game, or the index is missing or truncated) is stale
+    and is rebuilt from the log when loaded.
+    """
+    trailer_format = struct.Struct('<4sIQqQdddQ')
+    magic = b'SLIX'
+    version = 3
+
+    def __init__(self, log_path, file_path=None):
+        self._log_path = log_path
+        self._file_path = file_path or log_path + '.idx'
+
+    def read_trailer(self):
+        """
+        Return the `IndexTrailer` if the index is up to date with the
+        log, or None if it is stale.
+        """
+        try:
+            log_stat = os.stat(self._log_path)
+        except FileNotFoundError:
+            log_stat = None
+        try:
+            with open(self._file_path, 'rb') as infile:
+                infile.seek(0, os.SEEK_END)
+                index_size = infile.tell()
+                if index_size < self.trailer_format.size:
+                    return None
+                infile.seek(-self.trailer_format.size, os.SEEK_END)
+                raw = infile.read(self.trailer_format.size)
+        except FileNotFoundError:
+            if log_stat is None or log_stat.st_size == 0:
+                # Nothing has been logged yet, so nothing needs indexing.
+                return self._make_trailer(None, 0, _RunningTotals())
+            return None
+        magic, version, *fields = self.trailer_format.unpack(raw)
+        if magic != self.magic or version != self.version:
+            return None
+        trailer = IndexTrailer(*fields)
+        if log_stat is None or index_size != self.trailer_format.size:
+            return None
+        if (trailer.log_size != log_stat.st_size or
+                trailer.log_mtime_ns != log_stat.st_mtime_ns):
+            return None
+        return trailer
+
+    def load(self):
+        """
+        Return the `IndexTrailer`, rebuilding the index first if it is
+        stale.
+        """
+        trailer = self.read_trailer()
+        if trailer is None:
+            trailer = self.rebuild()
+        return trailer
+
+    def rebuild(self):
+        """
+        Index every line of the log from scratch and return the new
+        `IndexTrailer`.
+        """
+        count = 0
+        totals = _RunningTotals()
+        with open(self._log_path, 'rb') as infile:
+            log_stat = os.fstat(infile.fileno())
+            for line in infile:
+                if not line.strip():
+                    # Blank lines aren't entries, as for `LogsStore.scan`.
+                    continue
+                count += 1
+                try:
+                    totals.add(json.loads(line.decode('utf-8')))
+                except ValueError:
+                    totals.add(None)
+        trailer = self._make_trailer(log_stat, count, totals)
+        self._write(trailer)
+        return trailer
+
+    def record_append(self, trailer, lines):
+        """
+        Update an up to date index with ``lines``, the ``(serialized,
+        decoded)`` pairs just appended to the log.
+        """
+        totals = _RunningTotals(trailer.points, trailer.losses,
+                                trailer.last_utc, trailer.bad_entries)
+        for serialized, decoded in lines:
+            totals.add(decoded)
+        new_trailer = self._make_trailer(
+            os.stat(self._log_path), trailer.count + len(lines), totals)
+        self._write(new_trailer)
+        return new_trailer
+
+    def _write(self, trailer):
+        tmp_path = self._file_path + '.tmp'
+        with open(tmp_path, 'wb') as outfile:
+            outfile.write(self._pack_trailer(trailer))
+        os.replace(tmp_path, self._file_path)
+
+    @staticmethod
+    def _make_trailer(log_stat, count, totals):
+        return IndexTrailer(
+            log_size=log_stat.st_size if log_stat else 0,
+            log_mtime_ns=log_stat.st_mtime_ns if log_stat else 0,
+            count=count,
+            points=totals.points,
+            losses=totals.losses,
+            last_utc=totals.last_utc,
+            bad_entries=totals.bad_entries
+        )
+
+    def _pack_trailer(self, trailer):
+        return self.trailer_format.pack(self.magic, self.version, *trailer)
+
+    @staticmethod
+    def serialize(decoded):
+        """
+        Return the log line for a decoded entry, as bytes.
+        """
+        return (json.dumps(decoded, sort_keys=True) + "\n").encode('utf-8')
+
+
+def _append_atomically(outfile, data, fsync=False, after_write=None):
+    """
+    Append ``data`` to the binary file ``outfile``, opened for
+    appending, with a single write, then call ``after_write`` with the
+    offset the data was written at. If anything fails, the file is
+    truncated back to its previous length before the error is raised.
+    """
+    offset = outfile.seek(0, os.SEEK_END)
+    try:
+        outfile.write(data)
+        outfile.flush()
+        if fsync:
+            os.fsync(outfile.fileno())
+        if after_write is not None:
+            after_write(offset)
+    except BaseException:
+        outfile.truncate(offset)
+        raise
+    return offset
+
+
+class LogTransaction(object):
+    """
+    Collect entries to append to a log as one batch.
+
+    Use it as a context manager: the entries appended inside the
+    ``with`` block are verified as they are added and written with a
+    single `append_many` when the block exits. If the block raises,
+    nothing is written.
+    """
+    def __init__(self, logs, fsync=False):
+        self._logs = logs
+        self._fsync = fsync
+        self.entries = []
+
+    def append_entry(self, entry):
+        entry._verify_keys()
+        self.entries.append(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self._logs.append_many(self.entries, fsync=self._fsync)
+        self.entries = []
+        return False
+
+
+def _reversed_lines(infile, block_size):
+    """
+    Yield the lines of the binary file ``infile`` from last to first,
+    without their line endings, reading blocks of ``block_size`` bytes
+    backwards from the end of the file.
+
+    The first value yielded is whatever follows the last newline: empty
+    if the file ends with a newline, or a line that may be partially
+    written otherwise.
+    """
+    end = infile.seek(0, os.SEEK_END)
+    pending = b''
+    while end > 0:
+        start = max(0, end - block_size)
+        infile.seek(start)
+        pending = infile.read(end - start) + pending
+        end = start
+        lines = pending.split(b'\n')
+        # The first piece may continue in the previous block.
+        pending = lines.pop(0)
+        for line in reversed(lines):
+            yield line
+    yield pending
+
+
+_string_field_pattern = r'"{0}"\s*:\s*"([^"\\]*)"'
+_number_field_pattern = (
+    r'"{0}"\s*:\s*(-?[0-9]+(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?)\s*[,}}]'
+)
+
+
+class _LinePrefilter(object):
+    """
+    Cheap checks on the raw bytes of a log line, done before decoding
+    it, that reject lines that can not match the `LogsStore.scan`
+    filters. A line whose field isn't found in the expected form (say,
+    the value holds escapes) is let through to be checked once decoded.
+    """
+    def __init__(self, exercise, measuring, since, until):
+        self.checks = []
+        for key, wanted in (("Exercise", exercise),
+                            ("Measuring", measuring)):
+            if wanted is not None:
+                pattern = re.compile(
+                    _string_field_pattern.format(key).encode('ascii'))
+                allowed = frozenset(
+                    json.dumps(each)[1:-1].encode('utf-8') for each in wanted)
+                self.checks.append((pattern, allowed.__contains__))
+        if since is not None or until is not None:
+            pattern = re.compile(
+                _number_field_pattern.format("UTC").encode('ascii'))
+            self.checks.append(
+                (pattern, lambda raw: _in_range(float(raw), since, until)))
+
+    def __call__(self, buffer, start, end):
+        for pattern, accept in self.checks:
+            match = pattern.search(buffer, start, end)
+            if match is not None and not accept(match.group(1)):
+                return False
+        return True
+
+
+def _in_range(value, since, until):
+    if not _is_number(value):
+        return False
+    if since is not None and value < since:
+        return False
+    if until is not None and value >= until:
+        return False
+    return True
+
+
+def _matches(decoded, exercise, measuring, since, until):
+    """
+    Tell whether a decoded log entry passes the `LogsStore.scan`
+    filters.
+    """
+    if exercise is not None and decoded["Exercise"] not in exercise:
+        return False
+    if measuring is not None and decoded["Measuring"] not in measuring:
+        return False
+    if since is None and until is None:
+        return True
+    return _in_range(decoded["UTC"], since, until)
+
+
+def _projection(fields, entry_class):
+    """
+    Return the function turning a decoded log entry into what
+    `LogsStore.scan` yields.
+    """
+    if fields is None:
+        return entry_class
+    return lambda decoded: tuple(decoded[key] for key in fields)
+
+
+def _as_choices(value):
+    if value is None or isinstance(value, (list, tuple, set, frozenset)):
+        return value
+    return (value,)
+
+
 class LogsStore(object):
     """
     Manage the log file.
 
     Provide the full file path to the log file in the constructor.
+    The log is kept alongside a `LogIndex` so the `XPLedger` doesn't
+    need a scan of the whole file, and the last entry is read from the
+    end of the file.
     """
+    tail_block_size = 4096
+
     def __init__(self, file_path):
         self._file_path = file_path
+        self._index = LogIndex(file_path)
 
     def load_last_entry(self):
         """
         Load the last log entry in the log file and return the
         associated `LogEntry` object, or None if there are no entries.
+
+        Blank lines at the end of the file are skipped, and so is an
+        unterminated last line that doesn't decode, as it was only
+        partially written.
         """
-        line = None
         if not os.path.exists(self._file_path):
             return None
-        with open(self._file_path, "r", encoding="utf-8") as infile:
-            for line in infile:
-                pass
-        if line is None:
-            return None
-        else:
-            return LogEntry(json.loads(line))
+        with open(self._file_path, "rb") as infile:
+            lines = _reversed_lines(infile, self.tail_block_size)
+            unterminated = next(lines)
+            if unterminated.strip():
+                try:
+                    return LogEntry(json.loads(unterminated.decode("utf-8")))
+                except ValueError:
+                    pass
+            for line in lines:
+                if line.strip():
+                    return LogEntry(json.loads(line.decode("utf-8")))
+        return None
 
     def check_log(self):
         total_points = []
@@ -175,17 +723,481 @@ class LogsStore(object):
         else:
             return (total_points, losing_points)
 
+    def scan(self, fields=None, exercise=None, measuring=None, since=None,
+             until=None, compact=False):
+        """
+        Memory-map the log file and yield its entries one at a time, as
+        `LogEntry` objects (`LogRecord` objects if ``compact`` is true),
+        or as tuples of the values of the log keys listed in ``fields``
+        (like ``("Points", "Total")``).
+
+        ``exercise`` and ``measuring`` take a value or a collection of
+        values to keep, and ``since``/``until`` bound the UTC of the
+        entries (``since <= UTC < until``). The filters are first tried
+        on the raw line, so most of the lines they reject are never
+        decoded. Blank lines are skipped and lines that don't decode
+        raise `ValueError`.
+        """
+        exercise = _as_choices(exercise)
+        measuring = _as_choices(measuring)
+        prefilter = _LinePrefilter(exercise, measuring, since, until)
+        project = _projection(fields, LogRecord if compact else LogEntry)
+        try:
+            infile = open(self._file_path, "rb")
+        except FileNotFoundError:
+            return
+        with infile:
+            if os.fstat(infile.fileno()).st_size == 0:
+                return
+            with mmap.mmap(infile.fileno(), 0,
+                           access=mmap.ACCESS_READ) as buffer:
+                size = len(buffer)
+                start = 0
+                while start < size:
+                    end = buffer.find(b"\n", start)
+                    if end == -1:
+                        end = size
+                    line_start, start = start, end + 1
+                    if not prefilter(buffer, line_start, end):
+                        continue
+                    line = buffer[line_start:end]
+                    if not line.strip():
+                        continue
+                    decoded = json.loads(line.decode("utf-8"))
+                    if _matches(decoded, exercise, measuring, since, until):
+                        yield project(decoded)
+
+    def ledger(self):
+        """
+        Return the `XPLedger` of the log from the index, or None if
+        there are no entries. Falls back to `verify_ledger` when the
+        index found entries it could not sum.
+        """
+        if not os.path.exists(self._file_path):
+            return None
+        trailer = self._index.load()
+        if trailer.count == 0:
+            return None
+        if trailer.bad_entries:
+            return self.verify_ledger()
+        return XPLedger(
+            points=_number(trailer.points),
+            losses=_number(trailer.losses),
+            count=trailer.count,
+            last_utc=_number(trailer.last_utc)
+        )
+
+    def verify_ledger(self):
+        """
+        Recount the `XPLedger` from every entry in the log, rebuilding
+        the index on the way, and return it, or None if there are no
+        entries. Errors in the log are raised rather than skipped.
+        """
+        points = losses = 0
+        count = 0
+        for exercise, each_points, total in self.scan(
+                fields=("Exercise", "Points", "Total")):
+            points += each_points
+            if exercise == "DETERIORATE":
+                losses += total
+            count += 1
+        if count == 0:
+            return None
+        trailer = self._index.rebuild()
+        return XPLedger(
+            points=points,
+            losses=losses,
+            count=trailer.count,
+            last_utc=_number(trailer.last_utc)
+        )
+
     def append_entry(self, entry):
         """
         Serialize the `LogEntry` object and append it to the log.
         """
-        entry._verify_keys()
-        serialized = json.dumps(entry._store, sort_keys=True)
-        with open(self._file_path, "a", encoding="utf-8") as outfile:
-            outfile.write(serialized + "\n")
+        self.append_many([entry])
+
+    def append_many(self, entries, fsync=False):
+        """
+        Serialize the `LogEntry` objects and append them to the log
+        with a single write, flushed to disk first if ``fsync`` is true.
+
+        Every entry is verified and serialized before anything is
+        written, and if the write or the index update fails the log is
+        truncated back to its previous length, so either all of the
+        entries are appended or none of them.
+        """
+        entries = list(entries)
+        for entry in entries:
+            entry._verify_keys()
+        lines = [(LogIndex.serialize(entry._store), entry._store)
+                 for entry in entries]
+        if not lines:
+            return
+        trailer = self._index.read_trailer()
+
+        def update_index(offset):
+            if trailer is not None:
+                self._index.record_append(trailer, lines)
+
+        with open(self._file_path, "ab") as outfile:
+            _append_atomically(
+                outfile, b"".join(serialized for serialized, _ in lines),
+                fsync, update_index)
+
+    def transaction(self, fsync=False):
+        """
+        Return a `LogTransaction` appending to this log.
+        """
+        return LogTransaction(self, fsync)
+
+
+class BinaryLogsStore(object):
+    """
+    Manage a log file of fixed-width binary records.
+
+    An alternative to the JSON lines `LogsStore` with the same
+    interface. Each record packs Average, Distance, Points, Total and
+    UTC as doubles, and Exercise and Measuring as codes into a table of
+    interned names kept in a ``.names`` sidecar file, one JSON string
+    per line. Two bit masks per record remember which values were ints
+    and which were null, so `export_jsonl` writes back exactly what
+    `import_jsonl` read.
+
+    The last entry is a single seek from the end of the file, and scans
+    unpack records without any text parsing, so the ledger is simply
+    recounted instead of being indexed.
+
+    Several stores may use the same log: the names are read again
+    whenever the ``.names`` file grew, and appends hold a lock on the
+    log (where `fcntl` is available) while new names are given codes
+    and written.
+    """
+    header = b'SLBL\x01\x00\x00\x00'
+    record_format = struct.Struct('<5dHHBB')
+    number_keys = ("Average", "Distance", "Points", "Total", "UTC")
+    name_keys = ("Exercise", "Measuring")
+    keys = number_keys + name_keys
+
+    def __init__(self, file_path):
+        self._file_path = file_path
+        self._names_path = file_path + '.names'
+        self._names = []
+        self._codes = {}
+        self._names_size = 0
+        self._load_names()
+
+    def _load_names(self):
+        try:
+            with open(self._names_path, 'rb') as infile:
+                data = infile.read()
+        except FileNotFoundError:
+            data = b''
+        # Only whole lines: another store may be writing the last one.
+        data = data[:data.rfind(b'\n') + 1]
+        self._names = [json.loads(line.decode('utf-8'))
+                       for line in data.splitlines()]
+        self._codes = {name: code for code, name in enumerate(self._names)}
+        self._names_size = len(data)
+
+    def _refresh_names(self):
+        """
+        Read the names again if another store added some.
+        """
+        try:
+            size = os.path.getsize(self._names_path)
+        except FileNotFoundError:
+            size = 0
+        if size != self._names_size:
+            self._load_names()
+
+    def _intern(self, name, new_names):
+        code = self._codes.get(name)
+        if code is None:
+            code = len(self._names)
+            if code > 0xFFFF:
+                raise ValueError('Too many distinct names in the log')
+            self._names.append(name)
+            self._codes[name] = code
+            new_names.append(name)
+        return code
+
+    def _pack(self, decoded, new_names):
+        numbers_ = []
+        int_mask = null_mask = 0
+        for bit, key in enumerate(self.number_keys):
+            value = decoded[key]
+            if value is None:
+                null_mask |= 1 << bit
+                value = 0.0
+            elif not _is_number(value):
+                raise ValueError(
+                    '{0} {1!r} can not be stored in a binary log'.format(
+                        key, value))
+            elif isinstance(value, int):
+                int_mask |= 1 << bit
+            numbers_.append(float(value))
+        codes = []
+        for bit, key in enumerate(self.name_keys, len(self.number_keys)):
+            value = decoded[key]
+            if value is None:
+                null_mask |= 1 << bit
+                codes.append(0)
+            elif not isinstance(value, str):
+                raise ValueError(
+                    '{0} {1!r} can not be stored in a binary log'.format(
+                        key, value))
+            else:
+                codes.append(self._intern(value, new_names))
+        return self.record_format.pack(*numbers_ + codes +
+                                       [int_mask, null_mask])
+
+    def _unpack(self, record):
+        *values, int_mask, null_mask = record
+        decoded = {}
+        for bit, key in enumerate(self.keys):
+            value = values[bit]
+            if null_mask & (1 << bit):
+                value = None
+            elif bit >= len(self.number_keys):
+                if value >= len(self._names):
+                    self._load_names()
+                value = self._names[value]
+            elif int_mask & (1 << bit):
+                value = int(value)
+            decoded[key] = value
+        return decoded
+
+    def _records_size(self, file_size):
+        """
+        Return the size of the complete records in a file of
+        ``file_size`` bytes, ignoring a partially written last record.
+        """
+        size = max(0, file_size - len(self.header))
+        return size - size % self.record_format.size
+
+    def _iter_records(self):
+        try:
+            infile = open(self._file_path, 'rb')
+        except FileNotFoundError:
+            return
+        with infile:
+            size = self._records_size(os.fstat(infile.fileno()).st_size)
+            if size == 0:
+                return
+            with mmap.mmap(infile.fileno(), 0,
+                           access=mmap.ACCESS_READ) as buffer:
+                start = len(self.header)
+                if buffer[:start] != self.header:
+                    raise ValueError(
+                        '{0} is not a binary log'.format(self._file_path))
+                view = memoryview(buffer)[start:start + size]
+                try:
+                    for record in self.record_format.iter_unpack(view):
+                        yield record
+                finally:
+                    view.release()
+
+    @property
+    def names(self):
+        """
+        The interned names, indexed by their code in the records.
+        """
+        self._refresh_names()
+        return list(self._names)
+
+    def read_records(self):
+        """
+        Return the bytes of every complete record in the log.
+        """
+        try:
+            with open(self._file_path, 'rb') as infile:
+                data = infile.read()
+        except FileNotFoundError:
+            return b''
+        size = self._records_size(len(data))
+        if size and data[:len(self.header)] != self.header:
+            raise ValueError(
+                '{0} is not a binary log'.format(self._file_path))
+        return data[len(self.header):len(self.header) + size]
+
+    def load_last_entry(self):
+        """
+        Load the last log entry in the log file and return the
+        associated `LogEntry` object, or None if there are no entries.
+        """
+        try:
+            infile = open(self._file_path, 'rb')
+        except FileNotFoundError:
+            return None
+        with infile:
+            size = self._records_size(os.fstat(infile.fileno()).st_size)
+            if size == 0:
+                return None
+            infile.seek(len(self.header) + size - self.record_format.size)
+            record = self.record_format.unpack(
+                infile.read(self.record_format.size))
+        return LogEntry(self._unpack(record))
+
+    def check_log(self):
+        total_points = []
+        losing_points = []
+        for exercise, points, total in self.scan(
+                fields=("Exercise", "Points", "Total")):
+            total_points.append(points)
+            if exercise == "DETERIORATE":
+                losing_points.append(total)
+        if not total_points:
+            return
+        return (total_points, losing_points)
+
+    def scan(self, fields=None, exercise=None, measuring=None, since=None,
+             until=None, compact=False):
+        """
+        Yield the entries of the log one at a time, like
+        `LogsStore.scan`. The filters are applied to the packed values
+        before a record is turned into a dict.
+        """
+        entry_class = LogRecord if compact else LogEntry
+        exercise = _as_choices(exercise)
+        measuring = _as_choices(measuring)
+        self._refresh_names()
+        checks = []
+        for position, wanted in ((5, exercise), (6, measuring)):
+            if wanted is not None:
+                codes = frozenset(self._codes[each] for each in wanted
+                                  if each in self._codes)
+                checks.append((position, codes))
+        for record in self._iter_records():
+            null_mask = record[8]
+            if any(record[position] not in codes or
+                   null_mask & (1 << position)
+                   for position, codes in checks):
+                continue
+            if (since is not None or until is not None) and (
+                    null_mask & (1 << 4) or
+                    not _in_range(record[4], since, until)):
+                continue
+            decoded = self._unpack(record)
+            if fields is None:
+                yield entry_class(decoded)
+            else:
+                yield tuple(decoded[key] for key in fields)
+
+    def ledger(self):
+        """
+        Return the `XPLedger` of the log, or None if there are no
+        entries.
+        """
+        return self.verify_ledger()
+
+    def verify_ledger(self):
+        """
+        Recount the `XPLedger` from every entry in the log and return
+        it, or None if there are no entries.
+        """
+        points = losses = 0
+        count = 0
+        utc = None
+        for exercise, each_points, total, utc in self.scan(
+                fields=("Exercise", "Points", "Total", "UTC")):
+            points += each_points
+            if exercise == "DETERIORATE":
+                losses += total
+            count += 1
+        if count == 0:
+            return None
+        return XPLedger(points=points, losses=losses, count=count,
+                        last_utc=utc)
+
+    def append_entry(self, entry):
+        """
+        Pack the `LogEntry` object and append it to the log.
+        """
+        self.append_many([entry])
+
+    def append_many(self, entries, fsync=False):
+        """
+        Pack the `LogEntry` objects and append them to the log with a
+        single write, like `LogsStore.append_many`.
+        """
+        entries = list(entries)
+        for entry in entries:
+            entry._verify_keys()
+        if entries:
+            self._append_structs([entry._store for entry in entries], fsync)
+
+    def transaction(self, fsync=False):
+        """
+        Return a `LogTransaction` appending to this log.
+        """
+        return LogTransaction(self, fsync)
+
+    def _append_structs(self, structs, fsync=False):
+        structs = list(structs)
+        with open(self._file_path, 'ab') as outfile:
+            if fcntl is not None:
+                # Released when the file is closed.
+                fcntl.flock(outfile.fileno(), fcntl.LOCK_EX)
+            self._refresh_names()
+            new_names = []
+            try:
+                packed = b''.join(self._pack(each, new_names)
+                                  for each in structs)
+            except Exception:
+                # Forget the names of the records that weren't written.
+                self._load_names()
+                raise
+            if new_names:
+                with open(self._names_path, 'ab') as names_file:
+                    data = ''.join(
+                        json.dumps(each) + '\n' for each in new_names)
+                    names_file.write(data.encode('utf-8'))
+                self._names_size += len(data.encode('utf-8'))
+            size = outfile.seek(0, os.SEEK_END)
+            if size == 0:
+                packed = self.header + packed
+            elif self._records_size(size) + len(self.header) != size:
+                # Drop a partially written record before appending.
+                outfile.truncate(self._records_size(size) + len(self.header))
+            _append_atomically(outfile, packed, fsync)
+
+    def import_jsonl(self, logs):
+        """
+        Append every entry of the JSON lines `LogsStore` ``logs`` to
+        this log.
+        """
+        self._append_structs(each._store for each in logs.scan())
+
+    def export_jsonl(self, logs):
+        """
+        Append every entry of this log to the JSON lines `LogsStore`
+        ``logs``.
+        """
+        logs.append_many(self.scan())
+
+
+log_formats = {
+    'jsonl': LogsStore,
+    'binary': BinaryLogsStore,
+}
+
+
+def make_logs_store(file_path, log_format='jsonl'):
+    """
+    Return the logs store for ``file_path`` in ``log_format``, one of
+    the keys of `log_formats`.
+    """
+    try:
+        store_class = log_formats[log_format]
+    except KeyError:
+        raise ValueError('Unknown log format {0!r}'.format(log_format))
+    return store_class(file_path)
 
 
 class LogEntry(object):
+    __slots__ = ('_store',)
+
     average = _storage_property("Average")
     distance = _storage_property("Distance")
     exercise = _storage_property("Exercise")
@@ -210,3 +1222,61 @@ class LogEntry(object):
                 missing_keys=missing_keys,
                 extra_keys=extra_keys
             )
+
+
+class LogRecord(object):
+    """
+    A compact `LogEntry`, for holding many entries in memory.
+
+    The values live in slots named after the `LogEntry` attributes
+    rather than in a dict, so there is no per-entry dict at all. The
+    ``_store`` dict is built on demand, and `_verify_keys` reports
+    unset attributes as missing keys and unknown keys given to the
+    constructor as extra keys, just like `LogEntry`.
+    """
+    __slots__ = (
+        'average', 'distance', 'exercise', 'measuring', 'points', 'total',
+        'utc', '_extra'
+    )
+
+    key_slots = (
+        ("Average", "average"), ("Distance", "distance"),
+        ("Exercise", "exercise"), ("Measuring", "measuring"),
+        ("Points", "points"), ("Total", "total"), ("UTC", "utc")
+    )
+    slot_for_key = dict(key_slots)
+    expected_keys = LogEntry.expected_keys
+
+    def __init__(self, _store=None):
+        self._extra = None
+        if _store:
+            for key, value in _store.items():
+                slot = self.slot_for_key.get(key)
+                if slot is not None:
+                    setattr(self, slot, value)
+                elif self._extra is None:
+                    self._extra = {key: value}
+                else:
+                    self._extra[key] = value
+
+    @property
+    def _store(self):
+        store = {}
+        for key, slot in self.key_slots:
+            try:
+                store[key] = getattr(self, slot)
+            except AttributeError:
+                pass
+        if self._extra:
+            store.update(self._extra)
+        return store
+
+    def _verify_keys(self):
+        store = self._store
+        missing_keys = self.expected_keys.difference(store.keys())
+        extra_keys = set(store.keys()).difference(self.expected_keys)
+        if missing_keys or extra_keys:
+            raise ImproperlyPopulated(
+                missing_keys=missing_keys,
+                extra_keys=extra_keys
+            )
@@ -15,8 +15,11 @@
 # You should have received a copy of the Affero GNU General Public License
 # along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
 #
+import glob
 import os
+import sys
 import tempfile
+import time
 import unittest
 
 
@@ -29,6 +32,52 @@ class TempfileTestCase(unittest.TestCase):
     def tearDown(self):
         super(TempfileTestCase, self).tearDown()
         os.remove(self.tempfile_path)
+        # Remove sidecar files, such as the log index, as well.
+        for path in glob.glob(glob.escape(self.tempfile_path) + '.*'):
+            os.remove(path)
 
     def open_tempfile(self, mode):
         return open(self.tempfile_path, mode, encoding='utf-8')
+
+
+class BenchmarkTestCase(TempfileTestCase):
+    """
+    Base class for benchmarks. They run at a small scale with the rest
+    of the tests; set ``SLOTH_BENCHMARK_SCALE`` to a larger number to
+    scale them up, and ``SLOTH_BENCHMARK_REPORT`` to print the timings.
+
+    Timings depend on how busy the machine is, so they are only checked
+    (see `assertFaster`) when ``SLOTH_BENCHMARK_SCALE`` is set.
+    """
+    scale = float(os.environ.get('SLOTH_BENCHMARK_SCALE', 1))
+    check_timings = 'SLOTH_BENCHMARK_SCALE' in os.environ
+
+    def scaled(self, count):
+        return max(1, int(count * self.scale))
+
+    def best_time(self, func, repeat=3):
+        """
+        Return the best wall clock time of ``repeat`` calls to ``func``.
+        """
+        best = None
+        for each in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        return best
+
+    def assertFaster(self, seconds, limit):
+        """
+        Check that ``seconds`` is less than ``limit``, when timings are
+        checked.
+        """
+        if self.check_timings:
+            self.assertLess(seconds, limit)
+
+    def report(self, name, **values):
+        if os.environ.get('SLOTH_BENCHMARK_REPORT'):
+            fields = ' '.join(
+                '{0}={1}'.format(key, values[key]) for key in sorted(values))
+            print('\n{0}: {1}'.format(name, fields), file=sys.stderr)
@@ -0,0 +1,94 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import unittest
+from sloth.tests.support import TempfileTestCase
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Monday 2016-01-04 00:00 UTC
+MONDAY = 1451865600
+DAY = 24 * 3600
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class LogColumnsTestCase(TempfileTestCase):
+    entries = [
+        ('Run', 100, 0, 5.0, MONDAY),
+        ('Swim', 50, 0, 0, MONDAY + DAY),
+        ('Run', 20, 0, 7.0, MONDAY + 8 * DAY),
+        ('DETERIORATE', 0, 30, 0, MONDAY + 30 * DAY),
+        ('Run', 10, 0, 9.0, MONDAY + 31 * DAY),
+    ]
+
+    def fill(self, logs):
+        from sloth.store import LogEntry
+        for exercise, points, total, average, utc in self.entries:
+            logs.append_entry(LogEntry({
+                'Average': average, 'Distance': 1, 'Exercise': exercise,
+                'Measuring': 'M', 'Points': points, 'Total': total,
+                'UTC': utc
+            }))
+        return logs
+
+    def make_columns(self, log_format='jsonl'):
+        from sloth.analytics import LogColumns
+        from sloth.store import make_logs_store
+        logs = make_logs_store(self.tempfile_path, log_format)
+        return LogColumns.from_store(self.fill(logs))
+
+    def test_columns(self):
+        for log_format in ('jsonl', 'binary'):
+            columns = self.make_columns(log_format)
+            self.assertEqual(len(columns), 5)
+            self.assertEqual(columns.utc.dtype, numpy.int64)
+            self.assertEqual(columns.points.dtype, numpy.float64)
+            self.assertEqual(columns.exercise_names[columns.exercise[1]],
+                             'Swim')
+            # Start over with an empty file for the next format.
+            with self.open_tempfile('w'):
+                pass
+
+    def test_xp_over_time(self):
+        utc, xp = self.make_columns().xp_over_time()
+        self.assertEqual(xp.tolist(), [100, 150, 170, 140, 150])
+        self.assertEqual(utc[-1], MONDAY + 31 * DAY)
+
+    def test_exercise_totals(self):
+        for log_format in ('jsonl', 'binary'):
+            totals = self.make_columns(log_format).exercise_totals()
+            self.assertEqual(totals,
+                             {'Run': 130, 'Swim': 50, 'DETERIORATE': 0})
+            with self.open_tempfile('w'):
+                pass
+
+    def test_weekly(self):
+        week_starts, sums = self.make_columns().weekly()
+        self.assertEqual(week_starts.tolist(),
+                         [MONDAY, MONDAY + 7 * DAY, MONDAY + 28 * DAY])
+        self.assertEqual(sums.tolist(), [150, 20, 10])
+
+    def test_rolling_average(self):
+        columns = self.make_columns()
+        utc, means = columns.rolling_average(2, exercise='Run')
+        self.assertEqual(means.tolist(), [6.0, 8.0])
+        self.assertEqual(utc.tolist(), [MONDAY + 8 * DAY, MONDAY + 31 * DAY])
+        utc, means = columns.rolling_average(10)
+        self.assertEqual(len(means), 0)
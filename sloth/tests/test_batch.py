@@ -0,0 +1,111 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import json
+import os
+import time
+from sloth.tests.support import TempfileTestCase
+
+
+def local_utc(text):
+    return int(time.mktime(time.strptime(text, '%Y-%m-%d %H:%M:%S')))
+
+
+class ImportFilesTestCase(TempfileTestCase):
+    def setUp(self):
+        super(ImportFilesTestCase, self).setUp()
+        from sloth.store import LogsStore
+        self.logs = LogsStore(self.tempfile_path)
+
+    def write_workouts(self, text, extension='.csv'):
+        self.workouts_path = self.tempfile_path + '.workouts' + extension
+        with open(self.workouts_path, 'w', encoding='utf-8') as fp:
+            fp.write(text)
+
+    def import_workouts(self, measuring='I', file_format=None):
+        from sloth.batch import import_files
+        printed = []
+        entries, errors = import_files(
+            [self.workouts_path], self.logs, measuring, file_format,
+            _print=printed.append)
+        return entries, errors, printed
+
+    def logged(self):
+        with self.open_tempfile('r') as fp:
+            return [json.loads(line) for line in fp]
+
+    def test_csv(self):
+        self.write_workouts(
+            'Exercise,Date,When,Time,Distance,Points\n'
+            'run,2016-01-02,07:30:00,30:00,3,20\n'
+            'Swim,2016-01-01,,1:00:00,,15\n'
+        )
+        entries, errors, printed = self.import_workouts()
+        self.assertEqual(errors, [])
+        self.assertEqual(printed, [])
+        self.assertEqual(self.logged(), [
+            {"Average": 0.0, "Distance": 0.0, "Exercise": "Swim",
+             "Measuring": "I", "Points": 15, "Total": 3600,
+             "UTC": local_utc('2016-01-01 00:00:00')},
+            {"Average": 6.0, "Distance": 3.0, "Exercise": "Run",
+             "Measuring": "I", "Points": 20, "Total": 1800,
+             "UTC": local_utc('2016-01-02 07:30:00')},
+        ])
+        self.assertEqual(self.logs.ledger().points, 35)
+
+    def test_jsonl(self):
+        self.write_workouts(
+            '{"exercise": "Run", "date": "2016-01-02", "time": "20:00", '
+            '"distance": 4, "points": 10}\n'
+            '\n'
+            'not json\n',
+            extension='.jsonl'
+        )
+        entries, errors, printed = self.import_workouts(measuring='M')
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].distance, 4.0)
+        self.assertEqual(entries[0].measuring, 'M')
+        self.assertEqual([error.line for error in errors], [3])
+
+    def test_errors_are_reported_and_skipped(self):
+        self.write_workouts(
+            'Exercise,Date,Time,Points\n'
+            'Run,2016-13-01,25:00,1\n'
+            ',2016-01-01,25:00,1\n'
+            'Run,2016-01-01,25:00,-1\n'
+            'Deteriorate,2016-01-01,25:00,1\n'
+            'Run,2016-01-01,25:00,1\n'
+        )
+        entries, errors, printed = self.import_workouts()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual([error.line for error in errors], [2, 3, 4, 5])
+        self.assertEqual(printed[0], '{0}:2: Format is 1999-12-31'.format(
+            self.workouts_path))
+        self.assertEqual(len(self.logged()), 1)
+
+    def test_missing_columns(self):
+        self.write_workouts('Exercise,Date\nRun,2016-01-01\n')
+        entries, errors, printed = self.import_workouts()
+        self.assertEqual(entries, [])
+        self.assertEqual(errors[0].message, 'Missing points, time')
+        self.assertEqual(os.path.getsize(self.tempfile_path), 0)
+
+    def test_unknown_format(self):
+        from sloth.batch import file_format_for
+        with self.assertRaises(ValueError):
+            file_format_for('workouts.xls')
+        self.assertEqual(file_format_for('Workouts.CSV'), 'csv')
@@ -0,0 +1,508 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from sloth.tests.support import BenchmarkTestCase
+
+
+def make_log_line(number):
+    struct = {
+        "Average": 0, "Distance": 0, "Exercise": "Run", "Measuring": "M",
+        "Points": number % 50, "Total": 0, "UTC": 1451606400 + number
+    }
+    return json.dumps(struct, sort_keys=True) + "\n"
+
+
+class CountingReader(object):
+    """
+    Wrap a binary file and count the bytes read through it.
+    """
+    def __init__(self, infile):
+        self._infile = infile
+        self.bytes_read = 0
+
+    def seek(self, *args):
+        return self._infile.seek(*args)
+
+    def read(self, size):
+        data = self._infile.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+class TailReaderBenchmark(BenchmarkTestCase):
+    # The entries before the last thousand are a hole of the same size,
+    # which is sparse on most file systems. The 10M entry log (over a
+    # gigabyte) is only written when timings are checked.
+    entry_counts = [1000, 100000]
+    large_entry_count = 10000000
+    tail_entries = 1000
+    # Seconds a load_last_entry may take, whatever the size of the log
+    budget = float(os.environ.get('SLOTH_TAIL_BUDGET', 0.01))
+
+    def write_log(self, entries):
+        line = make_log_line(0)
+        with self.open_tempfile('w') as fp:
+            fp.truncate((entries - self.tail_entries) * len(line))
+            fp.seek(0, 2)
+            for number in range(self.tail_entries):
+                fp.write(make_log_line(number))
+
+    def test_load_last_entry_constant(self):
+        from sloth.store import LogsStore
+        from sloth.store import _reversed_lines
+        store = LogsStore(self.tempfile_path)
+        bytes_read = set()
+        entry_counts = list(self.entry_counts)
+        if self.check_timings:
+            entry_counts.append(self.large_entry_count)
+        for entries in entry_counts:
+            self.write_log(entries)
+            elapsed = self.best_time(store.load_last_entry)
+            self.assertFaster(elapsed, self.budget)
+            with open(self.tempfile_path, 'rb') as infile:
+                reader = CountingReader(infile)
+                last = next(line for line in _reversed_lines(
+                    reader, store.tail_block_size) if line)
+            self.assertEqual(
+                json.loads(last.decode('utf-8'))['UTC'],
+                1451606400 + self.tail_entries - 1)
+            bytes_read.add(reader.bytes_read)
+            self.report('load_last_entry', entries=entries,
+                        seconds=elapsed, bytes_read=reader.bytes_read)
+        self.assertEqual(bytes_read, {store.tail_block_size})
+
+
+class LogFormatBenchmark(BenchmarkTestCase):
+    appends = 200
+    entries = 20000
+
+    def make_stores(self):
+        from sloth.store import make_logs_store
+        return [
+            ('jsonl', make_logs_store(self.tempfile_path + '.jsonl')),
+            ('binary', make_logs_store(self.tempfile_path, 'binary')),
+        ]
+
+    def fill(self, name, store, structs):
+        if name == 'binary':
+            store._append_structs(structs)
+            return
+        with open(store._file_path, 'a', encoding='utf-8') as outfile:
+            outfile.writelines(
+                json.dumps(each, sort_keys=True) + '\n' for each in structs)
+
+    def test_load_append_scan(self):
+        from sloth.store import LogEntry
+        entries = self.scaled(self.entries)
+        structs = [json.loads(make_log_line(number))
+                   for number in range(entries)]
+        for name, store in self.make_stores():
+            def append():
+                for each in structs[:self.appends]:
+                    store.append_entry(LogEntry(each))
+            append_seconds = self.best_time(append, repeat=1)
+            self.fill(name, store, structs[self.appends:])
+            load_seconds = self.best_time(store.load_last_entry)
+            scan_seconds = self.best_time(
+                lambda: sum(1 for each in store.scan(('Points',))))
+            self.assertEqual(store.load_last_entry().utc,
+                             structs[-1]['UTC'])
+            self.assertEqual(store.ledger().count, entries)
+            self.report(
+                'log_format', format=name, entries=entries,
+                appends_per_second=int(self.appends / append_seconds),
+                load_seconds=load_seconds,
+                scan_entries_per_second=int(entries / scan_seconds))
+
+
+class DictLogEntry(object):
+    """
+    LogEntry as it was before it had slots: an instance dict holding
+    the dict of values.
+    """
+    def __init__(self, _store=None):
+        self._store = _store or {}
+
+
+class EntryMemoryBenchmark(BenchmarkTestCase):
+    # 1000000 entries with SLOTH_BENCHMARK_SCALE=100
+    entries = 10000
+
+    def bytes_per_entry(self, logs, make_entries):
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            entries = make_entries(logs)
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(len(entries), self.scaled(self.entries))
+        return (after - before) / len(entries)
+
+    def test_bytes_per_entry(self):
+        from sloth.store import LogsStore
+        entries = self.scaled(self.entries)
+        with self.open_tempfile('w') as fp:
+            fp.writelines(make_log_line(number) for number in range(entries))
+        logs = LogsStore(self.tempfile_path)
+        before = self.bytes_per_entry(
+            logs, lambda logs: [DictLogEntry(each._store)
+                                for each in logs.scan()])
+        entry = self.bytes_per_entry(logs, lambda logs: list(logs.scan()))
+        record = self.bytes_per_entry(
+            logs, lambda logs: list(logs.scan(compact=True)))
+        self.report('bytes_per_entry', entries=entries, before=int(before),
+                    log_entry=int(entry), log_record=int(record))
+        self.assertLess(entry, before)
+        self.assertLess(record, entry)
+
+
+class StartupBenchmark(BenchmarkTestCase):
+    """
+    Time a cold start of the sloth-game entry point up to its first
+    prompt. Stdin is empty, so the first prompt gets EOF and the
+    program says goodbye straight away.
+
+    Every run checks the modules a cold start imports and a loose time
+    limit; the budget itself is checked when timings are.
+    """
+    # Seconds a cold start may take beyond a bare interpreter start
+    budget = float(os.environ.get('SLOTH_STARTUP_BUDGET', 0.5))
+    # Only a regression several times over the budget fails a busy run
+    loose_budget = 4 * budget
+    # Only needed once there's a workout to log
+    lazy_modules = ['arrow', 'dateutil', 'readline', 'numpy']
+    package_dir = os.path.dirname(os.path.dirname(
+        os.path.dirname(os.path.abspath(__file__))))
+    # The slowest imports to report
+    slowest = 5
+
+    # Lists the imported modules on stdout once the program is done
+    code = ('import sys\n'
+            'from sloth import start\n'
+            'try:\n'
+            '    start.run()\n'
+            'finally:\n'
+            '    print("Modules:", " ".join(sorted(sys.modules)))\n')
+
+    def run_python(self, code, home, *options):
+        env = dict(os.environ, HOME=home, PYTHONPATH=self.package_dir)
+        process = subprocess.Popen(
+            [sys.executable] + list(options) + ['-c', code], env=env,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, universal_newlines=True)
+        stdout, stderr = process.communicate()
+        self.assertEqual(process.returncode, 0, stderr)
+        return stdout, stderr
+
+    def import_times(self, home):
+        """
+        Return ``[(microseconds, module), ...]`` for the slowest imports
+        of a cold start, by their own time, or an empty list before
+        Python 3.7, which added ``-X importtime``.
+        """
+        if sys.version_info < (3, 7):
+            return []
+        stdout, stderr = self.run_python(self.code, home, '-X', 'importtime')
+        times = []
+        for line in stderr.splitlines():
+            if line.startswith('import time:') and '|' in line:
+                own, cumulative, module = line[12:].split('|')
+                if own.strip().isdigit():
+                    times.append((int(own), module.strip()))
+        return sorted(times, reverse=True)[:self.slowest]
+
+    def test_cold_start(self):
+        with tempfile.TemporaryDirectory() as home:
+            stdout, stderr = self.run_python(self.code, home)
+            self.assertIn('Goodbye!', stdout)
+            imported = set(stdout.rsplit('Modules:', 1)[1].split())
+            self.assertIn('sloth.start', imported)
+            for module in self.lazy_modules:
+                self.assertNotIn(module, imported)
+
+            bare = self.best_time(lambda: self.run_python('pass', home))
+            start = self.best_time(lambda: self.run_python(self.code, home))
+            slowest = self.import_times(home)
+        self.report('cold_start', seconds=start, bare_seconds=bare,
+                    modules=len(imported), slowest_imports=' '.join(
+                        '{0}:{1}us'.format(module, own)
+                        for own, module in slowest))
+        self.assertLess(start - bare, self.loose_budget)
+        self.assertFaster(start - bare, self.budget)
+
+
+class CompleterBenchmark(BenchmarkTestCase):
+    def test_prefix_lookup(self):
+        from sloth.completer import Completer
+        options = ['Exercise {0:05d}'.format(number)
+                   for number in range(self.scaled(5000))]
+        aliases = dict(('Alias {0:05d}'.format(number), option)
+                       for number, option in enumerate(options))
+        completer = Completer(options, aliases)
+        self.assertEqual(completer.find('exercise 00012'),
+                         ['Exercise 00012'])
+        self.assertEqual(completer.find('alias 00012'), ['Exercise 00012'])
+        elapsed = self.best_time(
+            lambda: [completer.find('exercise 0001') for each in range(100)])
+        fuzzy = self.best_time(lambda: completer.find('xrc012'))
+        self.report('completer', options=len(options), aliases=len(aliases),
+                    prefix_seconds=elapsed / 100, fuzzy_seconds=fuzzy)
+
+
+class BatchImportBenchmark(BenchmarkTestCase):
+    def test_import_csv(self):
+        from sloth.batch import import_files
+        from sloth.store import LogsStore
+        rows = self.scaled(5000)
+        workouts_path = self.tempfile_path + '.workouts.csv'
+        with open(workouts_path, 'w', encoding='utf-8') as fp:
+            fp.write('Exercise,Date,When,Time,Distance,Points\n')
+            for number in range(rows):
+                fp.write('Run,{0:04d}-{1:02d}-{2:02d},07:30:00,30:00,3,20\n'
+                         .format(2000 + number // 336, number // 28 % 12 + 1,
+                                 number % 28 + 1))
+        logs = LogsStore(self.tempfile_path)
+        start = time.perf_counter()
+        entries, errors = import_files([workouts_path], logs, 'I')
+        elapsed = time.perf_counter() - start
+        self.assertEqual((len(entries), errors), (rows, []))
+        self.assertEqual(logs.ledger().count, rows)
+        self.report('batch_import', rows=rows, seconds=elapsed,
+                    rows_per_second=rows / elapsed)
+
+
+class ValidatorBenchmark(BenchmarkTestCase):
+    def test_validate_all(self):
+        from sloth.userinput import cardio_time_converter
+        from sloth.userinput import metric_body_weight_prompter
+        count = self.scaled(20000)
+        times = ['{0}:{1:02d}'.format(number % 90, number % 60)
+                 for number in range(count)]
+        weights = [str(number % 500) for number in range(count)]
+        for name, field, raw_values in [
+                ('time', cardio_time_converter, times),
+                ('weight', metric_body_weight_prompter.convert, weights)]:
+            result = []
+            elapsed = self.best_time(
+                lambda: result.append(field.validate_all(raw_values)))
+            values, errors = result[-1]
+            self.assertEqual(len(values) + len(errors), count)
+            self.report('validate_all', field=name, values=count,
+                        seconds=elapsed, values_per_second=count / elapsed)
+
+
+class DateParsingBenchmark(BenchmarkTestCase):
+    def test_parse_date(self):
+        import arrow
+        from sloth import userinput
+        count = self.scaled(5000)
+        dates = ['20{0:02d}-{1:02d}-{2:02d}'.format(
+            number % 17, number % 12 + 1, number % 28 + 1)
+            for number in range(count)]
+
+        def arrow_path():
+            # What cardio_date_converter used to do for each date
+            for text in dates:
+                arrow.Arrow.strptime(text, '%Y-%m-%d').strftime('%Y-%m-%d')
+
+        def fast_path():
+            for text in dates:
+                userinput.cardio_date_converter(text)
+
+        cache_info = []
+
+        def cached_path():
+            with userinput.cached_parsing():
+                fast_path()
+                cache_info.append(userinput.date_parser.cache_info())
+
+        arrow_seconds = self.best_time(arrow_path)
+        fast_seconds = self.best_time(fast_path)
+        cached_seconds = self.best_time(cached_path)
+        self.report('parse_date', dates=count, arrow_seconds=arrow_seconds,
+                    fast_seconds=fast_seconds, cached_seconds=cached_seconds)
+        # Each distinct date is only parsed once.
+        self.assertEqual(cache_info[-1].misses, len(set(dates)))
+        self.assertFaster(fast_seconds, arrow_seconds)
+
+
+class DictNPC(object):
+    """
+    An NPC as a class of its own, the way they used to be written:
+    every value in the instance dict.
+    """
+    def __init__(self, life, attack_lvl, defence_lvl, agility_lvl,
+                 charisma_lvl, strength_lvl, rh, lh, rl, ll):
+        self.life = life
+        self.attack_lvl = attack_lvl
+        self.defence_lvl = defence_lvl
+        self.agility_lvl = agility_lvl
+        self.charisma_lvl = charisma_lvl
+        self.strength_lvl = strength_lvl
+        self.rh = rh
+        self.lh = lh
+        self.rl = rl
+        self.ll = ll
+
+
+class SpawnBenchmark(BenchmarkTestCase):
+    npcs = 10000
+
+    def bytes_per_npc(self, spawn):
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            npcs = spawn()
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        return (after - before) / len(npcs)
+
+    def test_spawn(self):
+        from sloth.npcs import default_registry
+        registry = default_registry()
+        count = self.scaled(self.npcs)
+        archetype = registry.get("Goblin general")
+        before = self.bytes_per_npc(lambda: [
+            DictNPC(archetype.life, archetype.attack, archetype.defence,
+                    archetype.agility, archetype.charisma,
+                    archetype.strength, *archetype.equipment)
+            for each in range(count)])
+        npc = self.bytes_per_npc(
+            lambda: registry.spawn_many("Goblin general", count))
+        seconds = self.best_time(
+            lambda: registry.spawn_many("Goblin general", count))
+        self.report('spawn', npcs=count, seconds=seconds,
+                    dict_bytes=int(before), npc_bytes=int(npc))
+        self.assertLess(npc, before)
+
+
+class EntityStoreBenchmark(BenchmarkTestCase):
+    npcs = 50000
+
+    def test_tick(self):
+        from sloth.entities import EntityStore
+        from sloth.entities import numpy
+        from sloth.npcs import default_registry
+        count = self.scaled(self.npcs)
+        npcs = default_registry().spawn_many("Goblin", count)
+        store = EntityStore()
+        store.spawn_many("Goblin", count)
+
+        def objects_tick():
+            for npc in npcs:
+                if npc.life > 0:
+                    npc.life -= 1
+
+        def columns_tick():
+            life = store.columns['life']
+            if numpy is None:
+                for id, value in enumerate(life):
+                    if value > 0:
+                        life[id] = value - 1
+            else:
+                life[life > 0] -= 1
+
+        objects_seconds = self.best_time(objects_tick)
+        columns_seconds = self.best_time(columns_tick)
+        self.assertEqual(store[0].life, npcs[0].life)
+        self.report('entity_tick', npcs=count, numpy=numpy is not None,
+                    objects_seconds=objects_seconds,
+                    columns_seconds=columns_seconds)
+        if numpy is not None:
+            self.assertFaster(columns_seconds, objects_seconds)
+
+
+class CombatBenchmark(BenchmarkTestCase):
+    # Combatants per battle: 10k and 100k at the default scale
+    combatants = [10000, 100000]
+
+    def test_rounds_per_second(self):
+        from sloth.combat import CombatEngine
+        from sloth.entities import EntityStore
+        for combatants in self.combatants:
+            combatants = self.scaled(combatants)
+            store = EntityStore()
+            store.spawn_many("Goblin guard", combatants // 2)
+            store.spawn_many("Goblin", combatants - combatants // 2)
+            engine = CombatEngine(store, seed=1)
+            elapsed = self.best_time(engine.round)
+            self.assertEqual(len(store), combatants)
+            self.report('combat_round', combatants=combatants,
+                        numpy=store.use_numpy, seconds=elapsed,
+                        rounds_per_second=1 / elapsed)
+
+
+class WorldBenchmark(BenchmarkTestCase):
+    entities = 10000
+    ticks = 100
+
+    def test_ticks_per_second(self):
+        from sloth.entities import EntityStore
+        from sloth.world import World
+        entities = self.scaled(self.entities)
+        store = EntityStore()
+        store.spawn_many("Goblin guard", entities // 2)
+        store.spawn_many("Goblin", entities - entities // 2)
+        world = World(store, seed=1)
+        start = time.perf_counter()
+        deaths = world.run(self.ticks)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(world.tick, self.ticks)
+        self.report('world_ticks', entities=entities, ticks=self.ticks,
+                    deaths=deaths, seconds=elapsed,
+                    ticks_per_second=self.ticks / elapsed)
+
+
+class ShardingBenchmark(BenchmarkTestCase):
+    entities = 20000
+    ticks = 100
+    processes = 2
+
+    def run_world(self, processes):
+        from sloth.entities import EntityStore
+        from sloth.regions import ShardedWorld
+        from sloth.regions import regions_by_race
+        entities = self.scaled(self.entities)
+        store = EntityStore()
+        for name in ("Goblin guard", "Goblin", "Elf guard", "Dwarf"):
+            store.spawn_many(name, entities // 4)
+        start = time.perf_counter()
+        with ShardedWorld(store, regions_by_race(store), seed=1,
+                          processes=processes, exchange_every=5) as world:
+            deaths = world.run(self.ticks)
+            digest = world.checksum()
+        return time.perf_counter() - start, deaths, digest
+
+    def test_ticks_per_second(self):
+        single, deaths, digest = self.run_world(0)
+        sharded, sharded_deaths, sharded_digest = self.run_world(
+            self.processes)
+        self.assertEqual((sharded_deaths, sharded_digest), (deaths, digest))
+        self.report('sharded_world_ticks', ticks=self.ticks,
+                    deaths=deaths, processes=self.processes,
+                    single_ticks_per_second=self.ticks / single,
+                    sharded_ticks_per_second=self.ticks / sharded)
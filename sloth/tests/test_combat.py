@@ -0,0 +1,135 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ArrayCombatEngineTestCase(unittest.TestCase):
+    use_numpy = False
+
+    def make_store(self):
+        from sloth.entities import EntityStore
+        from sloth.npcs import ArchetypeRegistry
+        from sloth.tests.test_npcs import make_data
+        store = EntityStore(ArchetypeRegistry.from_data(make_data()),
+                            use_numpy=self.use_numpy)
+        # 0-1 are guards (attack 8, defence 8), 2-4 goats (attack 2,
+        # defence 1, life 20)
+        store.spawn_many("Goblin guard", 2)
+        store.spawn_many("Goat", 3)
+        return store
+
+    def make_engine(self, seed=1):
+        from sloth.combat import CombatEngine
+        return CombatEngine(self.make_store(), seed=seed)
+
+    def test_resolve(self):
+        engine = self.make_engine()
+        result = engine.resolve([0, 1, 2, 3], [2, 2, 0, 4])
+        self.assertEqual(list(result.damage), [10, 10, 0, 10])
+        self.assertEqual(list(result.deaths), [2])
+        self.assertEqual(list(engine.store.columns['life']),
+                         [60, 60, 0, 20, 10])
+
+    def test_dead_attackers_and_targets(self):
+        engine = self.make_engine()
+        engine.store[0].life = 0
+        engine.store[4].life = 0
+        result = engine.resolve([0, 1], [2, 4])
+        self.assertEqual(list(result.damage), [0, 10])
+        # The goat was already dead, so the round didn't kill it
+        self.assertEqual(list(result.deaths), [])
+        self.assertEqual(engine.store[4].life, -10)
+
+    def test_killed_attackers_still_attack(self):
+        engine = self.make_engine()
+        engine.store[2].life = 10
+        result = engine.resolve([0, 2], [2, 2])
+        self.assertEqual(list(result.damage), [10, 10])
+        self.assertEqual(list(result.deaths), [2])
+
+    def test_mismatched_pairs(self):
+        engine = self.make_engine()
+        with self.assertRaises(ValueError):
+            engine.resolve([0, 1], [2])
+
+    def test_pick_targets(self):
+        engine = self.make_engine()
+        targets = engine.pick_targets(range(5), range(5))
+        self.assertEqual(len(targets), 5)
+        for attacker, target in enumerate(targets):
+            self.assertNotEqual(attacker, target)
+        self.assertEqual(list(engine.pick_targets([3], [3])), [3])
+        with self.assertRaises(ValueError):
+            engine.pick_targets([0], [])
+
+    def fight(self, seed, rounds=5):
+        engine = self.make_engine(seed)
+        history = []
+        for each in range(rounds):
+            targets, result = engine.round()
+            history.append((list(targets), list(result.damage),
+                            list(result.deaths)))
+        return history, list(engine.store.columns['life'])
+
+    def test_seeded_rounds_repeat(self):
+        self.assertEqual(self.fight(3), self.fight(3))
+        self.assertNotEqual(self.fight(3)[0], self.fight(4)[0])
+
+
+if numpy is not None:
+    class WatchedColumn(numpy.ndarray):
+        """
+        A column recording which ids are written, for checking that a
+        round leaves the rest of a shared column alone. Only the column
+        itself records, not the arrays sliced out of it.
+        """
+        written = None
+
+        def __setitem__(self, key, value):
+            if self.written is not None:
+                self.written.extend(numpy.atleast_1d(key).tolist())
+            super(WatchedColumn, self).__setitem__(key, value)
+
+        def __isub__(self, other):
+            if self.written is not None:
+                self.written.extend(range(len(self)))
+            return super(WatchedColumn, self).__isub__(other)
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class NumpyCombatEngineTestCase(ArrayCombatEngineTestCase):
+    use_numpy = True
+
+    def test_same_battle_as_arrays(self):
+        arrays = ArrayCombatEngineTestCase('fight')
+        self.assertEqual(self.fight(5, rounds=20),
+                         arrays.fight(5, rounds=20))
+
+    def test_resolve_writes_only_targets(self):
+        engine = self.make_engine()
+        life = engine.store.columns['life'].view(WatchedColumn)
+        life.written = []
+        engine.store.columns['life'] = life
+        engine.resolve([0, 1, 2], [2, 2, 4])
+        self.assertEqual(sorted(set(life.written)), [2, 4])
+        self.assertEqual(list(life), [60, 60, 0, 20, 10])
@@ -0,0 +1,70 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import unittest
+
+
+class CompleterTestCase(unittest.TestCase):
+    options = ['Cardio', 'Log', 'Pullups', 'Pushups', 'Settings', 'Situps']
+
+    def complete_all(self, completer, text):
+        matches = []
+        state = 0
+        while True:
+            match = completer.complete(text, state)
+            if match is None:
+                return matches
+            matches.append(match)
+            state += 1
+
+    def test_empty_text(self):
+        from sloth.completer import Completer
+        completer = Completer(self.options)
+        self.assertEqual(self.complete_all(completer, ''), self.options)
+
+    def test_prefix_ignores_case(self):
+        from sloth.completer import Completer
+        completer = Completer(self.options)
+        self.assertEqual(self.complete_all(completer, 'pu'),
+                         ['Pullups', 'Pushups'])
+        self.assertEqual(self.complete_all(completer, 'PUS'), ['Pushups'])
+        self.assertEqual(self.complete_all(completer, 'si'), ['Situps'])
+
+    def test_fuzzy(self):
+        from sloth.completer import Completer
+        completer = Completer(self.options)
+        self.assertEqual(completer.find('pshp'), ['Pushups'])
+        # 'us' spans 2 letters of 'pushups', and 3 of 'pullups' (the
+        # second 'u') and 'situps'
+        self.assertEqual(completer.find('us'),
+                         ['Pushups', 'Pullups', 'Situps'])
+        self.assertEqual(completer.find('tps'), ['Situps'])
+        self.assertEqual(completer.find('xyz'), [])
+
+    def test_prefix_before_fuzzy(self):
+        from sloth.completer import Completer
+        completer = Completer(self.options)
+        # 'Log' is a prefix match; 'Pullups' would be a fuzzy one
+        self.assertEqual(completer.find('l'), ['Log'])
+
+    def test_aliases(self):
+        from sloth.completer import Completer
+        completer = Completer(self.options, aliases={
+            'Run': 'Cardio', 'Press ups': 'Pushups', 'Push ups': 'Pushups'})
+        self.assertEqual(completer.find('ru'), ['Cardio'])
+        # each name is only offered once, however many aliases match
+        self.assertEqual(completer.find('p'), ['Pushups', 'Pullups'])
@@ -0,0 +1,53 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import unittest
+
+
+def reference_decay(xp, multiple_remove):
+    """
+    The week by week loop main.deteriorate used to run.
+    """
+    losses = []
+    if multiple_remove >= 1 and xp * 0.8 > 199.20000000000002:
+        for each in range(multiple_remove):
+            total_xp = int(xp)
+            if total_xp >= 199.20000000000002:
+                losses.append(round(total_xp * 0.2))
+                xp = round(total_xp * 0.8)
+    return xp, losses
+
+
+class DecayTestCase(unittest.TestCase):
+    def test_matches_weekly_loop(self):
+        from sloth.deterioration import decay
+        for xp in list(range(0, 3000)) + [99749, 12345.6, 249.5]:
+            for periods in (0, 1, 2, 5, 30, 520):
+                self.assertEqual(decay(xp, periods),
+                                 reference_decay(xp, periods),
+                                 (xp, periods))
+
+    def test_threshold(self):
+        from sloth.deterioration import decay
+        self.assertEqual(decay(249, 3), (249, []))
+        self.assertEqual(decay(250, 3), (160, [50, 40]))
+
+    def test_long_absence_stops_early(self):
+        from sloth.deterioration import decay
+        xp, losses = decay(99749, 10 ** 9)
+        self.assertLess(xp, 200)
+        self.assertLess(len(losses), 40)
@@ -0,0 +1,108 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ArrayEntityStoreTestCase(unittest.TestCase):
+    use_numpy = False
+
+    def make_store(self, capacity=2):
+        from sloth.entities import EntityStore
+        from sloth.npcs import ArchetypeRegistry
+        from sloth.tests.test_npcs import make_data
+        return EntityStore(ArchetypeRegistry.from_data(make_data()),
+                           capacity=capacity, use_numpy=self.use_numpy)
+
+    def test_spawn(self):
+        store = self.make_store()
+        cows = store.spawn_many("Cow", 3)
+        guard = store.spawn("Goblin guard")
+        self.assertEqual(cows, range(0, 3))
+        self.assertEqual(len(store), 4)
+        self.assertEqual(guard.id, 3)
+        self.assertEqual((guard.name, guard.race), ("Goblin guard", "Goblins"))
+        self.assertEqual(
+            (guard.life, guard.attack_lvl, guard.defence_lvl,
+             guard.agility_lvl, guard.charisma_lvl, guard.intelligence,
+             guard.strength_lvl), (60, 8, 8, 5, 3, 5, 7))
+        self.assertIs(type(guard.life), int)
+        self.assertEqual([cow.life for cow in store][:3], [35, 35, 35])
+
+    def test_columns(self):
+        store = self.make_store()
+        store.spawn_many("Cow", 3)
+        store.spawn("Goat")
+        life = store.columns['life']
+        self.assertEqual(list(life), [35, 35, 35, 20])
+        life[1] = 0
+        self.assertEqual(store[1].life, 0)
+        self.assertEqual(list(store.living()), [0, 2, 3])
+        self.assertEqual(list(store.of_archetype("Goat")), [3])
+        self.assertEqual(list(store.of_archetype("Dragon")), [])
+
+    def test_handles_write_columns(self):
+        store = self.make_store()
+        guard = store.spawn("Goblin guard")
+        goat = store.spawn("Goat")
+        self.assertTrue(guard.attack(goat))
+        self.assertEqual(store.columns['life'][goat.id], 10)
+        self.assertFalse(guard.attack(goat))
+        self.assertFalse(store[goat.id].living)
+        self.assertEqual(store[guard.id], guard)
+        with self.assertRaises(IndexError):
+            store[2]
+
+    def test_equipment(self):
+        store = self.make_store()
+        guard = store.spawn("Goblin guard")
+        other = store.spawn("Goblin guard")
+        self.assertEqual(guard.equipment, ("Spear", None))
+        guard.equip("lh", "Shield")
+        guard.equip("rh", None)
+        self.assertEqual(guard.equipment, (None, "Shield"))
+        self.assertEqual(other.equipment, ("Spear", None))
+        with self.assertRaises(ValueError):
+            guard.equip("rl", "Boot")
+        with self.assertRaises(ValueError):
+            store.spawn("Cow").equipped("rh")
+
+    def test_growth_keeps_values(self):
+        store = self.make_store(capacity=1)
+        first = store.spawn("Cow")
+        first.life = 7
+        store.spawn_many("Goat", 100)
+        self.assertEqual(first.life, 7)
+        self.assertEqual(len(store.columns['life']), 101)
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class NumpyEntityStoreTestCase(ArrayEntityStoreTestCase):
+    use_numpy = True
+
+    def test_columns_are_arrays(self):
+        store = self.make_store()
+        store.spawn_many("Cow", 3)
+        life = store.columns['life']
+        self.assertIsInstance(life, numpy.ndarray)
+        life -= 5
+        self.assertEqual(store[0].life, 30)
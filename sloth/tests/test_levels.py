@@ -0,0 +1,61 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import bisect
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class LevelCurveTestCase(unittest.TestCase):
+    def test_table_matches_bisect(self):
+        from sloth.levels import BREAKPOINTS
+        from sloth.levels import MAX_XP
+        from sloth.levels import level
+        for xp in list(range(-10, MAX_XP + 10)) + [249.5, 250.0, -0.5]:
+            self.assertEqual(level(xp), bisect.bisect(BREAKPOINTS, xp) + 1)
+
+    def test_levels(self):
+        from sloth.levels import default_curve
+        self.assertEqual(default_curve.levels([0, 250, 499, 500, 99749]),
+                         [1, 2, 2, 3, 22])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_levels_array(self):
+        from sloth.levels import default_curve
+        xps = numpy.array([0, 250, 499, 500, 99749, 120000])
+        self.assertEqual(default_curve.levels(xps).tolist(),
+                         [1, 2, 2, 3, 22, 22])
+
+    def test_xp_to_next_level(self):
+        from sloth.levels import default_curve
+        self.assertEqual(default_curve.xp_to_next_level(0), 250)
+        self.assertEqual(default_curve.xp_to_next_level(600), 1400)
+        self.assertIsNone(default_curve.xp_to_next_level(90750))
+
+    def test_custom_curve(self):
+        from sloth.levels import LevelCurve
+        curve = LevelCurve([10, 20], max_xp=30)
+        self.assertEqual(curve.levels([0, 10, 25, 1000]), [1, 2, 3, 3])
+        self.assertEqual(curve.xp_for_level(3), 20)
+        with self.assertRaises(ValueError):
+            curve.xp_for_level(4)
+        with self.assertRaises(ValueError):
+            LevelCurve([20, 10])
@@ -0,0 +1,96 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import contextlib
+import io
+import json
+import sys
+import types
+from unittest.mock import patch
+from sloth.tests.support import TempfileTestCase
+
+
+def stack_depth():
+    frame = sys._getframe(1)
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+class SessionTestCase(TempfileTestCase):
+    def setUp(self):
+        super(SessionTestCase, self).setUp()
+        from sloth.store import LogsStore
+        from sloth.store import SettingsStore
+        self.settings = SettingsStore(self.tempfile_path + '.settings')
+        self.settings._store = {
+            'Age': '1990-06-15', 'Agility': 5, 'Charisma': 5, 'Defense': 4,
+            'Endurance': 4, 'Goal': 1, 'Height': 70, 'Intelligence': 4,
+            'Name': 'Test', 'Sex': 'F', 'Strength': 4, 'Type': 'I',
+            'Weight': 150, 'XP': 0
+        }
+        self.logs = LogsStore(self.tempfile_path + '.log')
+        self.depths = []
+
+    def physical_main(self, choose_, settings):
+        self.depths.append(stack_depth())
+
+    def run_session(self, answers):
+        """
+        Run `main.session` on the answers, with stub workout modules,
+        until it runs out of answers.
+        """
+        import sloth
+        from sloth import main
+        from sloth import userinput
+        from sloth.profile import Profile
+        with self.open_tempfile('w') as fp:
+            for answer in answers:
+                fp.write(json.dumps({"Prompt": "", "Input": answer}) + '\n')
+        workouts = types.ModuleType('sloth.workouts')
+        workouts.workouts = dict.fromkeys(
+            ['Cardio', 'Log', 'Pushups', 'Settings'])
+        physical = types.ModuleType('sloth.physical')
+        physical.main = self.physical_main
+        readline = types.ModuleType('readline')
+        readline.set_completer = readline.parse_and_bind = lambda arg: None
+        modules = {'sloth.workouts': workouts, 'sloth.physical': physical,
+                   'readline': readline}
+        source = userinput.ReplaySource(self.tempfile_path, strict=False)
+        profile = Profile(self.settings, main.level)
+        with patch.dict(sys.modules, modules), \
+                patch.object(sloth, 'physical', physical, create=True), \
+                patch.object(main, 'check_body',
+                             wraps=main.check_body) as check_body, \
+                userinput.use_input_source(source), \
+                contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(EOFError):
+                main.session(self.settings, self.logs, profile, True)
+        return check_body
+
+    def test_stack_depth_stays_flat(self):
+        self.run_session(['Pushups'] * 300)
+        self.assertEqual(len(self.depths), 300)
+        self.assertEqual(min(self.depths), max(self.depths))
+
+    def test_body_checked_only_after_settings(self):
+        check_body = self.run_session(
+            ['Pushups'] * 5 + ['Settings', 'n'] + ['Pushups'] * 5)
+        self.assertEqual(len(self.depths), 10)
+        self.assertEqual(check_body.call_count, 1)
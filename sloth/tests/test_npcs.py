@@ -0,0 +1,155 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import json
+import unittest
+from sloth.tests.support import TempfileTestCase
+
+
+def make_data():
+    return {
+        "Templates": {
+            "Animal": {
+                "Life": 20, "Attack": 2, "Defence": 1, "Agility": 4,
+                "Charisma": 0, "Intelligence": 1, "Strength": 2,
+                "Slots": [], "Equipment": {}, "Drops": ["Hide"],
+                "Currency": 0, "XP": 3
+            },
+            "Guard": {
+                "Life": 60, "Attack": 8, "Defence": 8, "Agility": 5,
+                "Charisma": 3, "Intelligence": 5, "Strength": 7,
+                "Slots": ["rh", "lh"], "Equipment": {"rh": "Spear"},
+                "Drops": ["Spear"], "Currency": 15, "XP": 25
+            }
+        },
+        "Archetypes": {
+            "Cow": {"Template": "Animal", "Race": "Animals", "Life": 35},
+            "Goat": {"Template": "Animal", "Race": "Animals"},
+            "Goblin guard": {"Template": "Guard", "Race": "Goblins"}
+        }
+    }
+
+
+class ArchetypeRegistryTestCase(unittest.TestCase):
+    def test_templates(self):
+        from sloth.npcs import ArchetypeRegistry
+        registry = ArchetypeRegistry.from_data(make_data())
+        cow = registry.get("Cow")
+        self.assertEqual((cow.life, cow.attack, cow.drops), (35, 2, ("Hide",)))
+        self.assertEqual(registry.get("Goat").life, 20)
+        guard = registry.get("Goblin guard")
+        self.assertEqual(guard.slots, ("rh", "lh"))
+        self.assertEqual(guard.equipment, ("Spear", None))
+        self.assertEqual(list(registry), ["Cow", "Goat", "Goblin guard"])
+        self.assertEqual(registry.races(), {
+            "Animals": ["Cow", "Goat"], "Goblins": ["Goblin guard"]})
+
+    def test_unknown_archetype(self):
+        from sloth.npcs import ArchetypeRegistry
+        from sloth.npcs import UnknownArchetype
+        registry = ArchetypeRegistry.from_data(make_data())
+        self.assertNotIn("Dragon", registry)
+        with self.assertRaises(UnknownArchetype):
+            registry.spawn("Dragon")
+
+    def test_invalid_data(self):
+        from sloth.npcs import ArchetypeRegistry
+        data = make_data()
+        data["Archetypes"]["Cow"]["Template"] = "Cattle"
+        with self.assertRaises(ValueError):
+            ArchetypeRegistry.from_data(data)
+        data = make_data()
+        del data["Templates"]["Animal"]["XP"]
+        with self.assertRaises(ValueError):
+            ArchetypeRegistry.from_data(data)
+        data = make_data()
+        data["Archetypes"]["Goat"]["Equipment"] = {"horns": "Bell"}
+        with self.assertRaises(ValueError):
+            ArchetypeRegistry.from_data(data)
+        data = make_data()
+        data["Archetypes"]["Goat"]["Slots"] = ["horns"]
+        data["Archetypes"]["Goat"]["Equipment"] = {"horns": "Bell"}
+        with self.assertRaises(ValueError):
+            ArchetypeRegistry.from_data(data)
+
+    def test_bundled_archetypes(self):
+        from sloth.npcs import default_registry
+        registry = default_registry()
+        self.assertIs(registry, default_registry())
+        self.assertIn("Goblin general", registry)
+        self.assertEqual(registry.get("Elf general").intelligence, 65)
+        for race in ["Elves", "Humans", "Dwarves", "Goblins", "Skeletons",
+                     "Animals", "Monsters"]:
+            self.assertIn(race, registry.races())
+
+
+class LoadTestCase(TempfileTestCase):
+    def test_load(self):
+        from sloth.npcs import ArchetypeRegistry
+        with self.open_tempfile('w') as fp:
+            json.dump(make_data(), fp)
+        registry = ArchetypeRegistry.load(self.tempfile_path)
+        self.assertEqual(len(registry), 3)
+
+
+class NPCTestCase(unittest.TestCase):
+    def setUp(self):
+        from sloth.npcs import ArchetypeRegistry
+        self.registry = ArchetypeRegistry.from_data(make_data())
+
+    def test_no_instance_dict(self):
+        npc = self.registry.spawn("Cow")
+        self.assertFalse(hasattr(npc, '__dict__'))
+        with self.assertRaises(AttributeError):
+            npc.mood = 'calm'
+
+    def test_spawn_many_share_archetype(self):
+        cows = self.registry.spawn_many("Cow", 3)
+        self.assertEqual([cow.life for cow in cows], [35, 35, 35])
+        self.assertTrue(all(cow.archetype is cows[0].archetype
+                            for cow in cows))
+
+    def test_attack(self):
+        guard = self.registry.spawn("Goblin guard")
+        goat = self.registry.spawn("Goat")
+        self.assertTrue(guard.attack(goat))
+        self.assertEqual(goat.life, 10)
+        self.assertFalse(guard.attack(goat))
+        self.assertFalse(goat.living)
+        # A goat's attack doesn't beat a guard's defence
+        self.assertTrue(goat.attack(guard))
+        self.assertEqual(guard.life, 60)
+
+    def test_equip(self):
+        guard = self.registry.spawn("Goblin guard")
+        other = self.registry.spawn("Goblin guard")
+        guard.equip("lh", "Shield")
+        self.assertEqual(guard.equipment, ("Spear", "Shield"))
+        self.assertEqual(guard.equipped("lh"), "Shield")
+        self.assertEqual(other.equipment, ("Spear", None))
+        with self.assertRaises(ValueError):
+            guard.equip("head", "Helmet")
+
+
+class RPGElementsTestCase(unittest.TestCase):
+    def test_npcs(self):
+        from sloth.RPG_Elements import RPG_Elements_NPCs
+        self.assertEqual(sorted(RPG_Elements_NPCs), [
+            "Chicken", "Cow", "Goat", "Goblin", "Goblin general", "Horse",
+            "Pig", "Skeleton"])
+        self.assertEqual(sorted(RPG_Elements_NPCs["Goblin"]),
+                         ["Currency_Dropped", "Items_Dropped", "XP_Given"])
@@ -0,0 +1,87 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import datetime
+import json
+from sloth.tests.support import TempfileTestCase
+
+
+class ProfileTestCase(TempfileTestCase):
+    def setUp(self):
+        super(ProfileTestCase, self).setUp()
+        from sloth.store import SettingsStore
+        self.settings = SettingsStore(self.tempfile_path)
+        self.settings._store = {
+            'Age': '1990-06-15', 'Height': 70, 'Type': 'I', 'Weight': 180,
+            'XP': 300
+        }
+        self.today = datetime.date(2016, 6, 14)
+        self.level_calls = []
+
+    def level(self, xp):
+        self.level_calls.append(xp)
+        return xp // 100
+
+    def make_profile(self):
+        from sloth.profile import Profile
+        return Profile(self.settings, self.level, today=lambda: self.today)
+
+    def test_bmi(self):
+        profile = self.make_profile()
+        self.assertEqual(profile.bmi, 25.82)
+        self.settings.measuring_type = 'M'
+        self.settings.weight = 81.6
+        self.settings.height = 1.78
+        self.assertEqual(profile.bmi, 25.75)
+
+    def test_age_and_birthday(self):
+        profile = self.make_profile()
+        self.assertEqual(profile.age, 25)
+        self.assertFalse(profile.is_birthday)
+        self.today = datetime.date(2016, 6, 15)
+        self.assertEqual(profile.age, 26)
+        self.assertTrue(profile.is_birthday)
+        self.settings.age = '1990-06-16'
+        self.assertEqual(profile.age, 25)
+        self.assertFalse(profile.is_birthday)
+
+    def test_impossible_birthday_fails(self):
+        self.settings.age = '1990-02-30'
+        with self.assertRaises(Exception):
+            self.make_profile().birthday
+
+    def test_level_cached_until_xp_set(self):
+        profile = self.make_profile()
+        self.assertEqual(profile.level, 3)
+        self.assertEqual(profile.level, 3)
+        self.settings.weight = 190
+        self.settings.xp = 300
+        self.assertEqual(profile.level, 3)
+        self.assertEqual(self.level_calls, [300])
+        self.settings.xp = 550
+        self.assertEqual(profile.level, 5)
+        self.assertEqual(self.level_calls, [300, 550])
+
+    def test_cache_dropped_on_load(self):
+        profile = self.make_profile()
+        self.assertEqual(profile.level, 3)
+        stored = dict.fromkeys(self.settings.expected_keys, 0)
+        stored.update(self.settings._store, XP=900)
+        with self.open_tempfile('w') as fp:
+            json.dump(stored, fp)
+        self.settings.load()
+        self.assertEqual(profile.level, 9)
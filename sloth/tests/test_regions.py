@@ -0,0 +1,130 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class RegionsTestCase(unittest.TestCase):
+    use_numpy = False
+
+    def make_store(self, goblins=30, animals=30):
+        from sloth.entities import EntityStore
+        from sloth.npcs import ArchetypeRegistry
+        from sloth.tests.test_npcs import make_data
+        store = EntityStore(ArchetypeRegistry.from_data(make_data()),
+                            use_numpy=self.use_numpy)
+        store.spawn_many("Goblin guard", goblins)
+        store.spawn_many("Goat", animals // 2)
+        store.spawn_many("Cow", animals - animals // 2)
+        return store
+
+    def run_world(self, seed=1, ticks=60, **kw):
+        from sloth.regions import ShardedWorld
+        from sloth.regions import regions_by_race
+        store = self.make_store()
+        with ShardedWorld(store, regions_by_race(store), seed=seed,
+                          **kw) as world:
+            deaths = world.run(ticks)
+            digest = world.checksum()
+        self.assertEqual(world.checksum(), digest)
+        return store, deaths, digest
+
+    def test_regions_by_race(self):
+        from sloth.regions import regions_by_race
+        store = self.make_store(goblins=2, animals=3)
+        self.assertEqual(regions_by_race(store),
+                         [('Animals', [2, 3, 4]), ('Goblins', [0, 1])])
+
+    def test_raids(self):
+        from sloth.regions import RegionWorld
+        store = self.make_store(goblins=1, animals=2)
+        world = RegionWorld(store, [0], 1, [5, 6], raid_chance=1)
+        world.run(14)
+        self.assertEqual(world.raids.tolist(), [0, 5, 0, 6])
+        self.assertEqual(len(world.store.living()), 3)
+
+    def test_no_raids(self):
+        store, deaths, digest = self.run_world(raid_chance=0)
+        # Goblins and animals only fight among themselves.
+        self.assertGreater(deaths, 0)
+        self.assertEqual(len(store.living()), 60 - deaths)
+
+    def test_seeded_runs_repeat(self):
+        first = self.run_world(seed=7)
+        self.assertEqual(first[2], self.run_world(seed=7)[2])
+        self.assertNotEqual(first[2], self.run_world(seed=8)[2])
+
+    def test_unseeded_runs_differ(self):
+        from sloth.regions import ShardedWorld
+        from sloth.regions import regions_by_race
+        worlds = []
+        for each in range(2):
+            store = self.make_store()
+            world = ShardedWorld(store, regions_by_race(store))
+            world.run(60)
+            worlds.append(world)
+        self.assertNotEqual(worlds[0].checksum(), worlds[1].checksum())
+        store, deaths, digest = self.run_world(seed=worlds[0].seed)
+        self.assertEqual(digest, worlds[0].checksum())
+
+    def test_processes_match(self):
+        store, deaths, digest = self.run_world(seed=3)
+        sharded = self.run_world(seed=3, processes=2)
+        self.assertEqual(sharded[1:], (deaths, digest))
+        for name in store.column_names:
+            self.assertEqual(list(sharded[0].columns[name]),
+                             list(store.columns[name]))
+
+    def test_exchange_every(self):
+        single = self.run_world(seed=3, exchange_every=4, ticks=30)
+        sharded = self.run_world(seed=3, exchange_every=4, ticks=30,
+                                 processes=2)
+        self.assertEqual(single[1:], sharded[1:])
+        with self.assertRaises(ValueError):
+            self.run_world(exchange_every=0)
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class NumpyRegionsTestCase(RegionsTestCase):
+    use_numpy = True
+
+    def test_same_world_as_arrays(self):
+        arrays = RegionsTestCase('run_world').run_world(seed=3, processes=2)
+        self.assertEqual(self.run_world(seed=3)[1:], arrays[1:])
+
+    def test_large_population_processes_match(self):
+        # Enough entities that the workers' combat rounds write to the
+        # shared columns at the same time.
+        from sloth.entities import EntityStore
+        from sloth.regions import ShardedWorld
+        digests = []
+        for processes in (0, 4):
+            store = EntityStore(use_numpy=True)
+            regions = [(name, list(store.spawn_many(name, 5000)))
+                       for name in ("Goblin", "Elf guard", "Dwarf", "Cow")]
+            store.spawn_many("Goat", 100000)
+            store.columns['life'][:] = 10 ** 6
+            with ShardedWorld(store, regions, seed=2, processes=processes,
+                              exchange_every=100) as world:
+                world.run(100)
+                digests.append(world.checksum())
+        self.assertEqual(digests[0], digests[1])
@@ -80,6 +80,156 @@ class SettingsStoreTestCase(TempfileTestCase, StorageInterfaceTestMixin):
             settings, missing=[], extra=['UnexpectedKey'])
 
 
+class SettingsStoreCommitTestCase(TempfileTestCase):
+    def make_settings(self):
+        from sloth.store import SettingsStore
+        settings = SettingsStore(self.tempfile_path)
+        settings._store = dict.fromkeys(settings.expected_keys, 0)
+        return settings
+
+    def test_commit_writes_settings(self):
+        settings = self.make_settings()
+        settings.xp = 10
+        settings.commit()
+        with self.open_tempfile('r') as fp:
+            self.assertEqual(json.load(fp)['XP'], 10)
+        self.assertFalse(os.path.exists(self.tempfile_path + '.tmp'))
+
+    def test_unchanged_commit_skipped(self):
+        from unittest.mock import patch
+        settings = self.make_settings()
+        settings.commit()
+        with patch('sloth.store.os.replace') as replace:
+            settings.commit()
+            settings.xp = 0
+            settings.commit()
+        self.assertEqual(replace.call_count, 0)
+
+    def test_load_then_commit_skipped(self):
+        from unittest.mock import patch
+        self.make_settings().commit()
+        settings = self.make_settings()
+        settings.load()
+        with patch('sloth.store.os.replace') as replace:
+            settings.commit()
+        self.assertEqual(replace.call_count, 0)
+
+    def test_deferred_commits_coalesced(self):
+        from unittest.mock import patch
+        settings = self.make_settings()
+        with patch('sloth.store.os.replace') as replace:
+            with settings.deferred():
+                for xp in range(5):
+                    settings.xp = xp
+                    settings.commit()
+                with settings.deferred():
+                    settings.commit()
+                self.assertEqual(replace.call_count, 0)
+        self.assertEqual(replace.call_count, 1)
+
+    def test_deferred_error_rolls_back(self):
+        from unittest.mock import patch
+        settings = self.make_settings()
+        settings.xp = 5
+        settings.commit()
+        settings.weight = 150
+        version = settings.version('XP')
+        with patch('sloth.store.os.replace') as replace:
+            with self.assertRaises(RuntimeError):
+                with settings.deferred():
+                    settings.xp = 10
+                    settings.commit()
+                    with settings.deferred():
+                        settings.height = 70
+                        settings.commit()
+                    raise RuntimeError
+        self.assertEqual(replace.call_count, 0)
+        self.assertEqual((settings.xp, settings.weight, settings.height),
+                         (5, 150, 0))
+        self.assertEqual(settings.dirty_keys, {'Weight'})
+        self.assertNotEqual(settings.version('XP'), version)
+        settings.commit()
+        with self.open_tempfile('r') as fp:
+            self.assertEqual(json.load(fp)['Weight'], 150)
+
+    def test_deferred_without_commit_writes_nothing(self):
+        settings = self.make_settings()
+        with settings.deferred():
+            settings.xp = 5
+        self.assertEqual(os.path.getsize(self.tempfile_path), 0)
+
+
+class SettingsStoreJournalTestCase(TempfileTestCase):
+    def make_settings(self):
+        from sloth.store import SettingsStore
+        settings = SettingsStore(self.tempfile_path,
+                                 self.tempfile_path + '.journal')
+        settings._store = dict.fromkeys(settings.expected_keys, 0)
+        settings.commit()
+        self.snapshot = list(settings.read_journal())
+        return settings
+
+    def test_journal_starts_with_snapshot(self):
+        from sloth.store import SettingsStore
+        settings = SettingsStore(self.tempfile_path)
+        settings._store = dict.fromkeys(settings.expected_keys, 0)
+        settings.commit()
+        settings = SettingsStore(self.tempfile_path,
+                                 self.tempfile_path + '.journal')
+        settings.load()
+        settings.xp = 10
+        settings.commit()
+        expected = dict.fromkeys(settings.expected_keys, 0)
+        expected['XP'] = 10
+        self.assertEqual(settings.replay_journal(), expected)
+        self.assertEqual(len(list(settings.read_journal())),
+                         len(expected))
+
+    def test_dirty_keys(self):
+        settings = self.make_settings()
+        self.assertEqual(settings.dirty_keys, frozenset())
+        settings.xp = 0
+        self.assertEqual(settings.dirty_keys, frozenset())
+        settings.xp = 10
+        settings.weight = 0.0
+        self.assertEqual(settings.dirty_keys, {'XP', 'Weight'})
+        settings.commit()
+        self.assertEqual(settings.dirty_keys, frozenset())
+
+    def test_journal_records_changes(self):
+        settings = self.make_settings()
+        settings.xp = 10
+        settings.xp = 20
+        settings.name = 'Alice'
+        settings.commit()
+        records = list(settings.read_journal())[len(self.snapshot):]
+        self.assertEqual(
+            [(each['Key'], each['Old'], each['New']) for each in records],
+            [('Name', 0, 'Alice'), ('XP', 0, 20)])
+
+    def test_reverted_change_not_journaled(self):
+        settings = self.make_settings()
+        settings.xp = 10
+        settings.xp = 0
+        settings.commit()
+        self.assertEqual(list(settings.read_journal()), self.snapshot)
+        self.assertEqual(settings.dirty_keys, frozenset())
+
+    def test_replay_journal(self):
+        from unittest.mock import patch
+        with patch('sloth.store.time.time', return_value=0):
+            settings = self.make_settings()
+        for utc, xp in enumerate([10, 20, 30], 1):
+            settings.xp = xp
+            with patch('sloth.store.time.time', return_value=utc):
+                settings.commit()
+        self.assertEqual(settings.replay_journal(until=0)['XP'], 0)
+        self.assertEqual(settings.replay_journal(until=2)['XP'], 20)
+        expected = dict.fromkeys(settings.expected_keys, 0)
+        expected['XP'] = 30
+        self.assertEqual(settings.replay_journal(), expected)
+
+
 class LogEntryTestCase(unittest.TestCase, StorageInterfaceTestMixin):
     def make_entry(self):
         from sloth.store import LogEntry
@@ -117,6 +267,48 @@ class LogEntryTestCase(unittest.TestCase, StorageInterfaceTestMixin):
             entry, missing=[], extra=['UnexpectedKey'])
 
 
+class LogRecordTestCase(LogEntryTestCase):
+    def make_entry(self):
+        from sloth.store import LogRecord
+        return LogRecord()
+
+    def make_record(self, store):
+        from sloth.store import LogRecord
+        return LogRecord(store)
+
+    def test__verify_keys_passes(self):
+        from sloth.store import LogRecord
+        entry = self.make_record(dict.fromkeys(LogRecord.expected_keys))
+        self.assertVerifyKeysPasses(entry)
+
+    def test__verify_keys_fails_missing(self):
+        from sloth.store import LogRecord
+        store = dict.fromkeys(LogRecord.expected_keys)
+        store.pop('UTC')
+        self.assertVerifyKeysRaisesMissingAndExtra(
+            self.make_record(store), missing=['UTC'], extra=[])
+
+    def test__verify_keys_fails_extra(self):
+        from sloth.store import LogRecord
+        store = dict.fromkeys(LogRecord.expected_keys)
+        store['UnexpectedKey'] = 'Unexpected'
+        self.assertVerifyKeysRaisesMissingAndExtra(
+            self.make_record(store), missing=[], extra=['UnexpectedKey'])
+
+    def test_attributes_match_store(self):
+        from sloth.store import LogRecord
+        store = {key: key for key in LogRecord.expected_keys}
+        record = self.make_record(store)
+        self.assertEqual(record.exercise, 'Exercise')
+        self.assertEqual(record.utc, 'UTC')
+        record.points = 5
+        store['Points'] = 5
+        self.assertEqual(record._store, store)
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(self.make_entry(), '__dict__'))
+
+
 class LogsStoreTestCase(TempfileTestCase):
     def make_store(self):
         from sloth.store import LogsStore
@@ -180,3 +372,356 @@ class LogsStoreTestCase(TempfileTestCase):
             # Create the file again so tearDown doesn't break
             with open(self.tempfile_path, 'w'):
                 pass
+
+
+class LogIndexTestCase(TempfileTestCase):
+    def make_store(self):
+        from sloth.store import LogsStore
+        return LogsStore(self.tempfile_path)
+
+    def make_entry(self, exercise='Run', points=10, total=0):
+        from sloth.store import LogEntry
+        entry = LogEntry(dict.fromkeys(LogEntry.expected_keys, 0))
+        entry.exercise = exercise
+        entry.measuring = 'M'
+        entry.points = points
+        entry.total = total
+        return entry
+
+    def test_ledger_returns_none_with_empty_file(self):
+        store = self.make_store()
+        self.assertIsNone(store.ledger())
+
+    def test_ledger_sums_points_and_losses(self):
+        store = self.make_store()
+        store.append_entry(self.make_entry(points=100))
+        store.append_entry(self.make_entry(points=50))
+        entry = self.make_entry('DETERIORATE', points=0, total=30)
+        entry.utc = 1456790400
+        store.append_entry(entry)
+        ledger = store.ledger()
+        self.assertEqual(ledger, (150, 30, 3, 1456790400))
+        self.assertEqual(ledger.xp, 120)
+        self.assertEqual(store.load_last_entry().total, 30)
+
+    def test_verify_ledger_matches_ledger(self):
+        store = self.make_store()
+        store.append_entry(self.make_entry(points=100))
+        store.append_entry(self.make_entry('DETERIORATE', points=0, total=20))
+        self.assertEqual(store.verify_ledger(), store.ledger())
+
+    def test_appends_keep_index_up_to_date(self):
+        from sloth.store import LogIndex
+        store = self.make_store()
+        for points in range(5):
+            store.append_entry(self.make_entry(points=points))
+        trailer = LogIndex(self.tempfile_path).read_trailer()
+        self.assertEqual(trailer.count, 5)
+        self.assertEqual(trailer.points, 10)
+        # The index doesn't grow with the log.
+        self.assertEqual(os.path.getsize(self.tempfile_path + '.idx'),
+                         LogIndex.trailer_format.size)
+
+    def test_index_rebuilt_when_log_edited_outside(self):
+        store = self.make_store()
+        store.append_entry(self.make_entry(points=100))
+        store.append_entry(self.make_entry(points=50))
+        with self.open_tempfile('r') as fp:
+            first_line = next(fp)
+        with self.open_tempfile('w') as fp:
+            fp.write(first_line)
+        self.assertEqual(store.ledger().xp, 100)
+        self.assertEqual(store.load_last_entry().points, 100)
+
+    def test_blank_lines_not_counted(self):
+        from unittest.mock import patch
+        store = self.make_store()
+        for points in (100, 50, 25):
+            store.append_entry(self.make_entry(points=points))
+        with self.open_tempfile('a') as fp:
+            fp.write('\n')
+        with patch.object(store, 'verify_ledger') as verify_ledger:
+            self.assertEqual(store.ledger(), (175, 0, 3, 0))
+        self.assertEqual(verify_ledger.call_count, 0)
+
+    def test_ledger_with_undecodable_line_raises(self):
+        store = self.make_store()
+        with self.open_tempfile('w') as fp:
+            fp.write('First line\n')
+        store.append_entry(self.make_entry())
+        self.assertEqual(store.load_last_entry().points, 10)
+        with self.assertRaises(ValueError):
+            store.ledger()
+
+
+class LoadLastEntryTailTestCase(TempfileTestCase):
+    def make_store(self, block_size=16):
+        from sloth.store import LogsStore
+        store = LogsStore(self.tempfile_path)
+        # Small blocks make lines straddle block boundaries.
+        store.tail_block_size = block_size
+        return store
+
+    def write_lines(self, *lines):
+        with self.open_tempfile('w') as fp:
+            fp.write(''.join(lines))
+
+    def test_trailing_blank_lines_skipped(self):
+        self.write_lines('{"Points": 1}\n', '{"Points": 2}\n', '\n', '\n')
+        entry = self.make_store().load_last_entry()
+        self.assertEqual(entry._store, {'Points': 2})
+
+    def test_unterminated_complete_line_loaded(self):
+        self.write_lines('{"Points": 1}\n', '{"Points": 2}')
+        entry = self.make_store().load_last_entry()
+        self.assertEqual(entry._store, {'Points': 2})
+
+    def test_partially_written_line_skipped(self):
+        self.write_lines('{"Points": 1}\n', '{"Points": 2}\n', '{"Poi')
+        entry = self.make_store().load_last_entry()
+        self.assertEqual(entry._store, {'Points': 2})
+
+    def test_only_blank_lines_returns_none(self):
+        self.write_lines('\n', '\n')
+        self.assertIsNone(self.make_store().load_last_entry())
+
+    def test_line_longer_than_block(self):
+        struct = {'Exercise': 'x' * 100, 'Points': 3}
+        self.write_lines('{"Points": 1}\n', json.dumps(struct) + '\n')
+        entry = self.make_store().load_last_entry()
+        self.assertEqual(entry._store, struct)
+
+
+class LogsStoreScanTestCase(TempfileTestCase):
+    def make_store(self):
+        from sloth.store import LogsStore
+        return LogsStore(self.tempfile_path)
+
+    def write_entries(self, *entries):
+        with self.open_tempfile('w') as fp:
+            for exercise, measuring, utc in entries:
+                struct = {
+                    'Average': 0, 'Distance': 0, 'Exercise': exercise,
+                    'Measuring': measuring, 'Points': 1, 'Total': 0,
+                    'UTC': utc
+                }
+                fp.write(json.dumps(struct, sort_keys=True) + '\n')
+
+    def test_scan_empty_file(self):
+        self.assertEqual(list(self.make_store().scan()), [])
+
+    def test_scan_yields_entries(self):
+        self.write_entries(('Run', 'M', 10), ('Swim', 'I', 20))
+        entries = list(self.make_store().scan())
+        self.assertEqual([each.exercise for each in entries], ['Run', 'Swim'])
+
+    def test_scan_compact(self):
+        from sloth.store import LogRecord
+        self.write_entries(('Run', 'M', 10), ('Swim', 'I', 20))
+        store = self.make_store()
+        records = list(store.scan(compact=True))
+        self.assertIsInstance(records[0], LogRecord)
+        self.assertEqual([each._store for each in records],
+                         [each._store for each in store.scan()])
+
+    def test_scan_selected_fields(self):
+        self.write_entries(('Run', 'M', 10), ('Swim', 'I', 20))
+        result = list(self.make_store().scan(fields=('Exercise', 'UTC')))
+        self.assertEqual(result, [('Run', 10), ('Swim', 20)])
+
+    def test_scan_filters(self):
+        self.write_entries(('Run', 'M', 10), ('Swim', 'I', 20),
+                           ('Run', 'I', 30), ('Run', 'M', 40))
+        store = self.make_store()
+        fields = ('UTC',)
+        self.assertEqual(
+            list(store.scan(fields, exercise='Run')), [(10,), (30,), (40,)])
+        self.assertEqual(
+            list(store.scan(fields, exercise=['Swim'], measuring='I')),
+            [(20,)])
+        self.assertEqual(
+            list(store.scan(fields, since=20, until=40)), [(20,), (30,)])
+
+    def test_scan_filters_escaped_values(self):
+        self.write_entries(('Café', 'M', 10), ('Run', 'M', 20))
+        result = list(self.make_store().scan(('UTC',), exercise='Café'))
+        self.assertEqual(result, [(10,)])
+
+    def test_scan_rejects_before_decoding(self):
+        self.write_entries(('Run', 'M', 10))
+        with self.open_tempfile('a') as fp:
+            fp.write('{"Exercise": "Swim", not json\n')
+        result = list(self.make_store().scan(('UTC',), exercise='Run'))
+        self.assertEqual(result, [(10,)])
+        with self.assertRaises(ValueError):
+            list(self.make_store().scan())
+
+
+class BinaryLogsStoreTestCase(TempfileTestCase):
+    def make_store(self):
+        from sloth.store import make_logs_store
+        return make_logs_store(self.tempfile_path, 'binary')
+
+    def make_jsonl_store(self, suffix):
+        from sloth.store import LogsStore
+        return LogsStore(self.tempfile_path + suffix)
+
+    def make_entry(self, **values):
+        from sloth.store import LogEntry
+        struct = {
+            'Average': 0, 'Distance': 1.5, 'Exercise': 'Run',
+            'Measuring': 'M', 'Points': 10, 'Total': 0, 'UTC': 1451606400
+        }
+        struct.update(values)
+        return LogEntry(struct)
+
+    def test_unknown_format_fails(self):
+        from sloth.store import make_logs_store
+        with self.assertRaises(ValueError):
+            make_logs_store(self.tempfile_path, 'xml')
+
+    def test_load_last_entry(self):
+        store = self.make_store()
+        self.assertIsNone(store.load_last_entry())
+        store.append_entry(self.make_entry(Points=1))
+        store.append_entry(self.make_entry(Points=2, Exercise='Swim'))
+        entry = store.load_last_entry()
+        self.assertEqual(entry._store, self.make_entry(
+            Points=2, Exercise='Swim')._store)
+        self.assertIs(type(entry.points), int)
+        self.assertIs(type(entry.distance), float)
+
+    def test_partially_written_record_ignored(self):
+        store = self.make_store()
+        store.append_entry(self.make_entry(Points=1))
+        with open(self.tempfile_path, 'ab') as fp:
+            fp.write(b'\x00' * 10)
+        self.assertEqual(store.load_last_entry().points, 1)
+        store.append_entry(self.make_entry(Points=2))
+        self.assertEqual(list(store.scan(('Points',))), [(1,), (2,)])
+
+    def test_non_number_fails(self):
+        store = self.make_store()
+        with self.assertRaises(ValueError):
+            store.append_entry(self.make_entry(Points='ten'))
+        self.assertIsNone(store.load_last_entry())
+
+    def test_scan_filters_and_ledger(self):
+        store = self.make_store()
+        store.append_entry(self.make_entry(UTC=10))
+        store.append_entry(self.make_entry(UTC=20, Measuring='I'))
+        store.append_entry(self.make_entry(
+            UTC=30, Exercise='DETERIORATE', Points=0, Total=5))
+        self.assertEqual(
+            list(store.scan(('UTC',), exercise='Run', since=15)), [(20,)])
+        self.assertEqual(list(store.scan(('UTC',), measuring='I')), [(20,)])
+        self.assertEqual(list(store.scan(('UTC',), exercise='Swim')), [])
+        self.assertEqual(store.ledger(), (20, 5, 3, 30))
+
+    def test_stores_sharing_a_log(self):
+        first = self.make_store()
+        second = self.make_store()
+        first.append_entry(self.make_entry(Exercise='Swim'))
+        self.assertEqual(second.load_last_entry().exercise, 'Swim')
+        # Each store learns the names the other one added before
+        # giving codes to new ones.
+        second.append_entry(self.make_entry(Exercise='Bike'))
+        first.append_entry(self.make_entry(Exercise='Row'))
+        expected = ['Swim', 'Bike', 'Row']
+        for store in (first, second, self.make_store()):
+            self.assertEqual(
+                [each for each, in store.scan(fields=('Exercise',))],
+                expected)
+            self.assertEqual(
+                len(list(store.scan(exercise='Row', measuring='M'))), 1)
+
+    def test_jsonl_round_trip_is_lossless(self):
+        source = self.make_jsonl_store('.source')
+        source.append_entry(self.make_entry())
+        source.append_entry(self.make_entry(
+            Exercise='Café', Average=None, Points=2.0, UTC=1451606400.25))
+        store = self.make_store()
+        store.import_jsonl(source)
+        destination = self.make_jsonl_store('.destination')
+        store.export_jsonl(destination)
+        with open(source._file_path, 'rb') as fp:
+            expected = fp.read()
+        with open(destination._file_path, 'rb') as fp:
+            self.assertEqual(fp.read(), expected)
+
+
+class AppendManyTestCase(TempfileTestCase):
+    def make_entries(self, count):
+        from sloth.store import LogEntry
+        return [LogEntry({
+            'Average': 0, 'Distance': 0, 'Exercise': 'DETERIORATE',
+            'Measuring': 'M', 'Points': 0, 'Total': number, 'UTC': number
+        }) for number in range(count)]
+
+    def test_append_many(self):
+        from sloth.store import make_logs_store
+        for log_format in ('jsonl', 'binary'):
+            store = make_logs_store(
+                self.tempfile_path + '.' + log_format, log_format)
+            store.append_many(self.make_entries(3))
+            self.assertEqual(list(store.scan(('Total',))), [(0,), (1,), (2,)])
+            self.assertEqual(store.ledger(), (0, 3, 3, 2))
+
+    def test_append_many_verifies_every_entry_first(self):
+        from sloth.store import ImproperlyPopulated
+        from sloth.store import LogsStore
+        entries = self.make_entries(2)
+        entries[1]._store.pop('UTC')
+        store = LogsStore(self.tempfile_path)
+        with self.assertRaises(ImproperlyPopulated):
+            store.append_many(entries)
+        self.assertIsNone(store.load_last_entry())
+
+
+class LogTransactionTestCase(TempfileTestCase):
+    def make_entry(self, points):
+        from sloth.store import LogEntry
+        return LogEntry({
+            'Average': 0, 'Distance': 0, 'Exercise': 'Run',
+            'Measuring': 'M', 'Points': points, 'Total': 0, 'UTC': 0
+        })
+
+    def make_store(self):
+        from sloth.store import LogsStore
+        store = LogsStore(self.tempfile_path)
+        store.append_entry(self.make_entry(1))
+        return store
+
+    def test_transaction_appends_on_exit(self):
+        store = self.make_store()
+        with store.transaction() as transaction:
+            transaction.append_entry(self.make_entry(2))
+            transaction.append_entry(self.make_entry(3))
+            self.assertEqual(store.ledger().count, 1)
+        self.assertEqual(store.ledger(), (6, 0, 3, 0))
+
+    def test_transaction_discarded_on_error(self):
+        store = self.make_store()
+        with self.assertRaises(RuntimeError):
+            with store.transaction() as transaction:
+                transaction.append_entry(self.make_entry(2))
+                raise RuntimeError
+        self.assertEqual(store.ledger(), (1, 0, 1, 0))
+
+    def test_failed_write_rolled_back(self):
+        from unittest.mock import patch
+        store = self.make_store()
+        size = os.path.getsize(self.tempfile_path)
+        with patch('sloth.store.LogIndex.record_append',
+                   side_effect=OSError):
+            with self.assertRaises(OSError):
+                store.append_many([self.make_entry(2), self.make_entry(3)])
+        self.assertEqual(os.path.getsize(self.tempfile_path), size)
+        self.assertEqual(store.ledger(), (1, 0, 1, 0))
+
+    def test_fsync(self):
+        from unittest.mock import patch
+        store = self.make_store()
+        with patch('sloth.store.os.fsync') as fsync:
+            store.append_many([self.make_entry(2)], fsync=True)
+        self.assertEqual(fsync.call_count, 1)
@@ -17,6 +17,7 @@
 #
 import unittest
 from unittest.mock import patch
+from sloth.tests.support import TempfileTestCase
 
 
 class BaseConverterTestCase(unittest.TestCase):
@@ -96,6 +97,161 @@ class PrompterTestCase(BaseConverterTestCase):
         self.assertEqual(prompter.prompt_text, 'Test: ')
 
 
+class InputSourceTestCase(TempfileTestCase):
+    def prompt_name(self):
+        from sloth.userinput import first_name_prompter
+        printed = []
+        name = first_name_prompter.prompt(_print=printed.append)
+        return name, printed
+
+    def test_iterator_source(self):
+        from sloth.userinput import IteratorSource
+        from sloth.userinput import use_input_source
+        with use_input_source(IteratorSource(['', 'scott'])):
+            name, printed = self.prompt_name()
+            self.assertEqual(name, 'Scott')
+            self.assertEqual(printed, ['How were you expecting that to work?'])
+            with self.assertRaises(EOFError):
+                self.prompt_name()
+
+    def test_source_is_restored(self):
+        from sloth import userinput
+        with self.assertRaises(EOFError):
+            with userinput.use_input_source(userinput.IteratorSource([])):
+                self.prompt_name()
+        self.assertIs(userinput.input_source, userinput.console_input)
+
+    @patch('builtins.input', return_value='scott')
+    def test_console_input(self, input):
+        self.assertEqual(self.prompt_name(), ('Scott', []))
+        input.assert_called_once_with(
+            'Enter your first name (20 character limit): ')
+
+    def test_file_source(self):
+        from sloth.userinput import FileSource
+        from sloth.userinput import use_input_source
+        with self.open_tempfile('w') as fp:
+            fp.write('scott\n')
+        with use_input_source(FileSource(self.tempfile_path)):
+            self.assertEqual(self.prompt_name(), ('Scott', []))
+
+    def test_record_and_replay(self):
+        from sloth.userinput import IteratorSource
+        from sloth.userinput import RecordingSource
+        from sloth.userinput import ReplaySource
+        from sloth.userinput import use_input_source
+        recorder = RecordingSource(self.tempfile_path,
+                                   IteratorSource(['', 'scott']))
+        with use_input_source(recorder):
+            recorded = self.prompt_name()
+        recorder.close()
+        with use_input_source(ReplaySource(self.tempfile_path)):
+            self.assertEqual(self.prompt_name(), recorded)
+            with self.assertRaises(EOFError):
+                self.prompt_name()
+
+    def test_replay_mismatch(self):
+        from sloth.userinput import ReplayMismatch
+        from sloth.userinput import ReplaySource
+        from sloth.userinput import use_input_source
+        with self.open_tempfile('w') as fp:
+            fp.write('{"Input": "m", "Prompt": "Enter your sex (M/F): "}\n')
+        with use_input_source(ReplaySource(self.tempfile_path)):
+            with self.assertRaises(ReplayMismatch) as raised:
+                self.prompt_name()
+        self.assertEqual(raised.exception.number, 1)
+        with use_input_source(ReplaySource(self.tempfile_path, strict=False)):
+            self.assertEqual(self.prompt_name(), ('M', []))
+
+
+class FieldTestCase(BaseConverterTestCase):
+    def get_converter(self):
+        from sloth.userinput import Field
+        return Field(int, 'whole', above=(0, 'low'), at_most=(10, 'high'))
+
+    def test_bounds(self):
+        self.assertConversionResultEquals(' 10 ', 10)
+        self.assertConversionResultEquals('1', 1)
+        self.assertConversionFails('0')
+        self.assertConversionFails('11')
+
+    def test_messages(self):
+        from sloth.userinput import ConversionFailed
+        converter = self.get_converter()
+        for raw_value, message in [('x', 'whole'), ('0', 'low'),
+                                   ('11', 'high')]:
+            with self.assertRaises(ConversionFailed) as raised:
+                converter(raw_value)
+            self.assertEqual(raised.exception.failure_message, message)
+
+    def test_nan_fails(self):
+        from sloth.userinput import ConversionFailed
+        from sloth.userinput import Field
+        field = Field(float, 'number', below=(10.0, 'high'))
+        with self.assertRaises(ConversionFailed):
+            field('nan')
+
+    def test_pattern(self):
+        from sloth.userinput import Field
+        from sloth.userinput import clock_seconds
+        from sloth.userinput import ConversionFailed
+        field = Field(clock_seconds, 'clock',
+                      pattern=r'(?:(\d+):)?(\d+):(\d+)')
+        self.assertEqual(field(' 1:02:03 '), 3723)
+        self.assertEqual(field('02:03'), 123)
+        for raw_value in ['1:2:3:4', '-1:00', '1:2:x', '12']:
+            with self.assertRaises(ConversionFailed):
+                field(raw_value)
+
+    def test_validate_all(self):
+        values, errors = self.get_converter().validate_all(
+            ['1', 'x', '5', '0', '10'])
+        self.assertEqual(values, [1, 5, 10])
+        self.assertEqual(errors, [(1, 'whole'), (3, 'low')])
+
+
+class ParseDateTimeTestCase(unittest.TestCase):
+    def test_parse_date(self):
+        import datetime
+        from sloth.userinput import parse_date
+        self.assertEqual(parse_date('2016-01-31'), datetime.date(2016, 1, 31))
+        self.assertEqual(parse_date('2016-1-5'), datetime.date(2016, 1, 5))
+        for text in ['2016-02-30', '2016-13-01', '16-01-01', '2016/01/01',
+                     '2016-01-01x', '']:
+            with self.assertRaises(ValueError):
+                parse_date(text)
+
+    def test_parse_date_matches_strptime(self):
+        import datetime
+        from sloth.userinput import parse_date
+        for text in ['1999-12-31', '2016-02-29', '2015-02-29', '2016-00-10',
+                     '2016-10-00', '2016-9-9', '0001-01-01']:
+            try:
+                expected = datetime.datetime.strptime(text, '%Y-%m-%d').date()
+            except ValueError:
+                with self.assertRaises(ValueError):
+                    parse_date(text)
+            else:
+                self.assertEqual(parse_date(text), expected)
+
+    def test_parse_clock(self):
+        import datetime
+        from sloth.userinput import parse_clock
+        self.assertEqual(parse_clock('20:30'), datetime.time(20, 30))
+        self.assertEqual(parse_clock('7:05:09'), datetime.time(7, 5, 9))
+        for text in ['24:00', '12:60', '12:00:60', '12', '1:2:3:4', 'a:b']:
+            with self.assertRaises(ValueError):
+                parse_clock(text)
+
+    def test_cached_parsing(self):
+        from sloth import userinput
+        with userinput.cached_parsing():
+            for each in range(3):
+                userinput.cardio_date_converter('2016-01-31')
+            self.assertEqual(userinput.date_parser.cache_info().hits, 2)
+        self.assertIs(userinput.date_parser, userinput.parse_date)
+
+
 class IntegerConverterTestCase(BaseConverterTestCase):
     def get_converter(self):
         from sloth.userinput import integer_converter
@@ -291,6 +447,61 @@ class MetricWeightConverterTestCase(BaseConverterTestCase):
         self.assertConversionFails('a')
 
 
+class CardioDateConverterTestCase(BaseConverterTestCase):
+    def get_converter(self):
+        from sloth.userinput import cardio_date_converter
+        return cardio_date_converter
+
+    def test_valid_works(self):
+        import datetime
+        self.assertConversionResultEquals(' 2016-01-31 ',
+                                          datetime.date(2016, 1, 31))
+
+    def test_empty_is_today(self):
+        import datetime
+        self.assertConversionResultEquals('', datetime.date.today())
+
+    def test_invalid_fails(self):
+        self.assertConversionFails('2016-13-01')
+        self.assertConversionFails('01/31/2016')
+
+
+class CardioWhenConverterTestCase(BaseConverterTestCase):
+    def get_converter(self):
+        from sloth.userinput import cardio_when_converter
+        return cardio_when_converter
+
+    def test_valid_works(self):
+        import datetime
+        self.assertConversionResultEquals('07:30:15',
+                                          datetime.time(7, 30, 15))
+        self.assertConversionResultEquals('23:59:59',
+                                          datetime.time(23, 59, 59))
+
+    def test_hours_minutes_works(self):
+        import datetime
+        self.assertConversionResultEquals(' 7:30 ', datetime.time(7, 30))
+        self.assertConversionResultEquals('20:05', datetime.time(20, 5))
+
+    def test_cached_parsing(self):
+        import datetime
+        from sloth import userinput
+        with userinput.cached_parsing():
+            for each in range(3):
+                self.assertConversionResultEquals('07:30',
+                                                  datetime.time(7, 30))
+            self.assertEqual(userinput.clock_parser.cache_info().hits, 2)
+
+    def test_over_a_day_fails(self):
+        self.assertConversionFails('24:00:00')
+        self.assertConversionFails('23:60')
+
+    def test_invalid_fails(self):
+        self.assertConversionFails('7')
+        self.assertConversionFails('7:30:15:00')
+        self.assertConversionFails('seven')
+
+
 class CardioTimeConverterTestCase(BaseConverterTestCase):
     def get_converter(self):
         from sloth.userinput import cardio_time_converter
@@ -0,0 +1,109 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ActionIntervalTestCase(unittest.TestCase):
+    def test_action_interval(self):
+        from sloth.world import action_interval
+        self.assertEqual(action_interval(0), 12)
+        self.assertEqual(action_interval(5), 7)
+        self.assertEqual(action_interval(20), 1)
+
+
+class WorldTestCase(unittest.TestCase):
+    use_numpy = False
+
+    def make_world(self, seed=1, guards=20, goats=20):
+        from sloth.entities import EntityStore
+        from sloth.npcs import ArchetypeRegistry
+        from sloth.tests.test_npcs import make_data
+        from sloth.world import World
+        store = EntityStore(ArchetypeRegistry.from_data(make_data()),
+                            use_numpy=self.use_numpy)
+        store.spawn_many("Goblin guard", guards)
+        store.spawn_many("Goat", goats)
+        return World(store, seed=seed)
+
+    def test_agile_entities_act_more_often(self):
+        # Guards have agility 5 and act every 7 ticks; goats have 4.
+        world = self.make_world(guards=1, goats=1)
+        world.store[1].life = 10 ** 6
+        acted = []
+        world.run(70, on_tick=lambda result: acted.extend(result.actors))
+        self.assertEqual(acted.count(0), 10)
+        self.assertEqual(acted.count(1), 9)
+
+    def test_dead_stop_acting(self):
+        world = self.make_world(guards=1, goats=2)
+        world.store[1].life = 0
+        world.store[2].life = 10 ** 6
+        acted = []
+        world.run(30, on_tick=lambda result: acted.extend(result.actors))
+        self.assertNotIn(1, acted)
+        self.assertEqual(len(world), 2)
+
+    def test_lone_survivor(self):
+        world = self.make_world(guards=1, goats=1)
+        world.store[1].life = 0
+        result = world.step()
+        while not result.actors:
+            result = world.step()
+        self.assertEqual((result.actors, result.result), ([0], None))
+        self.assertEqual(world.store[0].life, 60)
+
+    def test_run_counts_deaths(self):
+        world = self.make_world()
+        deaths = world.run(300)
+        self.assertEqual(deaths, 40 - len(world.store.living()))
+        self.assertGreater(deaths, 0)
+
+    def test_seeded_runs_repeat(self):
+        first = self.make_world(seed=7)
+        second = self.make_world(seed=7)
+        other = self.make_world(seed=8)
+        for world in (first, second, other):
+            world.run(50)
+        self.assertEqual(first.checksum(), second.checksum())
+        self.assertNotEqual(first.checksum(), other.checksum())
+
+    def test_add(self):
+        world = self.make_world(guards=1, goats=1)
+        world.run(5)
+        ids = world.store.spawn_many("Goat", 2)
+        world.add(ids)
+        acted = set()
+        world.run(20, on_tick=lambda result: acted.update(result.actors))
+        self.assertTrue(acted.issuperset(ids))
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class NumpyWorldTestCase(WorldTestCase):
+    use_numpy = True
+
+    def test_same_world_as_arrays(self):
+        world = self.make_world(seed=3)
+        arrays = WorldTestCase('make_world').make_world(seed=3)
+        world.run(200)
+        arrays.run(200)
+        self.assertEqual(world.checksum(), arrays.checksum())
@@ -15,7 +15,12 @@
 # You should have received a copy of the Affero GNU General Public License
 # along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
 #
-import arrow
+import contextlib
+import datetime
+import functools
+import json
+import operator
+import re
 
 
 class ConversionFailed(Exception):
@@ -23,6 +28,118 @@ class ConversionFailed(Exception):
         self.failure_message = message
 
 
+class ReplayMismatch(Exception):
+    """
+    Raised when a replayed session asks a different question than the
+    recorded one did at the same point.
+    """
+    def __init__(self, number, expected, prompt_text):
+        message = 'Answer {0} was recorded for {1!r}, not {2!r}'.format(
+            number, expected, prompt_text)
+        super(ReplayMismatch, self).__init__(message)
+        self.number = number
+        self.expected = expected
+        self.prompt_text = prompt_text
+
+
+def console_input(prompt_text):
+    return input(prompt_text)
+
+
+# Where all the prompts read their answers from. An input source is a
+# callable that takes the prompt text and returns the answer, or raises
+# EOFError when there are no more answers.
+input_source = console_input
+
+
+def read_input(prompt_text):
+    return input_source(prompt_text)
+
+
+@contextlib.contextmanager
+def use_input_source(source):
+    """
+    Read the answers to every prompt from `source` within the block.
+    """
+    global input_source
+    previous = input_source
+    input_source = source
+    try:
+        yield source
+    finally:
+        input_source = previous
+
+
+class IteratorSource(object):
+    """
+    Answer prompts with the values of an iterable, in order.
+    """
+    def __init__(self, values):
+        self._values = iter(values)
+
+    def __call__(self, prompt_text):
+        try:
+            return next(self._values)
+        except StopIteration:
+            raise EOFError
+
+
+class FileSource(IteratorSource):
+    """
+    Answer prompts with the lines of a text file, one per prompt.
+    """
+    def __init__(self, file_path):
+        with open(file_path, encoding='utf-8') as infile:
+            lines = [line.rstrip('\n') for line in infile]
+        super(FileSource, self).__init__(lines)
+
+
+class ReplaySource(object):
+    """
+    Answer prompts from a session recorded by `RecordingSource`.
+
+    Unless `strict` is false, every prompt must be the one the answer
+    was recorded for, otherwise `ReplayMismatch` is raised, so a replay
+    that goes differently than the recorded session stops right there.
+    """
+    def __init__(self, file_path, strict=True):
+        with open(file_path, encoding='utf-8') as infile:
+            self._records = [json.loads(line) for line in infile
+                             if line.strip()]
+        self._position = 0
+        self.strict = strict
+
+    def __call__(self, prompt_text):
+        if self._position >= len(self._records):
+            raise EOFError
+        record = self._records[self._position]
+        self._position += 1
+        if self.strict and record["Prompt"] != prompt_text:
+            raise ReplayMismatch(self._position, record["Prompt"],
+                                 prompt_text)
+        return record["Input"]
+
+
+class RecordingSource(object):
+    """
+    Pass the answers of another input source through, writing each
+    prompt and answer to a replay file for `ReplaySource`.
+    """
+    def __init__(self, file_path, source=console_input):
+        self._outfile = open(file_path, 'w', encoding='utf-8')
+        self._source = source
+
+    def __call__(self, prompt_text):
+        answer = self._source(prompt_text)
+        record = {"Prompt": prompt_text, "Input": answer}
+        self._outfile.write(json.dumps(record, sort_keys=True) + '\n')
+        self._outfile.flush()
+        return answer
+
+    def close(self):
+        self._outfile.close()
+
+
 class Prompter(object):
     """
     A Prompter is an object with a `prompt` method that asks the user
@@ -47,7 +164,7 @@ class Prompter(object):
 
     def prompt(self, _print=print):
         while True:
-            raw_value = input(self.prompt_text)
+            raw_value = read_input(self.prompt_text)
             try:
                 value = self.convert(raw_value, **self.convert_kwargs)
             except ConversionFailed as e:
@@ -68,6 +185,143 @@ def prompter_from_converter(prompt_text):
     return decorator
 
 
+class Field(object):
+    """
+    Describe a value typed by the user once, and compile it into a
+    converter.
+
+    `parse` turns the text into a value, or raises `ValueError`, in
+    which case the conversion fails with the `invalid` message. With a
+    `pattern`, the whole text (leading and trailing whitespace aside)
+    must match the regular expression, and `parse` is called with its
+    groups instead. Each bound is a ``(limit, message)`` pair:
+    a value must be `above` or `at_least` the lower limit and `below` or
+    `at_most` the upper one, or the conversion fails with the bound's
+    message. A value that can't be compared, like NaN, fails too.
+
+    A field is itself a converter, so it can be given to a `Prompter`;
+    extra keyword arguments are ignored.
+    """
+    bound_checks = (
+        ('above', operator.gt), ('at_least', operator.ge),
+        ('below', operator.lt), ('at_most', operator.le),
+    )
+
+    def __init__(self, parse, invalid, pattern=None, above=None,
+                 at_least=None, below=None, at_most=None):
+        self.parse = parse
+        self.invalid = invalid
+        self.pattern = re.compile(pattern) if pattern is not None else None
+        bounds = dict(above=above, at_least=at_least, below=below,
+                      at_most=at_most)
+        self.checks = tuple(
+            (check, bounds[name][0], bounds[name][1])
+            for name, check in self.bound_checks
+            if bounds[name] is not None
+        )
+        self.convert = self.compile()
+
+    def compile(self):
+        """
+        Return a function converting one raw value, with everything
+        about the field looked up ahead of time.
+        """
+        parse = self.parse
+        invalid = self.invalid
+        checks = self.checks
+        match = self.pattern.fullmatch if self.pattern else None
+
+        def convert(raw_value):
+            try:
+                if match is None:
+                    value = parse(raw_value)
+                else:
+                    matched = match(raw_value.strip())
+                    if matched is None:
+                        raise ConversionFailed(invalid)
+                    value = parse(*matched.groups())
+            except ValueError:
+                raise ConversionFailed(invalid)
+            for check, limit, message in checks:
+                if not check(value, limit):
+                    raise ConversionFailed(message)
+            return value
+        return convert
+
+    def __call__(self, raw_value, **kwargs):
+        return self.convert(raw_value)
+
+    def validate_all(self, raw_values):
+        """
+        Convert every value of `raw_values`. Returns ``(values,
+        errors)``: the converted values, and ``(index, message)`` for
+        each raw value that failed, which is left out of `values`.
+        """
+        convert = self.convert
+        values = []
+        errors = []
+        for index, raw_value in enumerate(raw_values):
+            try:
+                values.append(convert(raw_value))
+            except ConversionFailed as e:
+                errors.append((index, e.failure_message))
+        return values, errors
+
+
+def clock_seconds(hours, minutes, seconds):
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+date_pattern = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+clock_pattern = re.compile(r'(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?')
+
+
+def parse_date(text):
+    """
+    Return the `datetime.date` of a YYYY-MM-DD string, or raise
+    `ValueError`. Accepts what ``strptime(text, '%Y-%m-%d')`` does,
+    without going through strptime.
+    """
+    matched = date_pattern.fullmatch(text)
+    if matched is None:
+        raise ValueError('Not a YYYY-MM-DD date: {0!r}'.format(text))
+    year, month, day = matched.groups()
+    return datetime.date(int(year), int(month), int(day))
+
+
+def parse_clock(text):
+    """
+    Return the `datetime.time` of an HH:MM or HH:MM:SS string, or raise
+    `ValueError`.
+    """
+    matched = clock_pattern.fullmatch(text)
+    if matched is None:
+        raise ValueError('Not an HH:MM[:SS] time: {0!r}'.format(text))
+    hours, minutes, seconds = matched.groups()
+    return datetime.time(int(hours), int(minutes), int(seconds or 0))
+
+
+# The parsers the converters use; see `cached_parsing`.
+date_parser = parse_date
+clock_parser = parse_clock
+
+
+@contextlib.contextmanager
+def cached_parsing(maxsize=4096):
+    """
+    Remember the results of parsing dates and times within the block,
+    for validating many values that repeat, like a file of workouts.
+    """
+    global date_parser, clock_parser
+    previous = date_parser, clock_parser
+    date_parser = functools.lru_cache(maxsize)(parse_date)
+    clock_parser = functools.lru_cache(maxsize)(parse_clock)
+    try:
+        yield
+    finally:
+        date_parser, clock_parser = previous
+
+
 def integer_converter(value):
     try:
         return int(value)
@@ -93,7 +347,7 @@ def first_name_prompter(raw_value):
 def age_prompter(raw_value):
     age = raw_value.strip()
     try:
-        arrow.Arrow.strptime(age, '%Y-%m-%d').date()
+        date_parser(age)
     except ValueError:
         raise ConversionFailed('Format is 1999-12-31')
     return age
@@ -107,18 +361,16 @@ def sex_prompter(raw_value):
     return sex.upper()
 
 
-@prompter_from_converter(
+goal_prompter = Prompter(
     'What is your fitness goal?\n'
     '1 for power lifting\n'
     '2 for strength\n'
     '3 for weight loss\n'
-    '4 for cardio'
+    '4 for cardio',
+    Field(int, 'Please enter a whole number',
+          at_least=(1, 'Options are: 1/2/3/4'),
+          at_most=(4, 'Options are: 1/2/3/4'))
 )
-def goal_prompter(raw_value):
-    goal = integer_converter(raw_value)
-    if goal not in [1, 2, 3, 4]:
-        raise ConversionFailed('Options are: 1/2/3/4')
-    return goal
 
 
 @prompter_from_converter('(I)mperial or (M)etric measurements?')
@@ -132,60 +384,34 @@ def measurement_system_prompter(raw_value):
         raise ConversionFailed('Choose (M)etric or (I)mperial')
 
 
-@prompter_from_converter('Enter weight in kilograms (float number)')
-def metric_body_weight_prompter(raw_value):
-    try:
-        weight = float(raw_value)
-        if weight <= 22.679:
-            raise ConversionFailed('Pretty sure that\'s not your real weight.')
-        elif weight >= 453.592:
-            raise ConversionFailed('I seriously doubt you\'re that big.')
-        else:
-            return weight
-    except ValueError:
-        raise ConversionFailed('You can only put in a float (1.0) number.')
-
-
-@prompter_from_converter('Enter height in meters (float number)')
-def metric_body_height_prompter(raw_value):
-    try:
-        height = float(raw_value)
-        if height <= 0.5:
-            raise ConversionFailed('Put in your real height, please.')
-        elif height >= 2.7:
-            raise ConversionFailed('Taller than the tallest person recorded?')
-        else:
-            return height
-    except ValueError:
-        raise ConversionFailed('You can only put in a float (1.0) number.')
+float_message = 'You can only put in a float (1.0) number.'
+whole_message = 'You can only use whole numbers.'
+too_light = 'Pretty sure that\'s not your real weight.'
+too_heavy = 'I seriously doubt you\'re that big.'
+too_short = 'Put in your real height, please.'
+too_tall = 'Taller than the tallest person recorded?'
 
+metric_body_weight_prompter = Prompter(
+    'Enter weight in kilograms (float number)',
+    Field(float, float_message,
+          above=(22.679, too_light), below=(453.592, too_heavy))
+)
 
-@prompter_from_converter('Enter weight in pounds (whole number)')
-def imperial_body_weight_prompter(raw_value):
-    try:
-        weight = int(raw_value)
-        if weight <= 50:
-            raise ConversionFailed('Pretty sure that\'s not your real weight.')
-        elif weight >= 1000:
-            raise ConversionFailed('I seriously doubt you\'re that big.')
-        else:
-            return weight
-    except ValueError:
-        raise ConversionFailed('You can only use whole numbers.')
+metric_body_height_prompter = Prompter(
+    'Enter height in meters (float number)',
+    Field(float, float_message,
+          above=(0.5, too_short), below=(2.7, too_tall))
+)
 
+imperial_body_weight_prompter = Prompter(
+    'Enter weight in pounds (whole number)',
+    Field(int, whole_message, above=(50, too_light), below=(1000, too_heavy))
+)
 
-@prompter_from_converter('Enter height in inches (whole number)')
-def imperial_body_height_prompter(raw_value):
-    try:
-        height = int(raw_value)
-        if height <= 20:
-            raise ConversionFailed('Put in your real height, please.')
-        elif height >= 108:
-            raise ConversionFailed('Taller than the tallest person recorded?')
-        else:
-            return height
-    except ValueError:
-        raise ConversionFailed('You can only use whole numbers.')
+imperial_body_height_prompter = Prompter(
+    'Enter height in inches (whole number)',
+    Field(int, whole_message, above=(20, too_short), below=(108, too_tall))
+)
 
 
 @prompter_from_converter(
@@ -215,62 +441,41 @@ def cardio_date_prompter(activity):
 
 
 def cardio_date_converter(raw_value, activity=None):
+    """
+    Return the `datetime.date` of a workout, today if none is given.
+    """
+    check_date = raw_value.strip()
+    if check_date == '':
+        return datetime.date.today()
     try:
-        initial_check_date = arrow.Arrow.strptime(raw_value.strip(),
-                                                  '%Y-%m-%d')
-        check_date_strftime = arrow.Arrow.strptime(initial_check_date,
-                                                   '%Y-%m-%d')
-        return check_date_strftime
+        return date_parser(check_date)
     except ValueError:
-        if raw_value.strip() == '':
-            return arrow.Arrow.strftime(arrow.now(), '%Y-%m-%d')
-        else:
-            raise ConversionFailed('Format is 1999-12-31')
+        raise ConversionFailed('Format is 1999-12-31')
 
 
 def cardio_when_prompter(activity):
     return Prompter(
-        'What time did you finish? (Format 20:30:15) (Enter for now)',
+        'What time did you finish? (Format 20:30/20:30:15) (Enter for now)',
         cardio_when_converter,
         activity=None
     )
 
 
 def cardio_when_converter(raw_value, activity=None):
-    time_input = raw_value.strip()
-    time_split = time_input.split(':')
+    """
+    Return the `datetime.time` a workout finished, as HH:MM or HH:MM:SS,
+    now if none is given.
+    """
+    check_when = raw_value.strip()
+    if check_when == '':
+        return datetime.datetime.now().time().replace(microsecond=0)
     try:
-        if len(time_split) == 3:
-            hours_ = int(time_split[0])
-            minutes_ = int(time_split[1])
-            seconds_ = int(time_split[2])
-            when_seconds = hours_ * 3600 + minutes_ * 60 + seconds_
-            if when_seconds <= 86399:
-                log_divmod = divmod(when_seconds, 60)
-                when_hours = round(log_divmod[0] / 60)
-                when_minutes = round(log_divmod[0] % 60)
-                when_seconds = round(log_divmod[1])
-                when_time = ('{0:02d}, {1:02d}, {2:02d}'.format(when_hours,
-                                                                when_minutes,
-                                                                when_seconds))
-                return when_time
-            else:
-                raise ConversionFailed('There\'s only 24 hours in a day')
-        elif time_input == '':
-            current_time = arrow.now().time()
-            when_hours = current_time.hour
-            when_minutes = current_time.minute
-            when_seconds = current_time.second
-            when_time = ('{0:02d} {1:02d} {2:02d}'.format(when_hours,
-                                                          when_minutes,
-                                                          when_seconds))
-            return when_time
-        else:
-            raise ValueError
+        return clock_parser(check_when)
     except ValueError:
-        raise ConversionFailed(
-            'Only digits and ":" can be used. (10:00:00)'
-        )
+        if clock_pattern.fullmatch(check_when) is None:
+            raise ConversionFailed(
+                'Only digits and ":" can be used. (10:00/10:00:00)')
+        raise ConversionFailed('There\'s only 24 hours in a day')
 
 
 def cardio_time_prompter(activity):
@@ -280,29 +485,12 @@ def cardio_time_prompter(activity):
     )
 
 
-def cardio_time_converter(raw_value, activity=None):
-    time_input = raw_value.strip()
-    time_split = time_input.split(':')
-    try:
-        if len(time_split) == 2:
-            hours_ = 0
-            minutes_ = int(time_split[0])
-            seconds_ = int(time_split[1])
-        elif len(time_split) == 3:
-            hours_ = int(time_split[0])
-            minutes_ = int(time_split[1])
-            seconds_ = int(time_split[2])
-        else:
-            raise ValueError
-        time_strp = hours_ * 3600 + minutes_ * 60 + seconds_
-        if time_strp <= 86399:
-            return time_strp
-        else:
-            raise ConversionFailed('You can\'t put 24 hours+ as your time.')
-    except ValueError:
-        raise ConversionFailed(
-            'Only digits and ":" can be used. (10:00:00/10:00)'
-        )
+# How long a workout took, as M:S or H:M:S
+cardio_time_converter = Field(
+    clock_seconds, 'Only digits and ":" can be used. (10:00:00/10:00)',
+    pattern=r'(?:(\d+):)?(\d+):(\d+)',
+    at_most=(86399, 'You can\'t put 24 hours+ as your time.')
+)
 
 
 def cardio_distance_imperial_prompter(activity):
@@ -313,18 +501,12 @@ def cardio_distance_imperial_prompter(activity):
     )
 
 
-def cardio_distance_imperial_converter(raw_value, *, activity):
-    try:
-        distance = float(raw_value)
-    except (ValueError):
-        raise ConversionFailed(
-            'A whole ( 1 ) or float ( 1.0 ) number is required'
-        )
-    if distance >= 50.0:
-        raise ConversionFailed(
-            'Pretty sure you didn\'t go that far.'
-        )
-    return distance
+distance_message = 'A whole ( 1 ) or float ( 1.0 ) number is required'
+too_far = 'Pretty sure you didn\'t go that far.'
+
+cardio_distance_imperial_converter = Field(
+    float, distance_message, below=(50.0, too_far)
+)
 
 
 def cardio_distance_metric_prompter(activity):
@@ -335,18 +517,9 @@ def cardio_distance_metric_prompter(activity):
     )
 
 
-def cardio_distance_metric_converter(raw_value, *, activity):
-    try:
-        distance = float(raw_value)
-    except (ValueError):
-        raise ConversionFailed(
-            'A whole ( 1 ) or float ( 1.0 ) number is required'
-        )
-    if distance >= 80.467354394322222:
-        raise ConversionFailed(
-            'Pretty sure you didn\'t go that far.'
-        )
-    return distance
+cardio_distance_metric_converter = Field(
+    float, distance_message, below=(80.467354394322222, too_far)
+)
 
 
 def stats_agi_prompter(activity):
@@ -357,16 +530,40 @@ def stats_agi_prompter(activity):
     )
 
 
-def stats_agi_converter(raw_value, *, activity):
-    agility = raw_value.strip()
-    try:
-        if 0 <= int(agility) <= 10:
-            agility = int(agility)
-            return agility, 1
-        elif int(agility) > 10:
-            raise ConversionFailed('That\'s over the allowed amount (10)')
-    except ValueError:
-        raise ConversionFailed('Incorrect input')
+stat_field = Field(
+    int, 'Incorrect input', at_least=(0, 'Incorrect input'),
+    at_most=(10, 'That\'s over the allowed amount (10)')
+)
+no_points_left = 'You have no more points to use..'
+points_to_apply = 'You still have points to apply.'
+
+
+def stat_converter(next_step, back_to=None, points_left=None):
+    """
+    Return a converter for one of the initial stats, which returns the
+    points put in the stat and the step of `initial_stats` to go on to.
+
+    Unless `back_to` is None, 'b' goes back to that step. When
+    `points_left` is 'spare', some of the points must be left for the
+    stats after this one; when it's 'exact', every point left must go
+    into this one.
+    """
+    def converter(raw_value, *, activity):
+        stat = raw_value.strip()
+        if stat == 'b' and back_to is not None:
+            return 0, back_to
+        stat = stat_field(stat)
+        left = activity - stat
+        if points_left == 'spare' and left <= 0:
+            raise ConversionFailed(no_points_left)
+        elif points_left == 'exact' and left != 0:
+            raise ConversionFailed(
+                points_to_apply if left > 0 else no_points_left)
+        return stat, next_step
+    return converter
+
+
+stats_agi_converter = stat_converter(1)
 
 
 def stats_chr_prompter(activity):
@@ -377,18 +574,7 @@ def stats_chr_prompter(activity):
     )
 
 
-def stats_chr_converter(raw_value, *, activity):
-    charisma = raw_value.strip()
-    try:
-        if charisma == 'b':
-            return 0, 0
-        elif 0 <= int(charisma) <= 10:
-            charisma = int(charisma)
-            return charisma, 2
-        elif int(charisma) > 10:
-            raise ConversionFailed('That\'s over the allowed amount (10)')
-    except ValueError:
-        raise ConversionFailed('Incorrect input')
+stats_chr_converter = stat_converter(2, back_to=0)
 
 
 def stats_def_prompter(activity):
@@ -399,21 +585,7 @@ def stats_def_prompter(activity):
     )
 
 
-def stats_def_converter(raw_value, *, activity):
-    defense = raw_value.strip()
-    try:
-        if defense == 'b':
-            return 0, 1
-        elif 0 <= int(defense) <= 10:
-            if activity - int(defense) <= 0:
-                raise ConversionFailed('You have no more points to use..')
-            else:
-                defense = int(defense)
-                return defense, 3
-        elif int(defense) > 10:
-            raise ConversionFailed('That\'s over the allowed amount (10)')
-    except ValueError:
-        raise ConversionFailed('Incorrect input')
+stats_def_converter = stat_converter(3, back_to=1, points_left='spare')
 
 
 def stats_end_prompter(activity):
@@ -424,21 +596,7 @@ def stats_end_prompter(activity):
     )
 
 
-def stats_end_converter(raw_value, *, activity):
-    endurance = raw_value.strip()
-    try:
-        if endurance == 'b':
-            return 0, 2
-        elif 0 <= int(endurance) <= 10:
-            if activity - int(endurance) <= 0:
-                raise ConversionFailed('You have no more points to use..')
-            else:
-                endurance = int(endurance)
-                return endurance, 4
-        elif int(endurance) > 10:
-            raise ConversionFailed('That\'s over the allowed amount (10)')
-    except ValueError:
-        raise ConversionFailed('Incorrect input')
+stats_end_converter = stat_converter(4, back_to=2, points_left='spare')
 
 
 def stats_int_prompter(activity):
@@ -449,21 +607,7 @@ def stats_int_prompter(activity):
     )
 
 
-def stats_int_converter(raw_value, *, activity):
-    intelligence = raw_value.strip()
-    try:
-        if intelligence == 'b':
-            return 0, 3
-        elif 0 <= int(intelligence) <= 10:
-            if activity - int(intelligence) <= 0:
-                raise ConversionFailed('You have no more points to use..')
-            else:
-                intelligence = int(intelligence)
-                return intelligence, 5
-        elif int(intelligence) > 10:
-            raise ConversionFailed('That\'s over the allowed amount (10)')
-    except ValueError:
-        raise ConversionFailed('Incorrect input')
+stats_int_converter = stat_converter(5, back_to=3, points_left='spare')
 
 
 def stats_str_prompter(activity):
@@ -474,23 +618,7 @@ def stats_str_prompter(activity):
     )
 
 
-def stats_str_converter(raw_value, *, activity):
-    strength = raw_value.strip()
-    try:
-        if strength == 'b':
-            return 0, 4
-        elif 0 <= int(strength) <= 10:
-            if activity - int(strength) > 0:
-                raise ConversionFailed('You still have points to apply.')
-            elif activity - int(strength) == 0:
-                strength = int(strength)
-                return strength, 6
-            elif activity - int(strength) < 0:
-                raise ConversionFailed('You have no more points to use..')
-        elif int(strength) > 10:
-            raise ConversionFailed('That\'s over the allowed amount (10)')
-    except ValueError:
-        raise ConversionFailed('Incorrect input')
+stats_str_converter = stat_converter(6, back_to=4, points_left='exact')
 
 
 def measurement_change_prompter(activity):
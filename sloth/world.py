@@ -0,0 +1,165 @@
+# Copyright 2015, 2016 Scott King
+#
+# This file is part of Sloth.
+#
+# Sloth is free software: you can redistribute it and/or modify
+# it under the terms of the Affero GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sloth is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# Affero GNU General Public License for more details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# along with Sloth.  If not, see <http://www.gnu.org/licenses/>.
+#
+import hashlib
+import heapq
+import random
+from collections import namedtuple
+from sloth.combat import CombatEngine
+from sloth.entities import numpy
+
+# Ticks between two actions of an entity with no agility at all
+BASE_INTERVAL = 12
+
+# What one tick did: the entities that acted, the targets they picked
+# and the `RoundResult` of their attacks.
+TickResult = namedtuple('TickResult', ['tick', 'actors', 'targets',
+                                       'result'])
+
+
+def action_interval(agility):
+    """
+    Return the number of ticks between two actions of an entity: the
+    more agile, the sooner it acts again, but never twice in a tick.
+    """
+    return max(1, BASE_INTERVAL - agility)
+
+
+class World(object):
+    """
+    Drive the entities of an `EntityStore` in fixed ticks.
+
+    Every entity is in a priority queue keyed by the tick of its next
+    action, and acts every `action_interval` ticks while it lives; the
+    first action comes at a random offset within the interval, so
+    entities don't all act in lockstep. At each tick the entities due
+    act together: each attacks another random living entity, resolved
+    as one `CombatEngine` round.
+
+    Everything random comes from a `random.Random` seeded with `seed`,
+    and ties are broken by entity id, so a seed and a population always
+    give the same simulation. `checksum` summarizes the state, to
+    compare long runs across versions.
+
+    Given `ids`, the world only drives those entities, and they only
+    attack each other; the rest of the store is left alone.
+    """
+    def __init__(self, store, seed=None, ids=None):
+        self.store = store
+        self.random = random.Random(seed)
+        self.engine = CombatEngine(store, seed=self.random.getrandbits(64))
+        self.tick = 0
+        self._queue = []
+        if ids is None:
+            self.ids = None
+            self.add(range(len(store)))
+        else:
+            self.ids = sorted(ids)
+            if store.use_numpy:
+                self.ids = numpy.array(self.ids, dtype=numpy.intp)
+            self.add(self.ids)
+
+    def add(self, ids):
+        """
+        Schedule the entities `ids`, such as ones spawned after the
+        world was made.
+        """
+        agility = self.store.columns['agility']
+        for id in ids:
+            interval = action_interval(agility[id])
+            heapq.heappush(self._queue, (
+                self.tick + 1 + self.random.randrange(interval), int(id)))
+
+    def __len__(self):
+        return len(self._queue)
+
+    def living(self):
+        """
+        Return the ids of the living entities of this world.
+        """
+        if self.ids is None:
+            return self.store.living()
+        life = self.store.columns['life']
+        if self.store.use_numpy:
+            return self.ids[life[self.ids] > 0]
+        return [id for id in self.ids if life[id] > 0]
+
+    def step(self):
+        """
+        Advance one tick, and return its `TickResult`.
+        """
+        self.tick += 1
+        return self.act(self.due())
+
+    def due(self):
+        """
+        Return the living entities due to act this tick, and schedule
+        their next action.
+        """
+        life = self.store.columns['life']
+        agility = self.store.columns['agility']
+        queue = self._queue
+        actors = []
+        while queue and queue[0][0] <= self.tick:
+            ignored, id = heapq.heappop(queue)
+            # The dead drop out of the queue when their turn comes.
+            if life[id] > 0:
+                actors.append(id)
+        for id in actors:
+            heapq.heappush(queue, (self.tick + action_interval(agility[id]),
+                                   id))
+        return actors
+
+    def act(self, actors):
+        """
+        Have `actors` each attack another living entity, and return the
+        `TickResult`.
+        """
+        living = self.living()
+        # A lone survivor has nobody left to attack.
+        if not actors or len(living) < 2:
+            return TickResult(self.tick, actors, [], None)
+        targets = self.engine.pick_targets(actors, living)
+        return TickResult(self.tick, actors, targets,
+                          self.engine.resolve(actors, targets))
+
+    def run(self, ticks, on_tick=None):
+        """
+        Advance `ticks` ticks, calling `on_tick` with each `TickResult`
+        if given. Returns the number of entities that died.
+        """
+        deaths = 0
+        for each in range(ticks):
+            result = self.step()
+            if result.result is not None:
+                deaths += len(result.result.deaths)
+            if on_tick is not None:
+                on_tick(result)
+        return deaths
+
+    def checksum(self):
+        """
+        Return a hex digest of the tick and every column of the store.
+        """
+        return checksum(self.store, self.tick)
+
+
+def checksum(store, tick):
+    digest = hashlib.sha256(str(tick).encode('ascii'))
+    for name in sorted(store.columns):
+        digest.update(bytes(memoryview(store.columns[name])))
+    return digest.hexdigest()